@@ -0,0 +1,90 @@
+"""
+Compares Zero Anim Controls' control index with the ls scans it replaced.  Run with mayapy from the repository root:
+
+    mayapy benchmarks/bench_control_index.py --rigs 200 --controls 100
+
+A crowd of rigs is built, each in its own namespace with controls, joints and other transforms.  The same prefix list
+is matched with two ls scans and with the index, before and after controls are added, renamed and deleted so the
+callbacks have to keep the index up to date.  A new scene has to drop the index along with its node callbacks.  Exits
+with 1 if the index and ls disagree or the callbacks are left registered.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PATTERNS = ['*:ctrl*', '*:*_anim', 'ctrl*', 'rig_0001:fk*']
+
+
+def build_crowd(rigs, controls):
+    import maya.cmds as cmds
+    cmds.file(new=True, force=True)
+    for r in xrange(rigs):
+        namespace = cmds.namespace(add='rig_%04d' % r)
+        for c in xrange(controls):
+            cmds.createNode('transform', name='%s:ctrl_%03d' % (namespace, c))
+            cmds.createNode('joint', name='%s:fk_%03d_anim' % (namespace, c))
+            cmds.createNode('transform', name='%s:geo_%03d' % (namespace, c))
+
+
+def legacy_controls(patterns):
+    # the scans ZeroAnimControls.get_controls_prefix used to run
+    import maya.cmds as cmds
+    return cmds.ls(patterns, et='transform') + cmds.ls(patterns, et='joint')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Control index against ls scans.')
+    parser.add_argument('--rigs', type=int, default=200)
+    parser.add_argument('--controls', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    import maya.standalone
+    maya.standalone.initialize(name='python')
+    import maya.cmds as cmds
+    import zeroanimcontrolsgui
+
+    build_crowd(args.rigs, args.controls)
+    zero_anim = zeroanimcontrolsgui.ZeroAnimControls()
+
+    start = time.time()
+    for i in xrange(args.repeat):
+        expected = legacy_controls(PATTERNS)
+    legacy_seconds = (time.time() - start) / args.repeat
+
+    start = time.time()
+    zero_anim.get_controls_prefix(PATTERNS)
+    build_seconds = time.time() - start
+    start = time.time()
+    for i in xrange(args.repeat):
+        found = zero_anim.get_controls_prefix(PATTERNS)
+    index_seconds = (time.time() - start) / args.repeat
+    matches = sorted(found) == sorted(expected)
+
+    # the callbacks have to follow these without a rebuild
+    cmds.createNode('transform', name='ctrl_new')
+    cmds.rename('rig_0000:ctrl_000', 'rig_0000:renamed_000')
+    cmds.rename('rig_0000:geo_000', 'rig_0000:ctrl_geo_000')
+    cmds.delete('rig_0001:ctrl_001')
+    updated = sorted(zero_anim.get_controls_prefix(PATTERNS)) == sorted(legacy_controls(PATTERNS))
+
+    # nothing listens to node changes again until the next match builds the index
+    cmds.file(new=True, force=True)
+    index = zeroanimcontrolsgui.get_control_index()
+    released = not index.built and not index.node_callback_ids
+
+    sys.stdout.write('%d rigs, %d controls matched\n' % (args.rigs, len(expected)))
+    sys.stdout.write('ls      %8.4fs per reset\n' % legacy_seconds)
+    sys.stdout.write('index   %8.4fs per reset, %.4fs to build\n' % (index_seconds, build_seconds))
+    sys.stdout.write('matches %s, after edits %s, new scene %s\n' % (
+        'ok' if matches else 'MISMATCH', 'ok' if updated else 'MISMATCH', 'ok' if released else 'FAILED'))
+    index.close()
+    return 0 if matches and updated and released else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Import time of each tool.  Run with mayapy from the repository root:
+
+    mayapy benchmarks/bench_import_time.py --detail --max-seconds 0.5
+
+Every module is imported in a fresh mayapy process, after maya.standalone is initialized, so nothing is shared
+between them.  mayapy is python 2 and has no -X importtime, the child times __import__ instead and the slowest nested
+imports are printed with --detail.  The time of initialize itself is not counted.  Also reports whether importing
+pulled in pymel.  Exits with 1 if a module takes longer than --max-seconds.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ('modellibdb', 'modellibgui', 'exportmastergui', 'zeroanimcontrolsgui', 'renamemastergui')
+
+
+def time_import(module):
+    import maya.standalone
+    maya.standalone.initialize(name='python')
+    try:
+        import __builtin__ as builtins
+    except ImportError:
+        import builtins
+
+    # modules already loaded by initialize cost nothing, only the first import of a name is recorded
+    timings = []
+    stack = []
+    original_import = builtins.__import__
+
+    def timed_import(name, *args, **kwargs):
+        if name in sys.modules:
+            return original_import(name, *args, **kwargs)
+        stack.append(name)
+        start = time.time()
+        try:
+            return original_import(name, *args, **kwargs)
+        finally:
+            timings.append((len(stack) - 1, name, time.time() - start))
+            stack.pop()
+
+    sys.path.insert(0, ROOT)
+    builtins.__import__ = timed_import
+    start = time.time()
+    try:
+        __import__(module)
+    finally:
+        builtins.__import__ = original_import
+    return {
+        'module': module,
+        'seconds': time.time() - start,
+        'pymel': 'pymel.core' in sys.modules,
+        'imports': sorted(timings, key=lambda timing: -timing[2])[:15],
+    }
+
+
+def run_child(module):
+    output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--child', module])
+    # maya prints its own messages on startup, the result is the last line
+    return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Import time of each tool in a fresh mayapy.')
+    parser.add_argument('modules', nargs='*', default=MODULES)
+    parser.add_argument('--detail', action='store_true', help='Print the slowest nested imports of each module.')
+    parser.add_argument('--max-seconds', type=float, default=0.0, help='Fail if a module is slower, 0 to not check.')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        sys.stdout.write('\n' + json.dumps(time_import(args.child)) + '\n')
+        return 0
+
+    failed = False
+    for module in args.modules:
+        result = run_child(module)
+        slow = args.max_seconds and result['seconds'] > args.max_seconds
+        failed = failed or slow
+        sys.stdout.write('%-22s %8.3fs  pymel %-3s %s\n' % (
+            module, result['seconds'], 'yes' if result['pymel'] else 'no', 'SLOW' if slow else ''))
+        if args.detail:
+            for depth, name, seconds in result['imports']:
+                sys.stdout.write('    %8.3fs  %s (depth %d)\n' % (seconds, name, depth))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Times Zero Anim Controls' keyed resets.  Run with mayapy from the repository root:
+
+    mayapy benchmarks/bench_key_range.py --controls 500 --frames 1000
+
+The rig from bench_zero_anim.py is keyed over the range with ZeroAnimControls.reset_controls in Every frame mode, then
+its keys are moved back with Existing keys after being offset.  For comparison the loop an animator would script, step
+to a frame, reset and key, is timed over --loop-frames frames and scaled up to the whole range.  The keys are checked
+to hold the reset values, and a single undo has to remove the keyed reset.  A control animated from 1 on the current
+frame has to have all of its keys reset too.  Exits with 1 if a check fails.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_zero_anim import build_rig
+
+
+def loop_key_range(zero_anim, controls, frames):
+    # scrubbing time, resetting at the current frame and keying the controls
+    import maya.cmds as cmds
+    for frame in frames:
+        cmds.currentTime(frame)
+        zero_anim.reset_controls(controls)
+        cmds.setKeyframe(controls)
+
+
+def keys_hold(values, frame_count):
+    import maya.cmds as cmds
+    for plug, value in values.iteritems():
+        keys = cmds.keyframe(plug, query=True, valueChange=True) or []
+        if len(keys) < frame_count or any(abs(key - value) > 1e-6 for key in keys):
+            return False
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Keyed reset over a frame range.')
+    parser.add_argument('--controls', type=int, default=500)
+    parser.add_argument('--frames', type=int, default=1000)
+    parser.add_argument('--loop-frames', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    import maya.standalone
+    maya.standalone.initialize(name='python')
+    import maya.cmds as cmds
+    import zeroanimcontrolsgui
+    cmds.undoInfo(state=True, infinity=True)
+    zero_anim = zeroanimcontrolsgui.ZeroAnimControls()
+    time_range = (1, args.frames)
+
+    controls = build_rig(args.controls, args.seed)
+    start = time.time()
+    loop_key_range(zero_anim, controls, range(1, args.loop_frames + 1))
+    loop_seconds = (time.time() - start) * args.frames / float(args.loop_frames)
+
+    controls = build_rig(args.controls, args.seed)
+    cmds.currentTime(1)
+    start = time.time()
+    values = zero_anim.reset_controls(controls, mode='Every frame', time_range=time_range)
+    every_seconds = time.time() - start
+    keyed = keys_hold(values, args.frames)
+    cmds.undo()
+    undone = all(len(cmds.keyframe(plug, query=True, valueChange=True) or []) < args.frames for plug in values)
+
+    # move every key off its reset value, then back with Existing keys
+    zero_anim.reset_controls(controls, mode='Every frame', time_range=time_range)
+    cmds.keyframe(values.keys(), edit=True, relative=True, valueChange=0.5)
+    start = time.time()
+    zero_anim.reset_controls(controls, mode='Existing keys', time_range=time_range)
+    existing_seconds = time.time() - start
+    moved = keys_hold(values, args.frames)
+
+    # 1 is only the value on the current frame, the key further on has to be reset as well
+    control = cmds.createNode('transform', name='ctrl_one')
+    cmds.setKeyframe(control, attribute='translateX', time=1, value=1)
+    cmds.setKeyframe(control, attribute='translateX', time=10, value=5)
+    cmds.currentTime(1)
+    zero_anim.reset_controls([control], mode='Existing keys', time_range=(1, 10))
+    at_one = keys_hold({control + '.translateX': 0}, 2)
+
+    sys.stdout.write('%d controls x %d frames, %d plugs keyed\n' % (len(controls), args.frames, len(values)))
+    sys.stdout.write('loop           %8.3fs  (scaled from %d frames)\n' % (loop_seconds, args.loop_frames))
+    sys.stdout.write('every frame    %8.3fs  %.1fx\n' % (every_seconds, loop_seconds / max(every_seconds, 1e-9)))
+    sys.stdout.write('existing keys  %8.3fs\n' % existing_seconds)
+    sys.stdout.write('keys %s, single undo %s, existing keys %s, keyed from 1 %s\n' % (
+        'ok' if keyed else 'MISMATCH', 'ok' if undone else 'FAILED', 'ok' if moved else 'MISMATCH',
+        'ok' if at_one else 'MISMATCH'))
+    return 0 if keyed and undone and moved and at_one else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
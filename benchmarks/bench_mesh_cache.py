@@ -0,0 +1,96 @@
+"""
+Round trip and throughput check for the mesh cache format.  Run with mayapy from the repository root:
+
+    mayapy benchmarks/bench_mesh_cache.py --subdivisions 1000
+
+A plane with uvs is written with the stock OBJexport plugin and with the Mesh cache writer.  The obj text is parsed
+back, the cache is memory mapped back, and both are checked to describe the same faces: the same point, normal and uv
+at every face vertex.  Load time and throughput of each are printed.  Exits with 1 if the round trip does not match.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_obj(path):
+    # deliberately plain, this is the kind of parsing downstream tools do today
+    import numpy as np
+    points, uvs, normals, counts, face_points, face_uvs, face_normals = [], [], [], [], [], [], []
+    with open(path, 'r') as f:
+        for line in f:
+            tokens = line.split()
+            if not tokens:
+                continue
+            if tokens[0] == 'v':
+                points.append([float(t) for t in tokens[1:4]])
+            elif tokens[0] == 'vt':
+                uvs.append([float(t) for t in tokens[1:3]])
+            elif tokens[0] == 'vn':
+                normals.append([float(t) for t in tokens[1:4]])
+            elif tokens[0] == 'f':
+                counts.append(len(tokens) - 1)
+                for token in tokens[1:]:
+                    point, uv, normal = token.split('/')
+                    face_points.append(int(point) - 1)
+                    face_uvs.append(int(uv) - 1)
+                    face_normals.append(int(normal) - 1)
+    return dict(points=np.array(points), uvs=np.array(uvs), normals=np.array(normals), face_counts=np.array(counts),
+                face_points=np.array(face_points), face_uvs=np.array(face_uvs), face_normals=np.array(face_normals))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Mesh cache round trip and throughput.')
+    parser.add_argument('--subdivisions', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    import maya.standalone
+    maya.standalone.initialize(name='python')
+    import maya.cmds as cmds
+    import numpy as np
+    import exportmastergui
+    import meshcache
+
+    plane = cmds.polyPlane(sx=args.subdivisions, sy=args.subdivisions, ch=False)[0]
+    export_master = exportmastergui.ExportMaster()
+    directory = tempfile.mkdtemp(prefix='benchMeshCache')
+    try:
+        export_master.load_plugin('OBJexport')
+        obj_path = export_master.write_object(plane, directory, 'OBJexport')
+        cache_path = export_master.write_object(plane, directory, 'Mesh cache')
+
+        start = time.time()
+        obj = parse_obj(obj_path)
+        obj_seconds = time.time() - start
+
+        start = time.time()
+        cache = meshcache.read(cache_path)
+        # touch every buffer so the pages are actually read
+        checksum = sum(float(getattr(cache, name).sum()) for name, dtype, columns, count in meshcache.BUFFERS)
+        cache_seconds = time.time() - start
+
+        # the stock exporter is free to order and share normals and uvs its own way, compare per face vertex
+        matches = all([
+            (obj['face_counts'] == cache.face_counts).all(),
+            np.allclose(obj['points'][obj['face_points']], cache.points[cache.face_points], atol=1e-5),
+            np.allclose(obj['normals'][obj['face_normals']], cache.normals[cache.face_normals], atol=1e-5),
+            np.allclose(obj['uvs'][obj['face_uvs']], cache.uvs[cache.face_uvs], atol=1e-5),
+        ])
+        cache.close()
+
+        for name, path, seconds in (('obj', obj_path, obj_seconds), ('mcache', cache_path, cache_seconds)):
+            size = os.path.getsize(path) / 1048576.0
+            sys.stdout.write('%-7s %8.1f MB %8.3fs %10.1f MB/s\n' % (name, size, seconds, size / max(seconds, 1e-9)))
+        sys.stdout.write('round trip %s (checksum %.3f)\n' % ('ok' if matches else 'MISMATCH', checksum))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return 0 if matches else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Times opening and refreshing the Model Library list view at several library sizes.  Run with mayapy from the
+repository root:
+
+    mayapy benchmarks/bench_model_list.py --sizes 1000 10000 50000
+
+No files are touched, the library is filled with in memory models whose icons do not exist.  For every size the script
+reports the time to show the view, the time to apply a save (one row appended) and a delete (one row removed), the
+time of a full reset and how many rows the view actually fetched.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def timed(function):
+    start = time.time()
+    function()
+    return time.time() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Model Library view benchmark.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    args = parser.parse_args(argv)
+
+    import maya.standalone
+    maya.standalone.initialize(name='python')
+    from PySide import QtGui, QtCore
+    import modellibgui
+
+    app = QtGui.QApplication.instance() or QtGui.QApplication(sys.argv)
+    sys.stdout.write('%8s %10s %10s %10s %10s %8s\n' % ('models', 'open', 'save', 'delete', 'reset', 'fetched'))
+    for size in args.sizes:
+        model_lib = modellibgui.ModelLib()
+        model_lib.model_list = [modellibgui.Model(name='model%06d' % i) for i in xrange(size)]
+        loader = modellibgui.ThumbnailLoader(modellibgui.ModelLibUI.SIZE)
+        list_model = modellibgui.ModelListModel(model_lib, loader)
+        view = QtGui.QListView()
+        view.setViewMode(QtGui.QListView.IconMode)
+        view.setUniformItemSizes(True)
+        view.setLayoutMode(QtGui.QListView.Batched)
+        view.resize(300, 300)
+
+        def show():
+            view.setModel(list_model)
+            view.show()
+            app.processEvents()
+
+        def save():
+            model_lib.model_list.append(modellibgui.Model(name='saved'))
+            list_model.model_appended()
+            app.processEvents()
+
+        def delete():
+            list_model.beginRemoveRows(QtCore.QModelIndex(), 0, 0)
+            del model_lib.model_list[0]
+            list_model.fetched -= 1
+            list_model.endRemoveRows()
+            app.processEvents()
+
+        def reset():
+            list_model.reset()
+            app.processEvents()
+
+        open_time = timed(show)
+        save_time = timed(save)
+        delete_time = timed(delete)
+        reset_time = timed(reset)
+        sys.stdout.write('%8d %9.3fs %9.3fs %9.3fs %9.3fs %8d\n' % (size, open_time, save_time, delete_time, reset_time,
+                                                                   list_model.fetched))
+        view.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""
+Times the Model Library search index at several library sizes.  It does not need Maya, run it with python or mayapy
+from the repository root:
+
+    python benchmarks/bench_model_search.py --sizes 1000 10000 50000
+
+Models get generated names and tags.  For every size the script reports the time to build the index, the time of a
+save (add) and a delete (remove) and the slowest of a set of filter-as-you-type queries, each typed one character at a
+time, so it can be compared against a 16ms frame.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import modellibdb
+
+WORDS = ['chair', 'table', 'lamp', 'sofa', 'crate', 'barrel', 'rock', 'tree', 'door', 'window', 'wall', 'car']
+TAGS = ['prop', 'furniture', 'env', 'hero', 'vehicle', 'lowpoly', 'wip']
+QUERIES = [('chair', None), ('rock big', None), ('', ['prop']), ('lamp', ['env', 'lowpoly']), ('zzz', None)]
+
+
+def timed(function):
+    start = time.time()
+    function()
+    return time.time() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Model Library search benchmark.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    args = parser.parse_args(argv)
+
+    random.seed(0)
+    sys.stdout.write('%8s %10s %10s %10s %12s\n' % ('models', 'build', 'add', 'remove', 'worst query'))
+    for size in args.sizes:
+        items = [('%s%s_%s_%05d' % (random.choice(WORDS), random.choice(WORDS).title(), random.choice(['big', 'small']),
+                                    i), random.sample(TAGS, random.randint(0, 3))) for i in xrange(size)]
+        index = modellibdb.SearchIndex()
+        build_time = timed(lambda: index.extend(items))
+        add_time = timed(lambda: index.add('chairSaved_big', ['prop']))
+        remove_time = timed(lambda: index.remove(items[size // 2][0]))
+
+        worst = 0.0
+        for text, tags in QUERIES:
+            for i in xrange(1, len(text) + 1):
+                worst = max(worst, timed(lambda: index.search(text[:i], tags)))
+            worst = max(worst, timed(lambda: index.search(text, tags)))
+        sys.stdout.write('%8d %9.3fs %9.4fs %9.4fs %11.4fs\n' % (size, build_time, add_time, remove_time, worst))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
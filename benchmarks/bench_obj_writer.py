@@ -0,0 +1,62 @@
+"""
+Compares Export Master's native obj writer against the stock OBJexport plugin.  Run with mayapy from the repository
+root:
+
+    mayapy benchmarks/bench_obj_writer.py --subdivisions 1000 --repeat 3
+
+A plane with subdivisions x subdivisions faces is built ((subdivisions + 1) ** 2 vertices, 1000 gives just over a
+million), written with both exporters into a temp directory and the best time and file size of each is printed.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def best_time(function, repeat):
+    timings = []
+    for i in range(repeat):
+        start = time.time()
+        function()
+        timings.append(time.time() - start)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Native obj writer benchmark.')
+    parser.add_argument('--subdivisions', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    import maya.standalone
+    maya.standalone.initialize(name='python')
+    import maya.cmds as cmds
+    import exportmastergui
+
+    plane = cmds.polyPlane(sx=args.subdivisions, sy=args.subdivisions, ch=False)[0]
+    cmds.polyAutoProjection(plane, ch=False)
+    sys.stdout.write('%s: %d vertices, %d faces\n' % (plane, cmds.polyEvaluate(plane, v=True),
+                                                       cmds.polyEvaluate(plane, f=True)))
+
+    export_master = exportmastergui.ExportMaster()
+    export_master.load_plugin('OBJexport')
+    directory = tempfile.mkdtemp(prefix='benchObjWriter')
+    try:
+        for export_type, name in (('OBJexport', 'stock'), ('OBJ native', 'native')):
+            target = os.path.join(directory, name)
+            os.mkdir(target)
+            seconds = best_time(lambda: export_master.write_object(plane, target, export_type), args.repeat)
+            size = os.path.getsize(os.path.join(target, plane + '.obj'))
+            sys.stdout.write('%-8s %8.2fs %10.1f MB\n' % (name, seconds, size / 1048576.0))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Times Zero Anim Controls' pose snapshots.  Run with mayapy from the repository root:
+
+    mayapy benchmarks/bench_pose_snapshot.py --controls 500
+
+The rig from bench_zero_anim.py is snapshot and written to a pose file, then reset.  The pose is read back and
+restored with ZeroAnimControls.restore_pose, which only sets the plugs that differ, and the same pose is also pushed
+with a setAttr for every plug for comparison.  Diffs are timed with and without numpy.  Checks that the restored rig
+matches the snapshot and that a single undo puts the reset back.  Exits with 1 if a check fails.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_zero_anim import build_rig
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pose snapshot, diff and restore.')
+    parser.add_argument('--controls', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    import maya.standalone
+    maya.standalone.initialize(name='python')
+    import maya.cmds as cmds
+    import posesnapshot
+    import zeroanimcontrolsgui
+    cmds.undoInfo(state=True, infinity=True)
+    zero_anim = zeroanimcontrolsgui.ZeroAnimControls()
+
+    controls = build_rig(args.controls, args.seed)
+    directory = tempfile.mkdtemp(prefix='benchPoseSnapshot')
+    try:
+        start = time.time()
+        pose = zero_anim.snapshot(controls)
+        snapshot_seconds = time.time() - start
+        path = pose.write(os.path.join(directory, 'pose' + posesnapshot.EXTENSION))
+
+        zero_anim.reset_controls(controls)
+        reset = zero_anim.snapshot(controls)
+        start = time.time()
+        pose = posesnapshot.read(path)
+        values = zero_anim.restore_pose(pose, controls)
+        restore_seconds = time.time() - start
+        restored = not zero_anim.snapshot(controls).diff(pose)
+        cmds.undo()
+        undone = not zero_anim.snapshot(controls).diff(reset)
+
+        # every plug of the pose, whether it changed or not
+        start = time.time()
+        for plug, value in zip(pose.plugs, pose.values):
+            cmds.setAttr(plug, value)
+        set_all_seconds = time.time() - start
+
+        timings = []
+        numpy = posesnapshot.get_numpy()
+        for name, module in (('numpy', numpy), ('python', None)):
+            if name == 'numpy' and numpy is None:
+                continue
+            posesnapshot.np = module
+            start = time.time()
+            for i in xrange(100):
+                reset.diff(pose)
+            timings.append((name, (time.time() - start) / 100))
+        posesnapshot.np = numpy
+
+        sys.stdout.write('%d controls, %d plugs, %d changed, %d byte pose file\n' % (
+            len(controls), len(pose), len(values), os.path.getsize(path)))
+        sys.stdout.write('snapshot     %8.4fs\n' % snapshot_seconds)
+        sys.stdout.write('restore      %8.4fs  (read, diff, set changed)\n' % restore_seconds)
+        sys.stdout.write('set all      %8.4fs\n' % set_all_seconds)
+        for name, seconds in timings:
+            sys.stdout.write('diff %-7s %8.5fs\n' % (name, seconds))
+        sys.stdout.write('restore %s, single undo %s\n' % (
+            'ok' if restored else 'MISMATCH', 'ok' if undone else 'FAILED'))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return 0 if restored and undone else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
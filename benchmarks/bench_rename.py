@@ -0,0 +1,92 @@
+"""
+Times Rename Master's planned renames.  Run with mayapy from the repository root:
+
+    mayapy benchmarks/bench_rename.py --groups 500 --children 100 --max-seconds 10
+
+Builds groups of children that share names across groups, selects every one of them and adds a prefix with
+RenameMaster.add_prefix.  The per node loop add_prefix used to run is timed on --loop-count nodes of a copy with
+unique names, it fails on the shared ones, and scaled up.  Also checks that one undo reverts the rename, that two
+nodes can swap names and that two nodes asked for the same name are both skipped.  Exits with 1 if a check fails, if
+the planned rename takes longer than --max-seconds or if it is not faster than the loop.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def build_scene(groups, children, unique_names=False):
+    import maya.cmds as cmds
+    cmds.file(new=True, force=True)
+    for g in xrange(groups):
+        group = cmds.createNode('transform', name='group_%04d' % g)
+        for c in xrange(children):
+            # unless unique_names, the same names under every group, only the long names are unique
+            name = 'child_%04d_%03d' % (g, c) if unique_names else 'child_%03d' % c
+            cmds.createNode('transform', name=name, parent=group)
+    return cmds.ls('group_*', dag=True, type='transform', long=True)
+
+
+def loop_add_prefix(selection, prefix_str):
+    # the loop RenameMaster.add_prefix used to run
+    import maya.cmds as cmds
+    for sel in selection:
+        cmds.rename(sel, prefix_str + sel)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Planned renames against the per node loop.')
+    parser.add_argument('--groups', type=int, default=500)
+    parser.add_argument('--children', type=int, default=100)
+    parser.add_argument('--loop-count', type=int, default=2000)
+    parser.add_argument('--max-seconds', type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    import maya.standalone
+    maya.standalone.initialize(name='python')
+    import maya.cmds as cmds
+    import renamemastergui
+    cmds.undoInfo(state=True, infinity=True)
+    rename_master = renamemastergui.RenameMaster()
+
+    # the loop prefixes partial paths, which rename does not take, so it gets names that are unique
+    nodes = build_scene(args.groups, args.children, unique_names=True)
+    selection = cmds.ls(nodes[:args.loop_count])
+    start = time.time()
+    loop_add_prefix(selection, 'p_')
+    loop_seconds = (time.time() - start) * len(nodes) / float(len(selection))
+
+    nodes = build_scene(args.groups, args.children)
+    before = sorted(cmds.ls(type='transform', long=True))
+    cmds.select(nodes)
+    start = time.time()
+    plan = rename_master.add_prefix(cmds.ls(sl=True), 'p_')
+    planned_seconds = time.time() - start
+    after = cmds.ls('p_group_*', dag=True, type='transform', long=True)
+    renamed = len(plan.entries) == len(after) == len(nodes) and \
+        all(node.rpartition('|')[2].startswith('p_') for node in after)
+    cmds.undo()
+    undone = sorted(cmds.ls(type='transform', long=True)) == before
+
+    # a swap needs temporary names, the same name for two siblings is a clash
+    names = {'child_000': 'child_001', 'child_001': 'child_000', 'child_002': 'twin', 'child_003': 'twin'}
+    uuids = cmds.ls(['group_0000|child_%03d' % c for c in xrange(4)], uuid=True)
+    rename_master.rename(['group_0000|child_%03d' % c for c in xrange(4)], lambda name: names.get(name, name))
+    swapped = [cmds.ls(uuid)[0].rpartition('|')[2] for uuid in uuids] == [
+        'child_001', 'child_000', 'child_002', 'child_003']
+
+    sys.stdout.write('%d nodes\n' % len(nodes))
+    sys.stdout.write('loop     %8.3fs  (scaled from %d nodes)\n' % (loop_seconds, len(selection)))
+    sys.stdout.write('planned  %8.3fs  %.1fx\n' % (planned_seconds, loop_seconds / max(planned_seconds, 1e-9)))
+    fast = planned_seconds <= args.max_seconds and planned_seconds < loop_seconds
+    sys.stdout.write('renamed %s, single undo %s, swap and clash %s, time %s\n' % (
+        'ok' if renamed else 'FAILED', 'ok' if undone else 'FAILED', 'ok' if swapped else 'FAILED',
+        'ok' if fast else 'TOO SLOW'))
+    return 0 if renamed and undone and swapped and fast else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Compares Zero Anim Controls' batched reset with the per attribute loop it replaced.  Run with mayapy from the
+repository root:
+
+    mayapy benchmarks/bench_zero_anim.py --controls 500
+
+A rig of controls with random translate, rotate and scale values, extra keyable attributes, locked and animated
+attributes is built twice from the same seed.  One copy is reset with the old loop and the other with
+ZeroAnimControls.reset_controls.  The script checks that both end up with the same values and that a single undo puts
+the batched reset back.  Exits with 1 if either check fails.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def legacy_reset_controls(anim_controls):
+    # the loop ZeroAnimControls.reset_controls used to run
+    import maya.cmds as cmds
+    for control in anim_controls:
+        attributes = cmds.listAttr(control, k=True)
+
+        for attr in attributes:
+            full_attribute_name = control + '.' + attr
+
+            if not cmds.getAttr(full_attribute_name, lock=True):
+                if cmds.getAttr(full_attribute_name) != 1:
+                    if attr.find('scale') == -1:
+                        cmds.setAttr(full_attribute_name, 0)
+                    else:
+                        cmds.setAttr(full_attribute_name, 1)
+
+
+def build_rig(count, seed):
+    import maya.cmds as cmds
+    cmds.file(new=True, force=True)
+    rng = random.Random(seed)
+    controls = []
+    for i in xrange(count):
+        control = cmds.createNode('transform', name='ctrl_%04d' % i)
+        cmds.addAttr(control, longName='blend', attributeType='double', keyable=True)
+        cmds.addAttr(control, longName='space', attributeType='enum', enumName='world:local:parent', keyable=True)
+        for attr in ('translateX', 'translateY', 'translateZ', 'rotateX', 'rotateY', 'rotateZ', 'blend'):
+            # about a third of the attributes are already at rest
+            cmds.setAttr('%s.%s' % (control, attr), rng.choice([0, 1, rng.uniform(-10, 10)]))
+        for attr in ('scaleX', 'scaleY', 'scaleZ'):
+            cmds.setAttr('%s.%s' % (control, attr), rng.choice([1, rng.uniform(0.5, 2)]))
+        cmds.setAttr(control + '.space', rng.randint(0, 2))
+        if i % 10 == 0:
+            cmds.setAttr(control + '.translateY', lock=True)
+        if i % 25 == 0:
+            cmds.setKeyframe(control, attribute='rotateY', time=1, value=rng.uniform(-10, 10))
+        controls.append(control)
+    return controls
+
+
+def read_values(controls):
+    import maya.cmds as cmds
+    values = {}
+    for control in controls:
+        for attr in cmds.listAttr(control, k=True):
+            values['%s.%s' % (control, attr)] = round(cmds.getAttr('%s.%s' % (control, attr)), 6)
+    return values
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Batched reset against the per attribute loop.')
+    parser.add_argument('--controls', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    import maya.standalone
+    maya.standalone.initialize(name='python')
+    import maya.cmds as cmds
+    import zeroanimcontrolsgui
+    cmds.undoInfo(state=True, infinity=True)
+
+    controls = build_rig(args.controls, args.seed)
+    start = time.time()
+    legacy_reset_controls(controls)
+    legacy_seconds = time.time() - start
+    expected = read_values(controls)
+
+    controls = build_rig(args.controls, args.seed)
+    before = read_values(controls)
+    start = time.time()
+    values = zeroanimcontrolsgui.ZeroAnimControls().reset_controls(controls)
+    batched_seconds = time.time() - start
+    matches = read_values(controls) == expected
+    cmds.undo()
+    undone = read_values(controls) == before
+
+    sys.stdout.write('%d controls, %d attributes changed\n' % (len(controls), len(values)))
+    sys.stdout.write('loop     %8.3fs\n' % legacy_seconds)
+    sys.stdout.write('batched  %8.3fs  %.1fx\n' % (batched_seconds, legacy_seconds / max(batched_seconds, 1e-9)))
+    sys.stdout.write('values %s, single undo %s\n' % ('match' if matches else 'MISMATCH', 'ok' if undone else 'FAILED'))
+    return 0 if matches and undone else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
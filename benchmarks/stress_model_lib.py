@@ -0,0 +1,149 @@
+"""
+Hammers one model library index with many writer processes and checks nothing was lost.  It does not need Maya, run it
+with python from the repository root, pointing --directory at the share to test:
+
+    python benchmarks/stress_model_lib.py --processes 16 --saves 200 --directory /mnt/share/stressLibrary --shared
+
+Every process saves its own models and also increments a counter model shared by all of them, read the version, write
+with that version expected, retry on ConflictError.  At the end every model must be in the index, the counter must
+equal processes * saves and every save must be in the change log, when the run fits in it.
+
+A second round saves real .ma files into the directory the way Model Library does, the file is moved in and the row
+added under the library lock, while another process keeps reconciling the directory with the index.  Every one of
+those models must still be in the index at the end.  The directory is created and its index removed first, point it
+somewhere disposable.
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import modellibdb
+
+COUNTER = 'counter'
+
+
+def writer(args):
+    db_path, number, saves, shared = args
+    index = modellibdb.ModelLibIndex(db_path, shared=shared)
+    conflicts = 0
+    for i in xrange(saves):
+        index.save('model_%03d_%05d' % (number, i), '/models/%d/%d.ma' % (number, i),
+                   '/models/%d/%d.jpg' % (number, i))
+        # read, modify, write with the version read, the way an artist overwriting a model does
+        while True:
+            row = index.get(COUNTER)
+            try:
+                index.save(COUNTER, str(int(row['path']) + 1), '', expected_version=row['version'])
+                break
+            except modellibdb.ConflictError:
+                conflicts += 1
+    index.close()
+    return conflicts
+
+
+def file_writer(args):
+    # the way ModelLib.save_model saves, written aside first and moved in under the lock together with the row
+    db_path, directory, number, saves, shared = args
+    index = modellibdb.ModelLibIndex(db_path, shared=shared)
+    saving_directory = os.path.join(directory, modellibdb.SAVING_DIRECTORY_NAME)
+    modellibdb.make_directory(saving_directory)
+    for i in xrange(saves):
+        name = 'file_%03d_%05d' % (number, i)
+        handle, temp_path = tempfile.mkstemp(suffix='.ma', dir=saving_directory)
+        os.write(handle, '//Maya ASCII scene\n')
+        os.close(handle)
+        with index.write():
+            path = os.path.join(directory, name + '.ma')
+            modellibdb.replace_file(temp_path, path)
+            index.save(name, path, '')
+    index.close()
+    return 0
+
+
+def reconciler(args):
+    # what every artist opening the Model Library does, returns the names of the models it removed
+    db_path, directory, reconciles, shared = args
+    index = modellibdb.ModelLibIndex(db_path, shared=shared)
+    removed = []
+    for i in xrange(reconciles):
+        removed.extend(index.reconcile(directory)[0])
+    index.close()
+    return removed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Model library concurrency stress test.')
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--saves', type=int, default=100)
+    parser.add_argument('--directory', default=os.path.join(os.path.expanduser('~'), 'modelLibraryStress'))
+    parser.add_argument('--shared', action='store_true', help='Use the network share settings, no WAL.')
+    args = parser.parse_args(argv)
+
+    modellibdb.make_directory(args.directory)
+    db_path = os.path.join(args.directory, modellibdb.DB_NAME)
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    index = modellibdb.ModelLibIndex(db_path, shared=args.shared)
+    index.save(COUNTER, '0', '')
+    first_change = index.last_change()
+
+    start = time.time()
+    pool = multiprocessing.Pool(args.processes)
+    conflicts = sum(pool.map(writer, [(db_path, number, args.saves, args.shared)
+                                      for number in xrange(args.processes)]))
+    pool.close()
+    pool.join()
+    seconds = time.time() - start
+
+    expected = args.processes * args.saves
+    models = len(index.all()) - 1
+    counter = int(index.get(COUNTER)['path'])
+    last_change, names = index.changes_since(first_change)
+    # the log is trimmed to CHANGE_LOG_SIZE entries, only a run that fits can be checked against it
+    log_expected = expected * 2 if expected * 2 <= modellibdb.CHANGE_LOG_SIZE else None
+    logged = len(names) if names is not None else None
+    index.close()
+
+    sys.stdout.write('%d processes x %d saves in %.2fs, %.0f writes/s, %d version conflicts retried\n' %
+                     (args.processes, args.saves, seconds, expected * 2 / seconds, conflicts))
+    sys.stdout.write('models %d/%d, counter %d/%d, change log %s/%s\n' % (models, expected, counter, expected, logged,
+                                                                         log_expected))
+    if models != expected or counter != expected or (log_expected is not None and logged != log_expected):
+        sys.stdout.write('LOST UPDATES\n')
+        return 1
+
+    # the rows above point at files that do not exist, reconcile removes them, so this round comes second
+    for file_name in modellibdb.list_files(args.directory):
+        if file_name.startswith('file_') and file_name.endswith('.ma'):
+            os.remove(os.path.join(args.directory, file_name))
+    start = time.time()
+    pool = multiprocessing.Pool(args.processes + 1)
+    reconciling = pool.apply_async(reconciler, [(db_path, args.directory, args.saves, args.shared)])
+    pool.map(file_writer, [(db_path, args.directory, number, args.saves, args.shared)
+                           for number in xrange(args.processes)])
+    removed = [name for name in reconciling.get() if name.startswith('file_')]
+    pool.close()
+    pool.join()
+    seconds = time.time() - start
+
+    index = modellibdb.ModelLibIndex(db_path, shared=args.shared)
+    saved = len([row for row in index.all() if row['name'].startswith('file_')])
+    index.close()
+    sys.stdout.write('%d processes x %d saves against %d reconciles in %.2fs, models %d/%d, %d removed by reconcile\n'
+                     % (args.processes, args.saves, args.saves, seconds, saved, expected, len(removed)))
+    if saved != expected or removed:
+        sys.stdout.write('LOST UPDATES\n')
+        return 1
+    sys.stdout.write('No updates lost.\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Runs Export Master without the gui.  Launch it with mayapy, for example:
+
+    mayapy exportmasterbatch.py /path/to/scene.mb -t OBJexport -d /path/to/exportLib pCube1 pSphere1
+
+The scene is opened, the objects given on the command line are exported exactly as the Export Master dialog would
+export them and one json line per object (name, path, status, error, seconds) is written to stdout.  If no objects are
+given every transform with a mesh in the scene is exported.  The scene itself is never saved.  Export Master also uses
+this script as its worker process when exporting in parallel.
+"""
+
+import argparse
+import json
+import sys
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Export Master batch export.')
+    parser.add_argument('scene', help='Maya scene to open.')
+    parser.add_argument('objects', nargs='*', help='Transforms to export, defaults to every mesh transform.')
+    parser.add_argument('-t', '--type', dest='export_type', default='FBX export', help='FBX export or OBJexport.')
+    parser.add_argument('-d', '--directory', help='Destination directory, defaults to the exportLib directory.')
+    parser.add_argument('--objects-file', help='Json file holding the list of transforms to export.')
+    parser.add_argument('--pivot-base', action='store_true', help='Move pivots to the base of each object.')
+    parser.add_argument('--incremental', action='store_true', help='Skip objects unchanged since the last export.')
+    parser.add_argument('--force', action='store_true', help='With --incremental, export everything anyway.')
+    parser.add_argument('--bulk', action='store_true', help='Write the objects into shared files plus an index.')
+    parser.add_argument('--chunk-size', type=int, default=0, help='With --bulk, objects per file, 0 for one file.')
+    return parser.parse_args(argv)
+
+
+def mesh_transforms():
+    import maya.cmds as cmds
+    meshes = cmds.ls(type='mesh', noIntermediate=True, long=True) or []
+    transforms = cmds.listRelatives(meshes, parent=True, fullPath=True) or []
+    # several shapes can share a parent, keep the first occurrence only and hand back the shortest unique names
+    seen = set()
+    return cmds.ls([t for t in transforms if not (t in seen or seen.add(t))]) or []
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # maya has to be initialized before exportmastergui is imported
+    import maya.standalone
+    maya.standalone.initialize(name='python')
+    import maya.cmds as cmds
+    import exportmastergui
+
+    if args.export_type not in exportmastergui.EXPORT_OPTIONS_LIST:
+        sys.stderr.write('Unknown export type: %s\n' % args.export_type)
+        return 1
+
+    objects = args.objects
+    if args.objects_file:
+        with open(args.objects_file, 'r') as f:
+            objects = objects + json.load(f)
+
+    cmds.file(args.scene, open=True, force=True)
+    job = exportmastergui.ExportJob(
+        objects=objects or mesh_transforms(),
+        export_type=args.export_type,
+        directory=args.directory,
+        set_pivot_base=args.pivot_base,
+        incremental=args.incremental or args.force,
+        force=args.force,
+        bulk=args.bulk,
+        chunk_size=args.chunk_size
+    )
+
+    for result in exportmastergui.ExportMaster().run(job):
+        sys.stdout.write(json.dumps(result.as_dict()) + '\n')
+        sys.stdout.flush()
+
+    if hasattr(maya.standalone, 'uninitialize'):
+        maya.standalone.uninitialize()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
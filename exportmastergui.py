@@ -3,19 +3,63 @@ This script exports individual or a multi selection of objects in a scene.  Each
 individual file.  The name of the file is derived from it's name in the scene.  On selection, selected objects are
 positioned at 0,0 cords.  User has the option to export as OBJ or FBX.  More export options will be available in the
 future as well as the option to for go zeroing out the object.  By default an exportLib folder is created in the users
-main maya directory.  The user also has the option to select a specific folder to export to.
+main maya directory.  The user also has the option to select a specific folder to export to.  OBJ native writes
+obj files straight from the mesh data instead of going through the OBJexport plugin, Mesh cache writes the compact
+binary format described in meshcache.py.  Both require numpy.
 """
 
 import maya.OpenMayaUI as omui
+import maya.api.OpenMaya as om
 import maya.cmds as cmds
 import sys
+import time
+import array
+import functools
+import hashlib
+import json
+import Queue
+import shutil
+import subprocess
+import tempfile
+import threading
 from PySide import QtGui, QtCore
 from shiboken import wrapInstance
 import os
 
-USER_APP_DIR = cmds.internalVar(userAppDir=True)
-DEFAULT_DIRECTORY = os.path.join(USER_APP_DIR, 'exportLib')
+# numpy and meshcache once require_numpy has looked for them, None if numpy could not be imported
+np = meshcache = False
+
+# resolved on first use, see get_default_directory
+DEFAULT_DIRECTORY = None
 UNIQUE_HANDLE = 'ExportMasterWindow'
+EXPORT_OPTIONS_LIST = ['FBX export', 'OBJexport', 'OBJ native', 'Mesh cache']
+EXPORT_PLUGINS = {'FBX export': 'fbxmaya', 'OBJexport': 'objExport'}
+OBJ_EXPORT_OPTIONS = 'groups=1; ptgroups=1; materials=1; smoothing=1; normals=1'
+MANIFEST_NAME = 'exportManifest.json'
+BULK_NAME = 'bulkExport'
+BATCH_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'exportmasterbatch.py')
+
+
+def get_default_directory():
+    # internalVar is asked when the directory is first needed rather than when the module is imported
+    global DEFAULT_DIRECTORY
+    if DEFAULT_DIRECTORY is None:
+        DEFAULT_DIRECTORY = os.path.join(cmds.internalVar(userAppDir=True), 'exportLib')
+    return DEFAULT_DIRECTORY
+
+
+def require_numpy():
+    # numpy does not ship with every mayapy and only the native writers need it, it is looked for on their first use
+    global np, meshcache
+    if np is False:
+        try:
+            import numpy as np
+            import meshcache
+        except ImportError:
+            np = meshcache = None
+    if np is None:
+        raise RuntimeError('The native writers need numpy, it could not be imported.')
+    return np
 
 
 def get_maya_main_window():
@@ -23,14 +67,31 @@ def get_maya_main_window():
     return wrapInstance(long(main_win_ptr), QtGui.QWidget)
 
 
+def get_mayapy():
+    # sys.executable is maya itself inside the gui, mayapy lives next to it
+    executable = 'mayapy.exe' if sys.platform == 'win32' else 'mayapy'
+    location = os.environ.get('MAYA_LOCATION')
+    mayapy = os.path.join(location, 'bin', executable) if location else None
+    if not mayapy or not os.path.isfile(mayapy):
+        raise RuntimeError('mayapy could not be found, MAYA_LOCATION has to point at the maya install.')
+    return mayapy
+
+
 class ExportMasterUI(QtGui.QDialog):
-    def __init__(self, parent=get_maya_main_window(), unique_handle=UNIQUE_HANDLE):
+    def __init__(self, parent=None, unique_handle=UNIQUE_HANDLE):
+        # resolve the main window here so the module can be imported by mayapy without a gui
+        if parent is None:
+            parent = get_maya_main_window()
         QtGui.QDialog.__init__(self, parent)
         self.setWindowTitle('Export Master')
         self.setObjectName(unique_handle)
-        self.setMinimumSize(450, 200)
-        self.setMaximumSize(450, 200)
-        self.export_options_list = ['FBX export', 'OBJexport']
+        self.setMinimumSize(450, 390)
+        self.setMaximumSize(450, 390)
+        self.export_options_list = EXPORT_OPTIONS_LIST
+        self.export_queue = None
+        self.parallel_running = False
+        self.parallel_cancelled = False
+        self.close_on_finish = False
 
         self.create_controls()
         self.create_layout()
@@ -42,7 +103,7 @@ class ExportMasterUI(QtGui.QDialog):
         self.path_lbl = QtGui.QLabel('Path:')
         self.path_lbl.setMinimumSize(50, 0)
         self.path_lbl.setAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
-        self.directory_line_edit = QtGui.QLineEdit(DEFAULT_DIRECTORY)
+        self.directory_line_edit = QtGui.QLineEdit(get_default_directory())
         self.directory_line_edit.setEnabled(False)
         self.path_tool_btn = QtGui.QToolButton()
         self.path_tool_btn.setText('...')
@@ -54,15 +115,38 @@ class ExportMasterUI(QtGui.QDialog):
         self.combo_box = QtGui.QComboBox()
         self.combo_box.addItems(self.export_options_list)
         self.combo_box.setMinimumSize(125, 0)
+        self.workers_lbl = QtGui.QLabel('Workers:')
+        self.workers_lbl.setAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+        self.workers_spin_box = QtGui.QSpinBox()
+        self.workers_spin_box.setRange(1, 64)
+        self.workers_spin_box.setToolTip('Number of mayapy processes to export with, 1 exports in this session.')
 
         # check_box_layout
         self.check_box_base = QtGui.QCheckBox('Set pivot to base')
         self.check_box_base.setChecked(True)
         self.check_box_delete = QtGui.QCheckBox('Delete on export')
+        self.check_box_incremental = QtGui.QCheckBox('Incremental')
+        self.check_box_incremental.setToolTip('Skip objects that have not changed since they were last exported.')
+
+        # bulk layout
+        self.check_box_bulk = QtGui.QCheckBox('Bulk file')
+        self.check_box_bulk.setToolTip('Write the selection into shared files plus an index instead of a file each.')
+        self.chunk_size_lbl = QtGui.QLabel('Objects per file:')
+        self.chunk_size_spin_box = QtGui.QSpinBox()
+        self.chunk_size_spin_box.setRange(0, 100000)
+        self.chunk_size_spin_box.setSpecialValueText('All')
+        self.chunk_size_spin_box.setEnabled(False)
+
+        # progress layout
+        self.progress_bar = QtGui.QProgressBar()
+        self.progress_bar.setValue(0)
+        self.status_list_box = QtGui.QListWidget()
 
         # export selection layout
         self.export_btn = QtGui.QPushButton('Export')
         self.apply_btn = QtGui.QPushButton('Apply')
+        self.cancel_btn = QtGui.QPushButton('Cancel')
+        self.cancel_btn.setEnabled(False)
         self.close_btn = QtGui.QPushButton('Close')
 
     def create_layout(self):
@@ -80,7 +164,9 @@ class ExportMasterUI(QtGui.QDialog):
         file_layout.setContentsMargins(*self.default_margin)
         file_layout.addWidget(self.file_type_lbl)
         file_layout.addWidget(self.combo_box)
-        file_layout.addSpacerItem(QtGui.QSpacerItem(290, 0))
+        file_layout.addSpacerItem(QtGui.QSpacerItem(100, 0))
+        file_layout.addWidget(self.workers_lbl)
+        file_layout.addWidget(self.workers_spin_box)
 
         # checkbox layout
         check_box_layout = QtGui.QHBoxLayout()
@@ -88,7 +174,23 @@ class ExportMasterUI(QtGui.QDialog):
         check_box_layout.addSpacerItem(QtGui.QSpacerItem(60, 0))
         check_box_layout.addWidget(self.check_box_base)
         check_box_layout.addWidget(self.check_box_delete)
-        check_box_layout.addSpacerItem(QtGui.QSpacerItem(100, 0))
+        check_box_layout.addWidget(self.check_box_incremental)
+        check_box_layout.addSpacerItem(QtGui.QSpacerItem(40, 0))
+
+        # bulk layout
+        bulk_layout = QtGui.QHBoxLayout()
+        bulk_layout.setContentsMargins(*self.default_margin)
+        bulk_layout.addSpacerItem(QtGui.QSpacerItem(60, 0))
+        bulk_layout.addWidget(self.check_box_bulk)
+        bulk_layout.addWidget(self.chunk_size_lbl)
+        bulk_layout.addWidget(self.chunk_size_spin_box)
+        bulk_layout.addSpacerItem(QtGui.QSpacerItem(100, 0))
+
+        # progress layout
+        progress_layout = QtGui.QVBoxLayout()
+        progress_layout.setContentsMargins(*self.default_margin)
+        progress_layout.addWidget(self.progress_bar)
+        progress_layout.addWidget(self.status_list_box)
 
         # button layout
         button_layout = QtGui.QHBoxLayout()
@@ -96,6 +198,7 @@ class ExportMasterUI(QtGui.QDialog):
         button_layout.setSpacing(5)
         button_layout.addWidget(self.export_btn)
         button_layout.addWidget(self.apply_btn)
+        button_layout.addWidget(self.cancel_btn)
         button_layout.addWidget(self.close_btn)
 
         main_layout = QtGui.QVBoxLayout()
@@ -103,7 +206,8 @@ class ExportMasterUI(QtGui.QDialog):
         main_layout.addLayout(path_layout)
         main_layout.addLayout(file_layout)
         main_layout.addLayout(check_box_layout)
-        main_layout.addStretch(1)
+        main_layout.addLayout(bulk_layout)
+        main_layout.addLayout(progress_layout)
         main_layout.addLayout(button_layout)
 
         self.setLayout(main_layout)
@@ -111,35 +215,155 @@ class ExportMasterUI(QtGui.QDialog):
     def create_connections(self):
         self.export_btn.clicked.connect(self.export_btn_cmd)
         self.apply_btn.clicked.connect(self.apply_btn_cmd)
+        self.cancel_btn.clicked.connect(self.cancel_btn_cmd)
         self.close_btn.clicked.connect(self.close_btn_cmd)
         self.path_tool_btn.clicked.connect(self.path_tool_cmd)
+        self.check_box_bulk.toggled.connect(self.chunk_size_spin_box.setEnabled)
 
     def export_btn_cmd(self):
+        # the export runs in the background, close once it is done
+        self.close_on_finish = True
         self.apply_btn_cmd()
-        self.close_btn_cmd()
 
     def apply_btn_cmd(self):
-        # get directory from self.directory_line_edit
-        directory = self.directory_line_edit.text()
+        # build the job from the current selection and the dialog settings, the engine does the rest
+        job = ExportJob(
+            objects=cmds.ls(sl=True, tr=True),
+            export_type=self.combo_box.currentText(),
+            directory=self.directory_line_edit.text(),
+            set_pivot_base=self.check_box_base.isChecked(),
+            delete_on_export=self.check_box_delete.isChecked(),
+            incremental=self.check_box_incremental.isChecked(),
+            bulk=self.check_box_bulk.isChecked(),
+            chunk_size=self.chunk_size_spin_box.value()
+        )
+        self.status_list_box.clear()
+        self.progress_bar.setRange(0, max(len(job.objects), 1))
+        self.progress_bar.setValue(0)
+        self.set_running(True)
+
+        workers = self.workers_spin_box.value()
+        try:
+            if job.bulk:
+                # chunks are written in one go, there is nothing to time slice
+                results = self.export_master.run(job)
+                for result in results:
+                    self.object_finished_cmd(result)
+            elif workers > 1:
+                # run_parallel only returns once the workers are done, poll_parallel_cmd keeps the dialog alive
+                self.parallel_running, self.parallel_cancelled = True, False
+                results = self.export_master.run_parallel(job, workers, progress=self.object_finished_cmd,
+                                                          cancelled=self.poll_parallel_cmd)
+            else:
+                self.export_queue = ExportQueue(self.export_master, job, self)
+                self.export_queue.object_finished.connect(self.object_finished_cmd)
+                self.export_queue.finished.connect(self.export_finished_cmd)
+                self.export_queue.start()
+                return
+        except Exception:
+            # give the buttons back and keep the dialog open, the error still reaches the script editor
+            self.export_queue = None
+            self.close_on_finish = False
+            self.export_finished_cmd([])
+            raise
+        finally:
+            self.parallel_running = False
+        self.export_finished_cmd(results)
 
-        # check export type
-        export_type = self.combo_box.currentText()
+    def poll_parallel_cmd(self):
+        # keep the dialog responsive while the workers are busy, cancel and close are picked up here
+        QtGui.QApplication.processEvents()
+        return self.parallel_cancelled
 
-        # check which options are checked
-        set_pivot_base = self.check_box_base.isChecked()
-        delete_on_export = self.check_box_delete.isChecked()
+    def object_finished_cmd(self, result=None, done=0, total=0):
+        self.progress_bar.setValue(self.progress_bar.value() + 1)
+        item = QtGui.QListWidgetItem('%s  %s  (%.2fs)' % (result.name, result.status, result.seconds))
+        if result.error:
+            item.setToolTip(result.error)
+        self.status_list_box.addItem(item)
+        self.status_list_box.scrollToBottom()
 
-        # export according to settings
-        self.export_master.export(directory, export_type, set_pivot_base, delete_on_export)
+    def export_finished_cmd(self, results=None):
+        self.export_queue = None
+        self.set_running(False)
+        self.progress_bar.setValue(self.progress_bar.maximum())
+        if self.close_on_finish:
+            self.close_btn_cmd()
+
+    def set_running(self, running=False):
+        self.export_btn.setEnabled(not running)
+        self.apply_btn.setEnabled(not running)
+        self.cancel_btn.setEnabled(running)
+
+    def cancel_btn_cmd(self):
+        if self.export_queue:
+            self.export_queue.cancel()
+        elif self.parallel_running:
+            self.parallel_cancelled = True
 
     def close_btn_cmd(self):
+        # objects already handed to maya are finished first, the dialog closes once the export has stopped
+        if self.export_queue or self.parallel_running:
+            self.close_on_finish = True
+            self.cancel_btn_cmd()
+            return
         cmds.deleteUI(self.objectName(), window=True)
 
     def path_tool_cmd(self):
-        directory = cmds.fileDialog2(dir=USER_APP_DIR, dialogStyle=2, fileMode=3)
+        directory = cmds.fileDialog2(dir=cmds.internalVar(userAppDir=True), dialogStyle=2, fileMode=3)
         self.directory_line_edit.setText(directory[0])
 
 
+class ExportJob(object):
+    """
+    Describes an export run independently of the gui.
+
+    objects          -- list of transform names to export, one file per object
+    export_type      -- one of EXPORT_OPTIONS_LIST
+    directory        -- destination directory, created if missing
+    set_pivot_base   -- move the pivot of each object to the bottom of its bounding box
+    delete_on_export -- delete each object from the scene once it has been written
+    incremental      -- skip objects whose content hash matches the manifest in directory
+    force            -- with incremental, export everything anyway and refresh the manifest
+    bulk             -- write the objects into shared files instead of one file each
+    chunk_size       -- with bulk, number of objects per file, 0 puts everything in one file
+    bulk_name        -- with bulk, base name of the files and of the sidecar index
+    """
+    def __init__(self, objects=None, export_type=EXPORT_OPTIONS_LIST[0], directory=None,
+                 set_pivot_base=False, delete_on_export=False, incremental=False, force=False, bulk=False,
+                 chunk_size=0, bulk_name=BULK_NAME):
+        self.objects = list(objects or [])
+        self.export_type = export_type
+        self.directory = directory or get_default_directory()
+        self.set_pivot_base = set_pivot_base
+        self.delete_on_export = delete_on_export
+        self.incremental = incremental
+        self.force = force
+        self.bulk = bulk
+        self.chunk_size = chunk_size
+        self.bulk_name = bulk_name
+
+
+class ExportResult(object):
+    """
+    Outcome of exporting a single object.
+    """
+    EXPORTED = 'exported'
+    SKIPPED = 'skipped'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+    def __init__(self, name, path=None, status=EXPORTED, error=None, seconds=0.0):
+        self.name = name
+        self.path = path
+        self.status = status
+        self.error = error
+        self.seconds = seconds
+
+    def as_dict(self):
+        return dict(self.__dict__)
+
+
 class ExportMaster(object):
     def base_pivot(self, sel=None):
         bounding_box = cmds.xform(sel, q=True, bb=True, ws=True)
@@ -147,65 +371,781 @@ class ExportMaster(object):
         cmds.move(y_min, ['%s.scalePivot' % sel, '%s.rotatePivot' % sel], moveY=True, absolute=True)
         cmds.move(0, 0, 0, sel, rpr=True, a=True)
 
-    def create_directory(self, directory=DEFAULT_DIRECTORY):
+    def create_directory(self, directory=None):
+        directory = directory or get_default_directory()
         # if directory does not exist make it...
         if not os.path.exists(directory):
             os.mkdir(directory)
-            print 'Export Master default directory does not exist, making exportLib directory.'
+            print 'Export Master directory does not exist, making %s.' % directory
 
-    def is_attr_locked(self, selection=None):
-        for sel in selection:
-            attributes = cmds.listAttr(sel, k=True)
+    def load_plugin(self, export_type=None):
+        # exporters are not loaded by default in batch mode
+        plugin = EXPORT_PLUGINS.get(export_type)
+        if plugin and not cmds.pluginInfo(plugin, q=True, loaded=True):
+            cmds.loadPlugin(plugin, quiet=True)
 
-            for attr in attributes:
-                full_attribute_name = sel + '.' + attr
-                # print 'FULL ATTR NAME: ', full_attribute_name
-                if cmds.getAttr(full_attribute_name, lock=True):
-                    return True
-        return False
+    def find_locked_attrs(self, selection=None):
+        """
+        returns every (object, attribute) pair in selection whose keyable attribute is locked.  listAttr filters on
+        keyable and locked at once, so it is one call per object instead of a getAttr per attribute.
+        """
+        locked = []
+        for sel in selection:
+            locked.extend((sel, attr) for attr in cmds.listAttr(sel, k=True, l=True) or [])
+        return locked
 
-    def export(self, directory=None, export_type=None, set_pivot_base=False, delete_on_export=False):
-        self.create_directory()
+    def is_attr_locked(self, selection=None):
+        return bool(self.find_locked_attrs(selection))
 
-        # get selected objects
-        selection = cmds.ls(sl=True, tr=True)
+    def preflight(self, job=None):
+        """
+        returns True if job can be exported, otherwise explains why not.
+        """
+        if not job.objects:
+            cmds.warning('Please select one or more objects to export.')
+            return False
 
         # check if any attributes in selection are locked
-        is_locked = self.is_attr_locked(selection)
-        if is_locked:
+        locked = self.find_locked_attrs(job.objects)
+        if locked:
             sys.stdout.write('Error: Operation canceled.  Please unlock all attributes before exporting.\n')
+            sys.stdout.write('Locked attributes: %s\n' % ', '.join('%s.%s' % pair for pair in locked))
+            return False
+        return True
+
+    def content_hash(self, sel=None, job=None):
+        """
+        sha1 of everything that ends up in the exported file of sel: world space points, face connectivity, uvs,
+        normals and which face vertices share them (hard and soft edges), the shading group of every face and the
+        material behind each shading group of every mesh below sel plus the job options that change the output.
+        Moving an object re-exports it even though it is zeroed on export, better one export too many than a stale
+        file.
+        """
+        sha = hashlib.sha1(repr((job.export_type, job.set_pivot_base)))
+        shapes = cmds.listRelatives(sel, allDescendents=True, type='mesh', fullPath=True) or []
+        for shape in sorted(shapes):
+            if cmds.getAttr(shape + '.intermediateObject'):
+                continue
+            selection = om.MSelectionList()
+            selection.add(shape)
+            dag_path = selection.getDagPath(0)
+            mesh_fn = om.MFnMesh(dag_path)
+            counts, vertices = mesh_fn.getVertices()
+            us, vs = mesh_fn.getUVs()
+            normals = mesh_fn.getNormals(om.MSpace.kWorld)
+            normal_counts, normal_ids = mesh_fn.getNormalIds()
+            shader_objects, face_shaders = mesh_fn.getConnectedShaders(dag_path.instanceNumber())
+            shading_groups = [om.MFnDependencyNode(shader).name() for shader in shader_objects]
+
+            sha.update(shape.rpartition('|')[2])
+            sha.update(array.array('d', cmds.xform(shape + '.vtx[*]', q=True, ws=True, t=True)).tostring())
+            sha.update(array.array('i', counts).tostring())
+            sha.update(array.array('i', vertices).tostring())
+            sha.update(array.array('f', us).tostring())
+            sha.update(array.array('f', vs).tostring())
+            # softening, hardening or locking normals changes the file as much as moving a point
+            sha.update(array.array('d', [component for normal in normals for component in normal]).tostring())
+            sha.update(array.array('i', normal_ids).tostring())
+            # reassigning a face or swapping the material of a shading group both change the written materials
+            sha.update(array.array('i', face_shaders).tostring())
+            sha.update(repr([(shading_group, cmds.listConnections(shading_group + '.surfaceShader'))
+                             for shading_group in shading_groups]))
+        return sha.hexdigest()
+
+    def read_manifest(self, directory=None):
+        path = os.path.join(directory, MANIFEST_NAME)
+        if not os.path.exists(path):
+            return {}
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def write_manifest(self, directory=None, manifest=None):
+        with open(os.path.join(directory, MANIFEST_NAME), 'w') as f:
+            json.dump(manifest, f, indent=4)
+
+    def filter_unchanged(self, job=None):
+        """
+        returns (objects, skipped, hashes).  objects still need exporting, skipped holds an ExportResult for every
+        object whose hash matches the manifest and whose file is still on disk, hashes maps every object to its hash.
+        """
+        manifest = self.read_manifest(job.directory)
+        objects, skipped, hashes = [], [], {}
+        for sel in job.objects:
+            hashes[sel] = self.content_hash(sel, job)
+            result = self.unchanged_result(sel, hashes[sel], job, manifest)
+            if result:
+                skipped.append(result)
+            else:
+                objects.append(sel)
+        return objects, skipped, hashes
+
+    def unchanged_result(self, sel=None, content_hash=None, job=None, manifest=None):
+        # a skipped ExportResult if the manifest says sel is already on disk as it is now, otherwise None
+        entry = manifest.get(sel)
+        if not job.force and entry and entry['hash'] == content_hash and os.path.exists(entry['path']):
+            return ExportResult(sel, entry['path'], ExportResult.SKIPPED)
+        return None
+
+    def update_manifest(self, directory=None, hashes=None, results=None):
+        manifest = self.read_manifest(directory)
+        for result in results:
+            if result.status == ExportResult.EXPORTED and result.name in hashes:
+                manifest[result.name] = {'hash': hashes[result.name], 'path': result.path}
+        self.write_manifest(directory, manifest)
+
+    def finish(self, job=None, results=None, hashes=None):
+        # shared tail of run and run_parallel
+        if job.incremental:
+            self.update_manifest(job.directory, hashes, results)
+
+        # skipped objects are already on disk, treat them as exported when cleaning up
+        if job.delete_on_export:
+            done = [result.name for result in results
+                    if result.status in (ExportResult.EXPORTED, ExportResult.SKIPPED)]
+            if done:
+                cmds.delete(done)
+
+        statuses = ExportResult.EXPORTED, ExportResult.SKIPPED, ExportResult.FAILED, ExportResult.CANCELLED
+        for status in statuses:
+            names = [result.name for result in results if result.status == status]
+            if names:
+                sys.stdout.write('%s: %s\n' % (status.capitalize(), ', '.join(names)))
+        counts = tuple(len([result for result in results if result.status == status]) for status in statuses)
+        sys.stdout.write('Export complete.  %d exported, %d skipped, %d failed, %d cancelled.\n' % counts)
+
+    def prepare_object(self, sel=None, set_pivot_base=False):
+        cmds.xform(sel, cp=True)
+        cmds.move(0, 0, 0, sel, rpr=True)
+        cmds.xform(sel, a=True, ro=(0, 0, 0))
+
+        # move pivot to base
+        if set_pivot_base:
+            self.base_pivot(sel)
+
+        cmds.makeIdentity(sel, apply=True, t=1, r=1, s=1, n=0)
+        cmds.delete(sel, ch=True)
+
+    def object_path(self, sel=None, directory=None):
+        # get name of object, a non unique name comes back as a dag path
+        return os.path.join(directory, sel.rpartition('|')[2])
+
+    def extract_meshes(self, sel=None):
+        shapes = cmds.listRelatives(sel, allDescendents=True, type='mesh', fullPath=True) or []
+        return [MeshData.from_shape(shape) for shape in shapes if not cmds.getAttr(shape + '.intermediateObject')]
+
+    def write_object(self, sel=None, directory=None, export_type=None):
+        """
+        writes sel to directory, the file is named after the object.  Returns the path written.
+        """
+        path = self.object_path(sel, directory)
+        cmds.select(sel)
+        if export_type == EXPORT_OPTIONS_LIST[0]:
+            return cmds.file(path, f=True, pr=1, typ="FBX export", es=1, op="fbx")
+        elif export_type == EXPORT_OPTIONS_LIST[1]:
+            return cmds.file(path, f=True, pr=1, typ="OBJexport", es=1, op=OBJ_EXPORT_OPTIONS)
+        elif export_type in NATIVE_WRITERS:
+            writer = NATIVE_WRITERS[export_type]()
+            return writer.write(path + writer.EXTENSION, self.extract_meshes(sel))
+        raise ValueError('Unknown export type: %s' % export_type)
+
+    def run(self, job=None):
+        """
+        exports every object of job, returns a list of ExportResult in the same order as job.objects.  Does not touch
+        the gui so it can be driven from mayapy (see exportmasterbatch.py).
+        """
+        if not self.preflight(job):
+            return []
+
+        self.create_directory(job.directory)
+        self.load_plugin(job.export_type)
+
+        if job.bulk:
+            if job.export_type in EXPORT_OPTIONS_LIST[:3]:
+                return self.run_bulk(job)
+            cmds.warning('%s can not hold several objects, exporting one file per object.' % job.export_type)
+
+        # hashes are taken before anything in the scene is touched
+        objects, skipped, hashes = job.objects, [], {}
+        if job.incremental:
+            objects, skipped, hashes = self.filter_unchanged(job)
+
+        results_by_name = dict((result.name, result) for result in skipped)
+        for sel in objects:
+            start = time.time()
+            try:
+                self.prepare_object(sel, job.set_pivot_base)
+                path = self.write_object(sel, job.directory, job.export_type)
+            except (RuntimeError, ValueError) as e:
+                results_by_name[sel] = ExportResult(sel, status=ExportResult.FAILED, error=str(e),
+                                                    seconds=time.time() - start)
+                continue
+            results_by_name[sel] = ExportResult(sel, path, seconds=time.time() - start)
+
+        results = [results_by_name[sel] for sel in job.objects]
+        self.finish(job, results, hashes)
+        return results
+
+    def run_bulk(self, job=None):
+        """
+        writes job.objects into files of job.chunk_size objects each instead of one file per object.  Every object
+        keeps its own group (obj) or node (fbx).  A sidecar <bulk_name>.index.json maps every object to its file and
+        group, and for OBJ native also to its byte range and first point, uv and normal index.  Incremental is
+        ignored, a chunk is always rewritten as a whole.
+        """
+        results_by_name = {}
+        prepared = []
+        for sel in job.objects:
+            start = time.time()
+            try:
+                self.prepare_object(sel, job.set_pivot_base)
+            except RuntimeError as e:
+                results_by_name[sel] = ExportResult(sel, status=ExportResult.FAILED, error=str(e),
+                                                    seconds=time.time() - start)
+                continue
+            prepared.append(sel)
+
+        chunk_size = job.chunk_size or len(prepared) or 1
+        chunks = [prepared[i:i + chunk_size] for i in xrange(0, len(prepared), chunk_size)]
+        index = {}
+        for i, chunk in enumerate(chunks):
+            name = job.bulk_name if len(chunks) == 1 else '%s_%03d' % (job.bulk_name, i)
+            start = time.time()
+            try:
+                path, entries = self.write_bulk(chunk, os.path.join(job.directory, name), job.export_type)
+            except (RuntimeError, ValueError) as e:
+                for sel in chunk:
+                    results_by_name[sel] = ExportResult(sel, status=ExportResult.FAILED, error=str(e))
+                continue
+
+            # the chunk is written in one go, share its time out between its objects
+            seconds = (time.time() - start) / len(chunk)
+            for sel in chunk:
+                results_by_name[sel] = ExportResult(sel, path, seconds=seconds)
+                entry = {'file': os.path.basename(path), 'group': sel.rpartition('|')[2]}
+                entry.update(entries.get(sel, {}))
+                index[sel] = entry
+
+        with open(os.path.join(job.directory, job.bulk_name + '.index.json'), 'w') as f:
+            json.dump(index, f, indent=4)
+
+        results = [results_by_name[sel] for sel in job.objects]
+        self.finish(job, results, {})
+        return results
+
+    def write_bulk(self, objects=None, path=None, export_type=None):
+        """
+        writes objects into a single file, returns the path written and any extra index entries per object.
+        """
+        if export_type == EXPORT_OPTIONS_LIST[2]:
+            path += ObjWriter.EXTENSION
+            return path, ObjWriter().write_objects(path, [(sel, self.extract_meshes(sel)) for sel in objects])
+
+        # the stock exporters already write one group or node per selected object
+        cmds.select(objects)
+        if export_type == EXPORT_OPTIONS_LIST[0]:
+            return cmds.file(path, f=True, pr=1, typ="FBX export", es=1, op="fbx"), {}
+        elif export_type == EXPORT_OPTIONS_LIST[1]:
+            return cmds.file(path, f=True, pr=1, typ="OBJexport", es=1, op=OBJ_EXPORT_OPTIONS), {}
+        raise ValueError('Unknown export type: %s' % export_type)
+
+    def run_parallel(self, job=None, workers=2, progress=None, cancelled=None):
+        """
+        exports job across a pool of mayapy processes.  The scene is snapshotted to a temp file, job.objects is split
+        into one shard per worker and every worker runs the same ExportMaster.run on its shard, so files are identical
+        to the serial path.  progress(result, done, total) is called as each object finishes.  Object preparation only
+        happens in the snapshot, the live scene is left as is apart from delete on export.  cancelled() is polled
+        while waiting on the workers, once it returns True the workers are killed and whatever they had not reported
+        on is cancelled.  Without mayapy the job is exported in this session instead.
+        """
+        # chunk files can not be split across workers
+        if job.bulk:
+            sys.stdout.write('Bulk exports run in this session.\n')
+            return self.run(job)
+
+        try:
+            get_mayapy()
+        except RuntimeError as e:
+            cmds.warning('%s  Exporting in this session.' % e)
+            return self.run(job)
+
+        if not self.preflight(job):
+            return []
+
+        self.create_directory(job.directory)
+
+        # only the objects that changed are handed to the workers, the manifest is kept by this process
+        objects, skipped, hashes = job.objects, [], {}
+        if job.incremental:
+            objects, skipped, hashes = self.filter_unchanged(job)
+        results = list(skipped)
+
+        if objects:
+            temp_dir = tempfile.mkdtemp(prefix='exportMaster')
+            processes = []
+            try:
+                snapshot = os.path.join(temp_dir, 'snapshot.mb')
+                cmds.file(snapshot, force=True, exportAll=True, preserveReferences=True, type='mayaBinary')
+
+                shards = [objects[i::workers] for i in range(workers)]
+                for i, shard in enumerate(shards):
+                    if shard:
+                        processes.append(self.start_worker(job, shard, snapshot, temp_dir, i))
+                results += self.collect_results(processes, len(objects), progress, cancelled)
+            finally:
+                # an error on this side must not leave workers running against the snapshot
+                self.stop_workers(processes)
+                shutil.rmtree(temp_dir, ignore_errors=True)
+
+        # anything a worker did not report on was lost with the worker
+        results_by_name = dict((result.name, result) for result in results)
+        if cancelled and cancelled():
+            missing = dict(status=ExportResult.CANCELLED)
+        else:
+            missing = dict(status=ExportResult.FAILED, error='Worker exited early.')
+        results = [results_by_name.get(sel) or ExportResult(sel, **missing) for sel in job.objects]
+        self.finish(job, results, hashes)
+        return results
+
+    def start_worker(self, job=None, shard=None, snapshot=None, temp_dir=None, index=0):
+        objects_file = os.path.join(temp_dir, 'shard%d.json' % index)
+        with open(objects_file, 'w') as f:
+            json.dump(shard, f)
+
+        args = [get_mayapy(), BATCH_SCRIPT, snapshot, '-t', job.export_type, '-d', job.directory,
+                '--objects-file', objects_file]
+        if job.set_pivot_base:
+            args.append('--pivot-base')
+
+        # workers import this module, make sure they can find it
+        env = os.environ.copy()
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [os.path.dirname(BATCH_SCRIPT), env.get('PYTHONPATH')]))
+        return subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=env)
+
+    def collect_results(self, processes=None, total=0, progress=None, cancelled=None):
+        # one reader thread per worker, results are handed back to the main thread through a queue
+        lines = Queue.Queue()
+
+        def read_output(process):
+            for line in iter(process.stdout.readline, ''):
+                lines.put(line)
+            process.wait()
+            lines.put(None)
+
+        for process in processes:
+            reader = threading.Thread(target=read_output, args=(process,))
+            reader.daemon = True
+            reader.start()
+
+        results = []
+        running = len(processes)
+        while running:
+            if cancelled and cancelled():
+                # run_parallel kills whatever is still running
+                break
+            try:
+                line = lines.get(timeout=0.1)
+            except Queue.Empty:
+                continue
+            if line is None:
+                running -= 1
+                continue
+            # mayapy writes its own logging to stdout too, results are the json lines
+            if not line.startswith('{'):
+                continue
+            result = ExportResult(**json.loads(line))
+            results.append(result)
+            if progress:
+                progress(result, len(results), total)
+        return results
+
+    def stop_workers(self, processes=None):
+        # workers that finished are only reaped, anything still running is killed first
+        for process in processes:
+            if process.poll() is None:
+                process.kill()
+        for process in processes:
+            process.wait()
+
+    def export(self, directory=None, export_type=None, set_pivot_base=False, delete_on_export=False):
+        # export the current selection
+        job = ExportJob(cmds.ls(sl=True, tr=True), export_type, directory, set_pivot_base, delete_on_export)
+        return self.run(job)
+
+
+class ExportQueue(QtCore.QObject):
+    """
+    Runs an ExportJob without freezing Maya.  Scene work (xform, makeIdentity, delete history and the exporter
+    call itself) stays on the main thread but only a few objects are handled per tick of a zero timeout timer, so the
+    gui keeps processing events in between.  Incremental jobs hash their objects the same way, all of them before the
+    first one is touched.  For the native writers the formatting and writing of the file runs on a pool of background
+    threads.
+    """
+    object_finished = QtCore.Signal(object)
+    finished = QtCore.Signal(object)
+
+    CHUNK = 2
+    HASH_CHUNK = 8
+    THREADS = 4
+
+    def __init__(self, export_master=None, job=None, parent=None):
+        QtCore.QObject.__init__(self, parent)
+        self.export_master = export_master
+        self.job = job
+        self.unhashed = []
+        self.pending = []
+        self.results = {}
+        self.manifest = {}
+        self.hashes = {}
+        self.in_flight = 0
+        self.cancelled = False
+        self.tasks = Queue.Queue()
+        self.done = Queue.Queue()
+        self.threads = []
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.step)
+
+    def start(self):
+        job = self.job
+        if not self.export_master.preflight(job):
+            self.finished.emit([])
             return
 
-        if not selection:
-            cmds.warning('Please select one or more objects to export.')
+        self.export_master.create_directory(job.directory)
+        self.export_master.load_plugin(job.export_type)
+
+        # incremental jobs are hashed by step before anything in the scene is touched
+        if job.incremental:
+            self.manifest = self.export_master.read_manifest(job.directory)
+            self.unhashed = list(job.objects)
         else:
-            # iterate through selected objects
-            for sel in selection:
-                cmds.xform(sel, cp=True)
-                cmds.move(0, 0, 0, sel, rpr=True)
-                cmds.xform(sel, a=True, ro=(0, 0, 0))
-
-                # move pivot to base
-                if set_pivot_base:
-                    self.base_pivot(sel)
-
-                cmds.makeIdentity(sel, apply=True, t=1, r=1, s=1, n=0)
-                cmds.delete(sel, ch=True)
-
-                # get name of object
-                path = os.path.join(directory, sel)
-                cmds.select(sel)
-                # get export type
-                export_options = ExportMasterUI().export_options_list
-                if export_type == export_options[0]:
-                    cmds.file(path, f=True, pr=1, typ="FBX export", es=1, op="fbx")
-                elif export_type == export_options[1]:
-                    cmds.file(path, f=True, pr=1, typ="OBJexport", es=1, op="groups=1; ptgroups=1; materials=1; smoothing=1; normals=1")
-                # clean up and delete object
-                if delete_on_export:
-                    cmds.delete(sel)
-
-            sys.stdout.write('Export complete.\n')
+            self.pending = list(job.objects)
+
+        # the stock exporters write on the main thread, there is nothing to hand off
+        if job.export_type in NATIVE_WRITERS:
+            for i in range(self.THREADS):
+                thread = threading.Thread(target=self.work)
+                thread.daemon = True
+                thread.start()
+                self.threads.append(thread)
+        self.timer.start(0)
+
+    def cancel(self):
+        self.cancelled = True
+
+    def work(self):
+        # background thread, never touches maya
+        while True:
+            item = self.tasks.get()
+            if item is None:
+                return
+            result, write = item
+            start = time.time()
+            # anything escaping here would leave the object in flight forever, report every error as a failure
+            try:
+                write()
+            except Exception as e:
+                result.status = ExportResult.FAILED
+                result.error = str(e)
+            result.seconds += time.time() - start
+            self.done.put(result)
+
+    def step(self):
+        job = self.job
+        if self.unhashed and not self.cancelled:
+            self.hash_step()
+            return
+
+        chunk = [] if self.cancelled else self.pending[:self.CHUNK]
+        del self.pending[:len(chunk)]
+        for sel in chunk:
+            start = time.time()
+            write = None
+            try:
+                self.export_master.prepare_object(sel, job.set_pivot_base)
+                if job.export_type in NATIVE_WRITERS:
+                    # pull the mesh data now, the file itself is written in the background
+                    writer = NATIVE_WRITERS[job.export_type]()
+                    path = self.export_master.object_path(sel, job.directory) + writer.EXTENSION
+                    write = functools.partial(writer.write, path, self.export_master.extract_meshes(sel))
+                else:
+                    path = self.export_master.write_object(sel, job.directory, job.export_type)
+            except (RuntimeError, ValueError) as e:
+                self.add_result(ExportResult(sel, status=ExportResult.FAILED, error=str(e),
+                                             seconds=time.time() - start))
+                continue
+            result = ExportResult(sel, path, seconds=time.time() - start)
+            if write is None:
+                self.add_result(result)
+                continue
+            self.in_flight += 1
+            self.tasks.put((result, write))
+
+        while True:
+            try:
+                result = self.done.get_nowait()
+            except Queue.Empty:
+                break
+            self.in_flight -= 1
+            self.add_result(result)
+
+        if self.cancelled:
+            for sel in self.unhashed + self.pending:
+                self.add_result(ExportResult(sel, status=ExportResult.CANCELLED))
+            self.unhashed = []
+            self.pending = []
+        if not self.pending:
+            if not self.in_flight:
+                self.stop()
+            else:
+                # only waiting on the background threads now, no need to spin
+                self.timer.setInterval(50)
+
+    def hash_step(self):
+        # a chunk of objects per tick, unchanged ones are reported as skipped straight away
+        chunk = self.unhashed[:self.HASH_CHUNK]
+        del self.unhashed[:len(chunk)]
+        for sel in chunk:
+            self.hashes[sel] = self.export_master.content_hash(sel, self.job)
+            result = self.export_master.unchanged_result(sel, self.hashes[sel], self.job, self.manifest)
+            if result:
+                self.add_result(result)
+            else:
+                self.pending.append(sel)
+
+    def add_result(self, result=None):
+        self.results[result.name] = result
+        self.object_finished.emit(result)
+
+    def stop(self):
+        self.timer.stop()
+        for thread in self.threads:
+            self.tasks.put(None)
+        results = [self.results[sel] for sel in self.job.objects]
+        self.export_master.finish(self.job, results, self.hashes)
+        self.finished.emit(results)
+
+
+class MeshData(object):
+    """
+    Bulk copy of a mesh shape pulled through the api into numpy arrays.
+
+    name          -- name written as the obj group, the short name of the shape's transform
+    points        -- (n, 3) world space positions
+    normals       -- (m, 3) world space normals
+    uvs           -- (k, 2) uvs of the current uv set
+    face_counts   -- vertex count of every face
+    face_points   -- point index of every face vertex
+    face_normals  -- normal index of every face vertex
+    face_uvs      -- uv index of every face vertex, None if the mesh has no uvs
+    face_shaders  -- index into shaders of every face, -1 for unassigned faces
+    shaders       -- shading group names
+    shader_colors -- rgb of every shading group's surface shader
+
+    Nothing in here refers back to the scene, so it can be written from any thread.
+    """
+    def __init__(self, name, points, normals, uvs, face_counts, face_points, face_normals, face_uvs, face_shaders,
+                 shaders, shader_colors):
+        self.name = name
+        self.points = points
+        self.normals = normals
+        self.uvs = uvs
+        self.face_counts = face_counts
+        self.face_points = face_points
+        self.face_normals = face_normals
+        self.face_uvs = face_uvs
+        self.face_shaders = face_shaders
+        self.shaders = shaders
+        self.shader_colors = shader_colors
+
+    @classmethod
+    def from_shape(cls, shape=None):
+        require_numpy()
+
+        selection = om.MSelectionList()
+        selection.add(shape)
+        dag_path = selection.getDagPath(0)
+        mesh_fn = om.MFnMesh(dag_path)
+
+        # xform hands back one flat list built in c++, much cheaper than walking an MPointArray in python
+        points = np.array(cmds.xform(shape + '.vtx[*]', q=True, ws=True, t=True), dtype=np.float64).reshape(-1, 3)
+        normals = np.array(mesh_fn.getNormals(om.MSpace.kWorld), dtype=np.float64).reshape(-1, 3)
+        face_counts, face_points = mesh_fn.getVertices()
+        normal_counts, face_normals = mesh_fn.getNormalIds()
+
+        us, vs = mesh_fn.getUVs()
+        face_uvs = None
+        if len(us):
+            uv_counts, face_uvs = mesh_fn.getAssignedUVs()
+            face_uvs = np.array(face_uvs, dtype=np.int64)
+            # faces without uvs would shift every index after them, fall back to writing no uvs at all
+            if (np.array(uv_counts) != np.array(face_counts)).any():
+                face_uvs = None
+
+        shader_objects, face_shaders = mesh_fn.getConnectedShaders(dag_path.instanceNumber())
+        shaders = [om.MFnDependencyNode(shader).name() for shader in shader_objects]
+
+        return cls(
+            name=cmds.listRelatives(shape, parent=True)[0],
+            points=points,
+            normals=normals,
+            uvs=np.column_stack([np.array(us, dtype=np.float64), np.array(vs, dtype=np.float64)]),
+            face_counts=np.array(face_counts, dtype=np.int64),
+            face_points=np.array(face_points, dtype=np.int64),
+            face_normals=np.array(face_normals, dtype=np.int64),
+            face_uvs=face_uvs,
+            face_shaders=np.array(face_shaders, dtype=np.int64),
+            shaders=shaders,
+            shader_colors=[cls.shader_color(shader) for shader in shaders]
+        )
+
+    @staticmethod
+    def shader_color(shading_group=None):
+        # the color of the surface shader, mid grey when it has none
+        surface = cmds.listConnections(shading_group + '.surfaceShader') or []
+        if surface and cmds.attributeQuery('color', node=surface[0], exists=True):
+            return tuple(cmds.getAttr(surface[0] + '.color')[0])
+        return 0.5, 0.5, 0.5
+
+
+class ObjWriter(object):
+    """
+    Writes MeshData to obj without going through cmds.file.  Matches the options Export Master passes to the stock
+    exporter: groups=1; ptgroups=1; materials=1; smoothing=1; normals=1.  Smoothing is written as "s off" since every
+    face vertex carries an explicit normal.  Text is produced a chunk at a time with one string format per chunk
+    instead of one per vertex.
+    """
+    CHUNK = 65536
+    EXTENSION = '.obj'
+
+    def write(self, path=None, meshes=None):
+        """
+        writes meshes to path plus a matching .mtl, returns path.
+        """
+        self.write_objects(path, [(None, meshes)])
+        return path
+
+    def write_objects(self, path=None, objects=None):
+        """
+        writes several objects, a list of (name, meshes), into one file.  Returns a dict mapping every name to the
+        byte offset and length of its section and the first point, uv and normal index it uses (1 based, as in the
+        file), which is enough to pull a single object back out.
+        """
+        require_numpy()
+        mtl_path = os.path.splitext(path)[0] + '.mtl'
+        index = {}
+        with open(path, 'w', 1 << 20) as f:
+            f.write('# Exported by Export Master\n')
+            f.write('mtllib %s\n' % os.path.basename(mtl_path))
+            offsets = 1, 1, 1
+            for name, meshes in objects:
+                start = f.tell()
+                first_point, first_uv, first_normal = offsets
+                offsets = self.write_meshes(f, meshes, offsets)
+                index[name] = {'offset': start, 'length': f.tell() - start, 'first_point': first_point,
+                               'first_uv': first_uv, 'first_normal': first_normal}
+
+        materials = []
+        for name, meshes in objects:
+            for mesh in meshes:
+                materials.extend(material for material in zip(mesh.shaders, mesh.shader_colors)
+                                 if material not in materials)
+        self.write_materials(mtl_path, materials)
+        return index
+
+    def write_meshes(self, f=None, meshes=None, offsets=(1, 1, 1)):
+        # obj indices are 1 based and run across the whole file, returns the offsets for whatever comes next
+        point_offset, uv_offset, normal_offset = offsets
+        for mesh in meshes:
+            f.write('g default\n')
+            self.write_rows(f, 'v %.6f %.6f %.6f\n', mesh.points)
+            if mesh.face_uvs is not None:
+                self.write_rows(f, 'vt %.6f %.6f\n', mesh.uvs)
+            self.write_rows(f, 'vn %.6f %.6f %.6f\n', mesh.normals)
+            f.write('s off\ng %s\n' % mesh.name)
+
+            columns = [mesh.face_points + point_offset]
+            token = '%d/%d/%d'
+            if mesh.face_uvs is not None:
+                columns.append(mesh.face_uvs + uv_offset)
+            else:
+                token = '%d//%d'
+            columns.append(mesh.face_normals + normal_offset)
+            self.write_faces(f, token, mesh, np.column_stack(columns))
+
+            point_offset += len(mesh.points)
+            normal_offset += len(mesh.normals)
+            if mesh.face_uvs is not None:
+                uv_offset += len(mesh.uvs)
+        return point_offset, uv_offset, normal_offset
+
+    def write_rows(self, f=None, row_format=None, values=None):
+        for start in xrange(0, len(values), self.CHUNK):
+            chunk = values[start:start + self.CHUNK]
+            f.write((row_format * len(chunk)) % tuple(chunk.ravel().tolist()))
+
+    def write_faces(self, f=None, token=None, mesh=None, indices=None):
+        # a mesh without faces is written as an empty group, like OBJexport does
+        if not len(mesh.face_counts):
+            return
+        # one format string per face size, a chunk of faces is then formatted in a single operation
+        templates = dict((count, 'f' + (' ' + token) * count + '\n') for count in set(mesh.face_counts.tolist()))
+        face_starts = np.concatenate([[0], np.cumsum(mesh.face_counts)])
+
+        # usemtl is written whenever the shading group changes from one face to the next
+        changes = np.flatnonzero(np.diff(mesh.face_shaders)) + 1
+        run_starts = np.concatenate([[0], changes]).tolist()
+        runs = zip(run_starts, np.concatenate([changes, [len(mesh.face_counts)]]).tolist())
+        for run_start, run_end in runs:
+            shader = mesh.face_shaders[run_start]
+            if shader >= 0:
+                f.write('usemtl %s\n' % mesh.shaders[shader])
+            for start in xrange(run_start, run_end, self.CHUNK):
+                end = min(start + self.CHUNK, run_end)
+                face_format = ''.join([templates[count] for count in mesh.face_counts[start:end].tolist()])
+                chunk = indices[face_starts[start]:face_starts[end]]
+                f.write(face_format % tuple(chunk.ravel().tolist()))
+
+    def write_materials(self, path=None, materials=None):
+        with open(path, 'w') as f:
+            for shader, color in materials:
+                f.write('newmtl %s\nillum 4\n' % shader)
+                f.write('Kd %.2f %.2f %.2f\n' % color)
+                f.write('Ka 0.00 0.00 0.00\nTf 1.00 1.00 1.00\nNi 1.00\n')
+
+
+class MeshCacheWriter(object):
+    """
+    Writes MeshData to the binary mesh cache format, see meshcache.py for the layout and the reader.  All meshes
+    below an object are merged into one, uvs are dropped if any of them has none.
+    """
+    # meshcache.EXTENSION, the module is not imported until the first write
+    EXTENSION = '.mcache'
+
+    def write(self, path=None, meshes=None):
+        require_numpy()
+        with_uvs = bool(meshes) and all(mesh.face_uvs is not None for mesh in meshes)
+        point_offsets = np.cumsum([0] + [len(mesh.points) for mesh in meshes])
+        normal_offsets = np.cumsum([0] + [len(mesh.normals) for mesh in meshes])
+        uv_offsets = np.cumsum([0] + [len(mesh.uvs) for mesh in meshes])
+
+        def merge(attr, offsets=None):
+            arrays = [getattr(mesh, attr) + (offsets[i] if offsets is not None else 0)
+                      for i, mesh in enumerate(meshes)]
+            return np.concatenate(arrays) if arrays else np.zeros(0)
+
+        return meshcache.write(
+            path,
+            points=merge('points').reshape(-1, 3),
+            normals=merge('normals').reshape(-1, 3),
+            uvs=merge('uvs').reshape(-1, 2) if with_uvs else np.zeros((0, 2)),
+            face_counts=merge('face_counts'),
+            face_points=merge('face_points', point_offsets),
+            face_normals=merge('face_normals', normal_offsets),
+            face_uvs=merge('face_uvs', uv_offsets) if with_uvs else None
+        )
+
+
+NATIVE_WRITERS = {'OBJ native': ObjWriter, 'Mesh cache': MeshCacheWriter}
 
 
 def showUI():
@@ -0,0 +1,154 @@
+"""
+Reader and writer for Export Master's mesh cache format, a compact binary alternative to obj for internal tools.  This
+module does not need Maya, only numpy.
+
+A file is a fixed size header followed by contiguous little-endian buffers, each starting on a 16 byte boundary:
+
+    points        float32  (point_count, 3)
+    normals       float32  (normal_count, 3)
+    uvs           float32  (uv_count, 2)
+    face_counts   uint32   (face_count,)
+    face_points   uint32   (face_vertex_count,)
+    face_normals  uint32   (face_vertex_count,)
+    face_uvs      uint32   (face_vertex_count,)  only present when uv_count is not 0
+
+Indices are 0 based.  read() memory maps the file and hands back numpy views straight onto the mapping, nothing is
+parsed or copied until the data is touched.
+
+    with meshcache.read('/path/to/pCube1.mcache') as cache:
+        print cache.points.shape
+"""
+
+import mmap
+import os
+import struct
+import numpy as np
+
+EXTENSION = '.mcache'
+MAGIC = b'MSHC'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIIIII')
+ALIGNMENT = 16
+
+# name, dtype, columns, count field
+BUFFERS = (
+    ('points', '<f4', 3, 'point_count'),
+    ('normals', '<f4', 3, 'normal_count'),
+    ('uvs', '<f4', 2, 'uv_count'),
+    ('face_counts', '<u4', 1, 'face_count'),
+    ('face_points', '<u4', 1, 'face_vertex_count'),
+    ('face_normals', '<u4', 1, 'face_vertex_count'),
+    ('face_uvs', '<u4', 1, 'face_vertex_count'),
+)
+
+
+class MeshCacheError(Exception):
+    pass
+
+
+def align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def layout(counts):
+    """
+    yields (name, dtype, columns, count, offset) for every buffer present in a file with the given header counts.
+    """
+    offset = align(HEADER.size)
+    for name, dtype, columns, count_field in BUFFERS:
+        if name == 'face_uvs' and not counts['uv_count']:
+            continue
+        count = counts[count_field]
+        yield name, dtype, columns, count, offset
+        offset = align(offset + count * columns * np.dtype(dtype).itemsize)
+
+
+def write(path, points, normals, uvs, face_counts, face_points, face_normals, face_uvs=None):
+    """
+    writes one mesh to path.  Pass face_uvs=None (and an empty uvs) for a mesh without uvs.
+    """
+    if face_uvs is None:
+        uvs = np.zeros((0, 2))
+    counts = {
+        'point_count': len(points),
+        'normal_count': len(normals),
+        'uv_count': len(uvs),
+        'face_count': len(face_counts),
+        'face_vertex_count': len(face_points),
+    }
+    arrays = {
+        'points': points,
+        'normals': normals,
+        'uvs': uvs,
+        'face_counts': face_counts,
+        'face_points': face_points,
+        'face_normals': face_normals,
+        'face_uvs': face_uvs,
+    }
+
+    # no flags are defined yet, the field is reserved
+    flags = 0
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, flags, counts['point_count'], counts['normal_count'], counts['uv_count'],
+                            counts['face_count'], counts['face_vertex_count']))
+        for name, dtype, columns, count, offset in layout(counts):
+            f.write(b'\0' * (offset - f.tell()))
+            np.ascontiguousarray(arrays[name], dtype=dtype).tofile(f)
+    return path
+
+
+def read(path):
+    return MeshCache(path)
+
+
+class MeshCache(object):
+    """
+    Memory mapped view of a mesh cache file.  Buffers are exposed as read only numpy arrays named after BUFFERS,
+    face_uvs is None when the mesh has no uvs.  The arrays stay valid until close() is called.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.map = None
+        # mmap refuses an empty file, check the size before mapping anything
+        if os.path.getsize(path) < HEADER.size:
+            raise MeshCacheError('%s is too small to be a mesh cache.' % path)
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, flags, point_count, normal_count, uv_count, face_count, face_vertex_count = \
+            HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise MeshCacheError('%s is not a version %d mesh cache.' % (path, VERSION))
+
+        counts = {
+            'point_count': point_count,
+            'normal_count': normal_count,
+            'uv_count': uv_count,
+            'face_count': face_count,
+            'face_vertex_count': face_vertex_count,
+        }
+        buffers = list(layout(counts))
+        name, dtype, columns, count, offset = buffers[-1]
+        if offset + count * columns * np.dtype(dtype).itemsize > len(self.map):
+            self.close()
+            raise MeshCacheError('%s is truncated.' % path)
+
+        self.face_uvs = None
+        for name, dtype, columns, count, offset in buffers:
+            array = np.frombuffer(self.map, dtype=dtype, count=count * columns, offset=offset)
+            setattr(self, name, array.reshape(-1, columns) if columns > 1 else array)
+
+    def close(self):
+        # views onto the map have to be dropped before it can be closed
+        for name, dtype, columns, count_field in BUFFERS:
+            setattr(self, name, None)
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,818 @@
+"""
+SQLite index behind the Model Library (modellibgui.py).  One row per model keyed by name, replacing the
+modelLibrary.json that used to be rewritten in full on every change.  The database runs in WAL mode so artists reading
+the library do not block the one saving to it.  This module does not import Maya, the library can be inspected and
+maintained from plain python:
+
+    index = modellibdb.ModelLibIndex('/path/to/modelLibrary/modelLibrary.db')
+    for row in index.all():
+        print row['name'], row['path']
+
+An existing modelLibrary.json is imported the first time the index is opened and renamed to modelLibrary.json.migrated.
+
+Several artists can share one library.  Every write takes an advisory lock on modelLibrary.db.lock and then a
+BEGIN IMMEDIATE transaction, so writers queue up rather than fail half way.  Each model row carries a version that is
+bumped on every change, save() can insist on the version it last saw so an artist never overwrites a newer save
+without knowing.  Every change is also appended to a change log, clients notice other artists' commits through
+PRAGMA data_version and read just the log entries they missed.  WAL mode relies on shared memory that network file
+systems do not provide, open a library on a network share with shared=True to use a rollback journal instead.
+
+The library directory can be reconciled against the index from the command line, without Maya:
+
+    python modellibdb.py /path/to/modelLibrary --adopt-orphans
+
+SearchIndex is the in memory index ModelLib searches names and tags with.
+
+BlobStore keeps model files content addressed, every distinct file is stored once and compressed.  Models saved into it
+reference their file by hash.  Blobs no model references any more are removed, and the space the store saves is
+reported, with:
+
+    python modellibdb.py /path/to/modelLibrary --collect-garbage --stats
+"""
+
+import argparse
+import bisect
+import collections
+import contextlib
+import gzip
+import hashlib
+import json
+import operator
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+try:
+    from os import scandir
+except ImportError:
+    # python 2 only has it as a separate package
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+try:
+    import fcntl
+except ImportError:
+    # windows
+    fcntl = None
+    import msvcrt
+
+DB_NAME = 'modelLibrary.db'
+BLOB_DIRECTORY_NAME = 'blobs'
+# saves in progress, a hidden folder reconcile does not scan so a half written save is never taken for a model
+SAVING_DIRECTORY_NAME = '.saving'
+
+# statements that bring the schema from version i to i + 1, the version is kept in PRAGMA user_version
+MIGRATIONS = [
+    [
+        'CREATE TABLE models (name TEXT PRIMARY KEY, path TEXT NOT NULL, icon TEXT NOT NULL)',
+    ],
+    [
+        'CREATE TABLE tags (name TEXT NOT NULL REFERENCES models (name) ON DELETE CASCADE, tag TEXT NOT NULL, '
+        'PRIMARY KEY (name, tag))',
+        'CREATE INDEX tags_by_tag ON tags (tag)',
+    ],
+    [
+        'ALTER TABLE models ADD COLUMN blob TEXT',
+        'CREATE TABLE blobs (hash TEXT PRIMARY KEY, size INTEGER NOT NULL, stored_size INTEGER NOT NULL)',
+    ],
+    [
+        'ALTER TABLE models ADD COLUMN triangles INTEGER',
+        'ALTER TABLE models ADD COLUMN faces INTEGER',
+        'ALTER TABLE models ADD COLUMN vertices INTEGER',
+        'ALTER TABLE models ADD COLUMN bbox TEXT',
+        'ALTER TABLE models ADD COLUMN file_size INTEGER',
+        'ALTER TABLE models ADD COLUMN materials INTEGER',
+        'ALTER TABLE models ADD COLUMN saved_at REAL',
+    ],
+    [
+        'ALTER TABLE models ADD COLUMN version INTEGER NOT NULL DEFAULT 1',
+        'CREATE TABLE changes (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL)',
+    ],
+]
+
+# entries kept in the change log, a client further behind than this reloads the whole library
+CHANGE_LOG_SIZE = 10000
+
+# metadata captured when a model is saved, bbox is kept as a json list of min x, y, z and max x, y, z
+STATS = ('triangles', 'faces', 'vertices', 'bbox', 'file_size', 'materials', 'saved_at')
+
+# query words like tris<10000 filter on STATS, see parse_query
+FILTER = re.compile(r'^(tris|faces|verts|mats|size)(<=|>=|<|>|=)(\d+(?:\.\d+)?)(kb|mb|gb)?$')
+FILTER_FIELDS = {'tris': 'triangles', 'faces': 'faces', 'verts': 'vertices', 'mats': 'materials', 'size': 'file_size'}
+UNITS = {None: 1, 'kb': 1 << 10, 'mb': 1 << 20, 'gb': 1 << 30}
+OPERATORS = {'<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge, '=': operator.eq}
+
+WORD = re.compile(r'[a-z0-9]+')
+
+Blob = collections.namedtuple('Blob', 'hash size stored_size')
+
+
+class ConflictError(Exception):
+    pass
+
+
+class LockTimeoutError(Exception):
+    pass
+
+
+class ModelLibIndex(object):
+    def __init__(self, db_path=None, json_path=None, shared=False):
+        self.db_path = db_path
+        self.lock = LibraryLock(db_path + '.lock')
+        self.depth = 0
+        # transactions are begun and ended by write(), writers wait for each other instead of failing straight away
+        self.connection = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute('PRAGMA journal_mode=%s' % ('DELETE' if shared else 'WAL'))
+        # removing a model removes its tags
+        self.connection.execute('PRAGMA foreign_keys=ON')
+        self.migrate()
+        if json_path:
+            self.import_json(json_path)
+
+    @contextlib.contextmanager
+    def write(self):
+        """
+        holds the library lock and an immediate transaction for the block, committed if it does not raise.  Nested
+        blocks join the outer one.
+        """
+        if self.depth:
+            self.depth += 1
+            try:
+                yield
+            finally:
+                self.depth -= 1
+            return
+
+        with self.lock:
+            self.connection.execute('BEGIN IMMEDIATE')
+            self.depth = 1
+            try:
+                yield
+            except BaseException:
+                self.connection.execute('ROLLBACK')
+                raise
+            else:
+                self.connection.execute('COMMIT')
+            finally:
+                self.depth = 0
+
+    def migrate(self):
+        # the lock is only needed when there is something to do
+        if self.connection.execute('PRAGMA user_version').fetchone()[0] >= len(MIGRATIONS):
+            return
+        with self.write():
+            version = self.connection.execute('PRAGMA user_version').fetchone()[0]
+            for number, statements in enumerate(MIGRATIONS[version:], version + 1):
+                for statement in statements:
+                    self.connection.execute(statement)
+                self.connection.execute('PRAGMA user_version = %d' % number)
+
+    def log_changes(self, names=None):
+        # callers own the transaction
+        self.connection.executemany('INSERT INTO changes (name) VALUES (?)', [(name,) for name in names])
+        self.connection.execute('DELETE FROM changes WHERE id <= (SELECT MAX(id) FROM changes) - ?', (CHANGE_LOG_SIZE,))
+
+    def last_change(self):
+        return self.connection.execute('SELECT COALESCE(MAX(id), 0) FROM changes').fetchone()[0]
+
+    def changes_since(self, change_id=0):
+        """
+        returns the id of the last change and the names of the models changed after change_id, in the order they
+        changed.  The names are None if the log no longer goes back that far.
+        """
+        rows = self.connection.execute('SELECT id, name FROM changes WHERE id > ? ORDER BY id', (change_id,)).fetchall()
+        if not rows:
+            return change_id, []
+        if rows[0]['id'] != change_id + 1 and self.connection.execute(
+                'SELECT COUNT(*) FROM changes WHERE id <= ?', (change_id,)).fetchone()[0] == 0:
+            return rows[-1]['id'], None
+        return rows[-1]['id'], [row['name'] for row in rows]
+
+    def data_version(self):
+        """
+        changes whenever another connection commits to the database, reading it costs next to nothing.
+        """
+        return self.connection.execute('PRAGMA data_version').fetchone()[0]
+
+    def import_json(self, json_path=None):
+        """
+        one time import of the json library, returns the number of models imported.
+        """
+        if not os.path.exists(json_path):
+            return 0
+
+        with open(json_path, 'r') as f:
+            data = json.load(f)
+
+        rows = [(item.get('name'), item.get('path'), item.get('icon')) for item in data]
+        with self.write():
+            self.connection.executemany('INSERT OR IGNORE INTO models (name, path, icon) VALUES (?, ?, ?)', rows)
+            self.log_changes([row[0] for row in rows])
+        # keep the old file around but make sure it is never imported twice
+        os.rename(json_path, json_path + '.migrated')
+        return len(rows)
+
+    def all(self):
+        # rowid keeps the order models were added in, like the json list did
+        return self.connection.execute('SELECT * FROM models ORDER BY rowid').fetchall()
+
+    def get(self, name=None):
+        return self.connection.execute('SELECT * FROM models WHERE name = ?', (name,)).fetchone()
+
+    def contains(self, name=None, path=None):
+        row = self.get(name)
+        return row is not None and (path is None or row['path'] == path)
+
+    def save(self, name=None, path=None, icon=None, tags=None, blob=None, stats=None, expected_version=None):
+        """
+        adds the model or updates it if the name is taken.  The model's tags are replaced unless tags is None.  blob is
+        the Blob holding the model's file when it was saved to a BlobStore, stats a dict of STATS.  Unless
+        expected_version is None, ConflictError is raised if the model's version is not expected_version, 0 expects no
+        model of that name.  Returns True if the model is new.
+        """
+        columns = ['path', 'icon', 'blob'] + list(STATS)
+        values = [path, icon, blob.hash if blob else None] + encode_stats(stats)
+        with self.write():
+            if expected_version is not None:
+                self.check_version(name, expected_version)
+            if blob:
+                self.connection.execute('INSERT OR IGNORE INTO blobs (hash, size, stored_size) VALUES (?, ?, ?)', blob)
+            cursor = self.connection.execute(
+                'UPDATE models SET version = version + 1, %s WHERE name = ?' % ', '.join(
+                    '%s = ?' % column for column in columns),
+                values + [name]
+            )
+            is_new = not cursor.rowcount
+            if is_new:
+                self.connection.execute(
+                    'INSERT INTO models (name, %s) VALUES (?%s)' % (', '.join(columns), ', ?' * len(columns)),
+                    [name] + values
+                )
+            if tags is not None:
+                self.write_tags(name, tags)
+            self.log_changes([name])
+        return is_new
+
+    def version(self, name=None):
+        # 0 for a model that does not exist
+        row = self.connection.execute('SELECT version FROM models WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else 0
+
+    def check_version(self, name=None, expected_version=0):
+        version = self.version(name)
+        if version != expected_version:
+            raise ConflictError('%s is at version %d, expected %d.  Another artist changed it.' %
+                                (name, version, expected_version))
+
+    def tags(self, name=None):
+        return [row[0] for row in self.connection.execute('SELECT tag FROM tags WHERE name = ? ORDER BY tag', (name,))]
+
+    def all_tags(self):
+        """
+        returns the tags of every model in one query, as a dict of name to tag list.
+        """
+        tags = collections.defaultdict(list)
+        for name, tag in self.connection.execute('SELECT name, tag FROM tags ORDER BY name, tag'):
+            tags[name].append(tag)
+        return tags
+
+    def set_tags(self, name=None, tags=None):
+        with self.write():
+            self.write_tags(name, tags)
+            self.connection.execute('UPDATE models SET version = version + 1 WHERE name = ?', (name,))
+            self.log_changes([name])
+
+    def write_tags(self, name=None, tags=None):
+        # callers own the transaction
+        self.connection.execute('DELETE FROM tags WHERE name = ?', (name,))
+        self.connection.executemany('INSERT INTO tags (name, tag) VALUES (?, ?)',
+                                    [(name, tag) for tag in normalize_tags(tags)])
+
+    def remove(self, name=None):
+        """
+        returns True if the model was in the index.
+        """
+        with self.write():
+            cursor = self.connection.execute('DELETE FROM models WHERE name = ?', (name,))
+            self.log_changes([name])
+        return cursor.rowcount > 0
+
+    def reconcile(self, directory=None, adopt_orphans=False):
+        """
+        checks the index against directory in a single scan.  Models whose file is gone are removed and, with
+        adopt_orphans, every .ma in directory that is not in the index is added with the .jpg of the same name as its
+        icon.  All changes go in as one transaction.  Returns the lists of removed and added model names.
+        """
+        directory = os.path.normcase(os.path.normpath(directory))
+        with self.write():
+            # scanned under the lock, a save moves its file in and adds its row under the same lock, so the scan sees
+            # either both or neither
+            file_names = list_files(directory)
+            removed, added = self.find_differences(directory, file_names, adopt_orphans)
+            self.connection.executemany('DELETE FROM models WHERE name = ?', [(name,) for name in removed])
+            self.connection.executemany('INSERT INTO models (name, path, icon) VALUES (?, ?, ?)', added)
+            self.log_changes(removed + [name for name, path, icon in added])
+        return removed, [name for name, path, icon in added]
+
+    def find_differences(self, directory=None, file_names=None, adopt_orphans=False):
+        # file_names is the one listing of directory, orphans keep the case they have on disk
+        rows = self.all()
+        files = set(os.path.normcase(name) for name in file_names)
+
+        removed = []
+        for row in rows:
+            path = os.path.normcase(os.path.normpath(row['path']))
+            if os.path.dirname(path) == directory:
+                exists = os.path.basename(path) in files
+            else:
+                # saved outside the library directory, the scan can not answer for it
+                exists = os.path.exists(path)
+            if not exists:
+                removed.append(row['name'])
+
+        added = []
+        if adopt_orphans:
+            known_paths = set(os.path.normcase(os.path.normpath(row['path'])) for row in rows)
+            known_names = set(row['name'] for row in rows)
+            for file_name in file_names:
+                name, ext = os.path.splitext(file_name)
+                path = os.path.join(directory, file_name)
+                if ext.lower() != '.ma' or name in known_names or os.path.normcase(path) in known_paths:
+                    continue
+                added.append((name, path, os.path.join(directory, name + '.jpg')))
+        return removed, added
+
+    def collect_garbage(self, store=None, min_age=3600):
+        """
+        removes the blobs no model references any more, from the index and from store, along with files in store the
+        index never heard of.  Blobs written or reused in the last min_age seconds are kept, a model being saved right
+        now may be about to reference them.  Returns the removed Blobs.
+        """
+        now = time.time()
+        with self.write():
+            known = set(row[0] for row in self.connection.execute('SELECT hash FROM blobs'))
+            rows = self.connection.execute(
+                'SELECT * FROM blobs WHERE hash NOT IN (SELECT blob FROM models WHERE blob IS NOT NULL)'
+            ).fetchall()
+            garbage = [Blob(row['hash'], row['size'], row['stored_size']) for row in rows
+                       if now - store.modified(row['hash']) >= min_age]
+            # left behind by a save that never made it into the index
+            garbage.extend(Blob(blob_hash, 0, store.stored_size(blob_hash)) for blob_hash in store.hashes()
+                           if blob_hash not in known and now - store.modified(blob_hash) >= min_age)
+            self.connection.executemany('DELETE FROM blobs WHERE hash = ?', [(blob.hash,) for blob in garbage])
+        for blob in garbage:
+            store.remove(blob.hash)
+        return garbage
+
+    def blob_stats(self):
+        """
+        returns a dict of the number of models and blobs in the store, the size the models' files would take on their
+        own, the size of the distinct files, the size actually stored and the bytes saved.
+        """
+        blobs, unique_size, stored_size = self.connection.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) FROM blobs'
+        ).fetchone()
+        models, size = self.connection.execute(
+            'SELECT COUNT(*), COALESCE(SUM(blobs.size), 0) FROM models JOIN blobs ON models.blob = blobs.hash'
+        ).fetchone()
+        return {
+            'models': models,
+            'blobs': blobs,
+            'size': size,
+            'unique_size': unique_size,
+            'stored_size': stored_size,
+            'saved': size - stored_size,
+        }
+
+    def close(self):
+        self.connection.close()
+
+
+class LibraryLock(object):
+    """
+    Advisory lock on a file next to the database.  SQLite locks the database itself, but those locks can not be trusted
+    on network shares, writers take this one first.  POSIX record locks (lockf) work over NFS, on windows msvcrt locks
+    the first byte of the file.
+    """
+    def __init__(self, path=None, timeout=30):
+        self.path = path
+        self.timeout = timeout
+        self.file = None
+
+    def __enter__(self):
+        self.file = open(self.path, 'a+')
+        deadline = time.time() + self.timeout
+        while True:
+            try:
+                self.lock()
+                return self
+            except (IOError, OSError):
+                if time.time() > deadline:
+                    self.file.close()
+                    raise LockTimeoutError('Timed out waiting for %s.' % self.path)
+                time.sleep(0.01)
+
+    def __exit__(self, *args):
+        self.unlock()
+        self.file.close()
+
+    def lock(self):
+        if fcntl:
+            fcntl.lockf(self.file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_NBLCK, 1)
+
+    def unlock(self):
+        if fcntl:
+            fcntl.lockf(self.file.fileno(), fcntl.LOCK_UN)
+        else:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class BlobStore(object):
+    """
+    Content addressed file store.  Every distinct file is kept once, gzip compressed, under the sha1 of its contents as
+    directory/ab/abcdef....gz.  The store knows nothing about models, ModelLibIndex records which model references
+    which blob and collects the ones nothing references.
+    """
+    EXTENSION = '.gz'
+
+    def __init__(self, directory=None):
+        self.directory = directory
+
+    def blob_path(self, blob_hash=None):
+        return os.path.join(self.directory, blob_hash[:2], blob_hash + BlobStore.EXTENSION)
+
+    def put(self, path=None):
+        """
+        stores the file at path unless an identical file is stored already, returns its Blob.
+        """
+        blob_hash = file_checksum(path)
+        blob_path = self.blob_path(blob_hash)
+        if os.path.exists(blob_path):
+            # keeps it clear of garbage collection while the model referencing it is saved
+            os.utime(blob_path, None)
+        else:
+            # compress next to the blob and rename it into place, a blob is never seen half written
+            temp_path = '%s.%d.tmp' % (blob_path, os.getpid())
+            make_directory(os.path.dirname(blob_path))
+            try:
+                with open(path, 'rb') as source:
+                    with gzip.open(temp_path, 'wb') as target:
+                        shutil.copyfileobj(source, target, 1 << 20)
+                rename(temp_path, blob_path)
+            finally:
+                remove_temp(temp_path)
+        return Blob(blob_hash, os.path.getsize(path), os.path.getsize(blob_path))
+
+    def get(self, blob_hash=None, directory=None, extension='.ma'):
+        """
+        returns the path of a decompressed copy of the blob, in directory or a folder under the system temp directory.
+        Copies are named after the hash, a blob loaded a second time is not decompressed again.
+        """
+        directory = directory or os.path.join(tempfile.gettempdir(), 'modelLibraryBlobs')
+        path = os.path.join(directory, blob_hash + extension)
+        if not os.path.exists(path):
+            temp_path = '%s.%d.tmp' % (path, os.getpid())
+            make_directory(directory)
+            try:
+                with gzip.open(self.blob_path(blob_hash), 'rb') as source:
+                    with open(temp_path, 'wb') as target:
+                        shutil.copyfileobj(source, target, 1 << 20)
+                rename(temp_path, path)
+            finally:
+                remove_temp(temp_path)
+        return path
+
+    def hashes(self):
+        for folder in list_directories(self.directory):
+            for file_name in list_files(os.path.join(self.directory, folder)):
+                # anything not named like a blob is not ours to collect
+                if file_name.startswith(folder) and file_name.endswith(BlobStore.EXTENSION):
+                    yield file_name[:-len(BlobStore.EXTENSION)]
+
+    def modified(self, blob_hash=None):
+        # a missing blob is as old as it gets
+        blob_path = self.blob_path(blob_hash)
+        return os.path.getmtime(blob_path) if os.path.exists(blob_path) else 0
+
+    def stored_size(self, blob_hash=None):
+        return os.path.getsize(self.blob_path(blob_hash))
+
+    def remove(self, blob_hash=None):
+        blob_path = self.blob_path(blob_hash)
+        if os.path.exists(blob_path):
+            os.remove(blob_path)
+
+
+class SearchIndex(object):
+    """
+    In memory search over model names and tags, kept up to date one model at a time with add() and remove() so a
+    search never has to look at every model.  Names are split into lower case words at camel case humps and anything
+    that is not a letter or digit.  A query word of three characters or more matches anywhere in a model's name or
+    tags, candidates come from a trigram index and are then checked against the text.  Shorter query words match the
+    start of a word, found by bisecting the sorted list of distinct words.  Every query word and every tag has to
+    match, results keep the order models were added in.
+
+    Internally models are numbered in the order they were added and every table holds sets of those numbers, so
+    intersections and the final sort work on small ints rather than names.
+    """
+    def __init__(self):
+        self.positions = {}
+        self.names = {}
+        self.texts = {}
+        self.words_of = {}
+        self.tags = {}
+        self.counter = 0
+        self.trigrams = collections.defaultdict(set)
+        self.tagged = collections.defaultdict(set)
+        self.postings = collections.defaultdict(set)
+        # distinct words, sorted
+        self.words = []
+
+    def __len__(self):
+        return len(self.positions)
+
+    def add(self, name=None, tags=None):
+        """
+        adds the model or replaces its tags, a replaced model keeps its place in the results.
+        """
+        for word in self.index(name, tags):
+            bisect.insort(self.words, word)
+
+    def extend(self, items=None):
+        """
+        adds (name, tags) pairs, sorting the word list once at the end rather than inserting every new word in place.
+        """
+        # held apart until the end so remove() keeps bisecting a sorted list
+        words = []
+        for name, tags in items:
+            words.extend(self.index(name, tags))
+        self.words.extend(words)
+        self.words.sort()
+
+    def index(self, name=None, tags=None):
+        # indexes everything but the word list, returns the words that are new to it
+        position = self.positions.get(name)
+        self.remove(name)
+        if position is None:
+            position = self.counter
+            self.counter += 1
+        self.positions[name] = position
+        self.names[position] = name
+
+        tags = normalize_tags(tags)
+        text = ' '.join([name.lower()] + tags)
+        words = set(get_words(' '.join([name] + tags)))
+        self.texts[position] = text
+        self.words_of[position] = words
+        self.tags[position] = tags
+        for trigram in get_trigrams(text):
+            self.trigrams[trigram].add(position)
+        for tag in tags:
+            self.tagged[tag].add(position)
+
+        new_words = []
+        for word in words:
+            if word not in self.postings:
+                new_words.append(word)
+            self.postings[word].add(position)
+        return new_words
+
+    def remove(self, name=None):
+        position = self.positions.pop(name, None)
+        if position is None:
+            return
+        del self.names[position]
+        for trigram in get_trigrams(self.texts.pop(position)):
+            self.discard(self.trigrams, trigram, position)
+        for word in self.words_of.pop(position):
+            if self.discard(self.postings, word, position):
+                del self.words[bisect.bisect_left(self.words, word)]
+        for tag in self.tags.pop(position):
+            self.discard(self.tagged, tag, position)
+
+    def discard(self, table=None, key=None, position=None):
+        """
+        empty sets are dropped so the tables do not grow with every model ever seen, returns True if key was dropped.
+        """
+        positions = table[key]
+        positions.discard(position)
+        if not positions:
+            del table[key]
+            return True
+        return False
+
+    def search(self, text='', tags=None):
+        """
+        returns the names of the models matching every word of text and every tag.
+        """
+        positions = None
+        for tag in normalize_tags(tags):
+            positions = self.intersect(positions, self.tagged.get(tag, set()))
+        for word in WORD.findall(text.lower()):
+            if positions is not None and len(word) >= 3:
+                # once narrowed down, checking the text of what is left is cheaper than another index lookup
+                positions = set(position for position in positions if word in self.texts[position])
+            else:
+                positions = self.intersect(positions, self.match(word))
+        if positions is None:
+            positions = self.names
+        return [self.names[position] for position in sorted(positions)]
+
+    def intersect(self, positions=None, other=None):
+        return set(other) if positions is None else positions & other
+
+    def match(self, word=None):
+        if len(word) < 3:
+            found = set()
+            for i in xrange(bisect.bisect_left(self.words, word), len(self.words)):
+                if not self.words[i].startswith(word):
+                    break
+                found.update(self.postings[self.words[i]])
+            return found
+
+        # start from the rarest trigram, the candidate set only gets smaller
+        candidates = None
+        for trigram in sorted(get_trigrams(word), key=lambda t: len(self.trigrams.get(t, ()))):
+            candidates = self.intersect(candidates, self.trigrams.get(trigram, set()))
+            if not candidates:
+                return set()
+        # trigrams can match out of order, confirm against the text
+        return set(position for position in candidates if word in self.texts[position])
+
+
+def encode_stats(stats=None):
+    # STATS in column order, a model saved without them gets NULLs
+    stats = stats or {}
+    values = [stats.get(key) for key in STATS]
+    if values[STATS.index('bbox')] is not None:
+        values[STATS.index('bbox')] = json.dumps(list(values[STATS.index('bbox')]))
+    return values
+
+
+def decode_stats(row=None):
+    """
+    returns the STATS of an index row as a dict, missing values are None.
+    """
+    stats = dict((key, row[key]) for key in STATS)
+    if stats['bbox'] is not None:
+        stats['bbox'] = json.loads(stats['bbox'])
+    return stats
+
+
+def parse_query(text=''):
+    """
+    splits a search into its free text, the #tags it names and its filters.  A filter is a stat, a comparison and a
+    number with no spaces, e.g. tris<10000, verts>=500, mats=1 or size<2mb, and comes back as a (stat, operator,
+    value) tuple with the stat named as in STATS.
+    """
+    words, tags, filters = [], [], []
+    for word in text.split():
+        match = FILTER.match(word.lower())
+        if word.startswith('#'):
+            tags.append(word[1:])
+        elif match:
+            field, comparison, number, unit = match.groups()
+            filters.append((FILTER_FIELDS[field], comparison, float(number) * UNITS[unit]))
+        else:
+            words.append(word)
+    return ' '.join(words), tags, filters
+
+
+def passes(stats=None, filters=None):
+    """
+    True if stats pass every filter from parse_query.  A stat that was never captured passes none.
+    """
+    for field, comparison, value in filters:
+        stat = stats.get(field)
+        if stat is None or not OPERATORS[comparison](stat, value):
+            return False
+    return True
+
+
+def get_words(text=None):
+    # chairLeg_02 -> chair, leg, 02
+    return WORD.findall(re.sub(r'([a-z0-9])([A-Z])', r'\1 \2', text).lower())
+
+
+def get_trigrams(text=None):
+    return set(text[i:i + 3] for i in xrange(len(text) - 2))
+
+
+def normalize_tags(tags=None):
+    """
+    tags are stored lower case without surrounding whitespace, sorted and without duplicates.
+    """
+    return sorted(set(tag.strip().lower() for tag in tags or [] if tag.strip()))
+
+
+def file_checksum(path=None):
+    sha = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def make_directory(directory=None):
+    try:
+        os.makedirs(directory)
+    except OSError:
+        # somebody else made it first
+        if not os.path.isdir(directory):
+            raise
+
+
+def rename(source=None, target=None):
+    """
+    moves source over target.  Only used for files named after their contents, if another process got there first
+    (windows will not rename over an existing file) its copy is as good as ours.
+    """
+    try:
+        os.rename(source, target)
+    except OSError:
+        if not os.path.exists(target):
+            raise
+        os.remove(source)
+
+
+def replace_file(source=None, target=None):
+    """
+    moves source over target in one step, readers see the old file or the new one and never a half written one.
+    Windows will not rename over an existing file, there target is removed first.  Call it under the library lock.
+    """
+    try:
+        os.rename(source, target)
+    except OSError:
+        if not os.path.exists(target):
+            raise
+        os.remove(target)
+        os.rename(source, target)
+
+
+def remove_temp(path=None):
+    # a write that failed half way, or lost the race in rename, leaves its temp copy behind
+    if os.path.exists(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def list_directories(directory=None):
+    if not os.path.isdir(directory):
+        return []
+    if scandir is None:
+        return [name for name in os.listdir(directory) if os.path.isdir(os.path.join(directory, name))]
+    return [entry.name for entry in scandir(directory) if entry.is_dir()]
+
+
+def list_files(directory=None):
+    if not os.path.isdir(directory):
+        return []
+    if scandir is None:
+        return os.listdir(directory)
+    return [entry.name for entry in scandir(directory) if entry.is_file()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Reconcile a model library directory with its index.')
+    parser.add_argument('directory', help='Model library directory.')
+    parser.add_argument('--adopt-orphans', action='store_true', help='Add .ma files that are not in the index.')
+    parser.add_argument('--collect-garbage', action='store_true', help='Remove blobs no model references.')
+    parser.add_argument('--min-age', type=int, default=3600, help='With --collect-garbage, seconds a blob is kept.')
+    parser.add_argument('--stats', action='store_true', help='Report the space the blob store saves.')
+    parser.add_argument('--shared', action='store_true', help='The library is on a network share, do not use WAL.')
+    args = parser.parse_args(argv)
+
+    index = ModelLibIndex(os.path.join(args.directory, DB_NAME), os.path.join(args.directory, 'modelLibrary.json'),
+                          args.shared)
+    removed, added = index.reconcile(args.directory, args.adopt_orphans)
+    for name in removed:
+        sys.stdout.write('Removed: %s\n' % name)
+    for name in added:
+        sys.stdout.write('Added: %s\n' % name)
+
+    if args.collect_garbage:
+        garbage = index.collect_garbage(BlobStore(os.path.join(args.directory, BLOB_DIRECTORY_NAME)), args.min_age)
+        sys.stdout.write('Collected %d blobs, %d bytes\n' % (len(garbage), sum(blob.stored_size for blob in garbage)))
+    if args.stats:
+        stats = index.blob_stats()
+        sys.stdout.write('%(models)d models in %(blobs)d blobs: %(size)d bytes as files, %(unique_size)d bytes '
+                         'distinct, %(stored_size)d bytes stored, %(saved)d bytes saved\n' % stats)
+    index.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,20 +5,75 @@ with same name.  Output is a .ma file located in a default directory.  If a mode
 directory it's library membership will be revoked next time the app is executed.  The model file will still be present
 in the directory, but no longer loaded into the library.  To load or delete a model from the library, select the model's
 icon in the gui and click the appropriate action.  Hover over an icon to see more information on the model.
+
+Models can be saved with comma separated tags.  Type in the search field to filter the library by name and tag, words
+starting with # only match tags, e.g. "chair #prop".  Scripts can search with ModelLib.search('chair', tags=['prop']).
+
+Polycount, vertex count, bounding box, file size, material count and save time are recorded when a model is saved.
+They show in the tooltip, the list can be sorted by them and the search field takes filters on them without opening
+any file: tris<10000, faces>=500, verts<2000, mats=1, size<2mb.
+
+The library can be shared.  Changes other artists make show up within a couple of seconds, and saving over a model
+someone else changed in the meantime asks for a second save rather than silently replacing their work.  Set
+MODEL_LIBRARY_SHARED=1 when the library lives on a mapped network drive, UNC paths are detected.
+
+With Dedupe checked a model is saved into a content addressed store instead of as a .ma of its own, identical files are
+kept once and compressed.  Loading such a model decompresses it to a temp file first.  See modellibdb.py to collect
+blobs no model uses any more and for stats on the space saved.
+
+The load mode decides how a model comes into the scene.  Import brings in a new copy every time.  Instance and Duplicate
+only import a model the first time, after that the copy already in the scene is instanced or duplicated.  Reference
+brings the model in as a file reference.  Proxy drops a wireframe box the size of the model, select proxies and click
+Swap Proxies to replace them with the real model.
+
+Importing the module does no work in Maya, the library directory and the main window are looked up when first needed.
+ModelLib only uses maya.cmds, it can be used from scripts and mayapy without pymel.
 """
 
-import pymel.core as pmc
+import maya.cmds as cmds
+import maya.api.OpenMaya as om
 import os
-import json
 import pprint
+import hashlib
+import time
+import tempfile
+import collections
+import modellibdb
 import maya.OpenMayaUI as omui
 from PySide import QtGui, QtCore
 from shiboken import wrapInstance
 
-USER_APP_DIR = pmc.internalVar(userAppDir=True)
-DEFAULT_DIRECTORY = os.path.join(USER_APP_DIR, 'modelLibrary')
-JSON_PATH = os.path.join(DEFAULT_DIRECTORY, 'modelLibrary.json')
+# resolved on first use, see get_default_directory.  Scripts can point the library elsewhere by setting it first
+DEFAULT_DIRECTORY = None
+# names of what the library keeps in its directory, see library_path
+JSON_NAME = 'modelLibrary.json'
+THUMBNAIL_DIRECTORY_NAME = 'thumbnails'
+# decompressed blobs that scenes reference, unlike load copies these have to outlive the temp directory
+BLOB_FILE_DIRECTORY_NAME = 'blobFiles'
 UNIQUE_HANDLE = 'ModelLibWindow'
+# a library on a network share can not use WAL, see modellibdb.py.  UNC paths are detected in open_index
+SHARED_LIBRARY = os.environ.get('MODEL_LIBRARY_SHARED') == '1'
+# how often the gui checks for other artists' changes
+POLL_INTERVAL = 2000
+LOAD_MODES = ['Import', 'Instance', 'Duplicate', 'Reference', 'Proxy']
+SORT_ORDERS = ['Added', 'Name', 'Triangles', 'File size', 'Newest']
+# stat and direction of the orders that sort on stats
+SORT_STATS = {'Triangles': ('triangles', 1), 'File size': ('file_size', 1), 'Newest': ('saved_at', -1)}
+# root nodes of loaded models carry the model name, proxies are flagged as well
+NAME_ATTR = 'modelLibName'
+PROXY_ATTR = 'modelLibProxy'
+
+
+def get_default_directory():
+    # internalVar is asked when the library is first needed rather than when the module is imported
+    global DEFAULT_DIRECTORY
+    if DEFAULT_DIRECTORY is None:
+        DEFAULT_DIRECTORY = os.path.join(cmds.internalVar(userAppDir=True), 'modelLibrary')
+    return DEFAULT_DIRECTORY
+
+
+def library_path(name=None):
+    return os.path.join(get_default_directory(), name)
 
 
 def get_maya_main_window():
@@ -31,36 +86,66 @@ class ModelLibUI(QtGui.QDialog):
     SIZE = 64
     BUFFER = 20
 
-    def __init__(self, parent=get_maya_main_window(), unique_handle=UNIQUE_HANDLE):
+    def __init__(self, parent=None, unique_handle=UNIQUE_HANDLE):
+        # looked up here rather than as the default value, which would run when the module is imported
+        if parent is None:
+            parent = get_maya_main_window()
         QtGui.QDialog.__init__(self, parent)
         self.setWindowTitle('Model Library')
         self.setObjectName(unique_handle)
-        self.setMinimumSize(300, 300)
-        self.setMaximumSize(300, 300)
+        self.setMinimumSize(300, 390)
+        self.setMaximumSize(300, 390)
         self.create_controls()
         self.create_layout()
         self.create_connections()
 
         self.model_lib = ModelLib()
+        self.thumbnail_loader = ThumbnailLoader(ModelLibUI.SIZE, self)
+        self.list_model = ModelListModel(self.model_lib, self.thumbnail_loader, self)
+        self.model_list_box.setModel(self.list_model)
         self.load_model_lib()
 
+        # other artists' changes show up without a reload
+        self.poll_timer = QtCore.QTimer(self)
+        self.poll_timer.timeout.connect(self.poll_cmd)
+        self.poll_timer.start(POLL_INTERVAL)
+
     def create_controls(self):
         # save layout
         self.save_lbl = QtGui.QLabel('Model:')
         self.save_line = QtGui.QLineEdit()
         self.save_btn = QtGui.QPushButton('Save')
+        self.tags_lbl = QtGui.QLabel('Tags:')
+        self.tags_line = QtGui.QLineEdit()
+        self.tags_line.setPlaceholderText('comma separated')
+        self.dedupe_chk = QtGui.QCheckBox('Dedupe')
+        self.dedupe_chk.setToolTip('Store the model once, compressed, however many times it is saved')
+
+        # search layout
+        self.search_line = QtGui.QLineEdit()
+        self.search_line.setPlaceholderText('Search, #tag, tris<10000')
+        self.sort_box = QtGui.QComboBox()
+        self.sort_box.addItems(SORT_ORDERS)
 
         # model list layout
-        # TODO: center icons within QListWidget
-        self.model_list_box = QtGui.QListWidget()
-        self.model_list_box.setViewMode(QtGui.QListWidget.IconMode)
+        # TODO: center icons within QListView
+        self.model_list_box = QtGui.QListView()
+        self.model_list_box.setViewMode(QtGui.QListView.IconMode)
         self.model_list_box.setIconSize(QtCore.QSize(ModelLibUI.SIZE, ModelLibUI.SIZE))
         self.model_list_box.setGridSize(
             QtCore.QSize(ModelLibUI.SIZE + ModelLibUI.BUFFER, ModelLibUI.SIZE + ModelLibUI.BUFFER)
         )
         self.model_list_box.setMovement(QtGui.QListView.Static)
+        self.model_list_box.setResizeMode(QtGui.QListView.Adjust)
+        # every cell is the same size, the view can lay out rows without asking the model about each one
+        self.model_list_box.setUniformItemSizes(True)
+        self.model_list_box.setLayoutMode(QtGui.QListView.Batched)
 
         # button layout
+        self.mode_lbl = QtGui.QLabel('Mode:')
+        self.mode_box = QtGui.QComboBox()
+        self.mode_box.addItems(LOAD_MODES)
+        self.swap_btn = QtGui.QPushButton('Swap Proxies')
         self.load_btn = QtGui.QPushButton('Load')
         self.remove_btn = QtGui.QPushButton('Delete')
         self.close_btn = QtGui.QPushButton('Close')
@@ -71,12 +156,20 @@ class ModelLibUI(QtGui.QDialog):
         save_layout.addWidget(self.save_lbl)
         save_layout.addWidget(self.save_line)
         save_layout.addWidget(self.save_btn)
+        tags_layout = QtGui.QHBoxLayout()
+        tags_layout.addWidget(self.tags_lbl)
+        tags_layout.addWidget(self.tags_line)
+        tags_layout.addWidget(self.dedupe_chk)
 
         # model list layout
         model_list_layout = QtGui.QHBoxLayout()
         model_list_layout.addWidget(self.model_list_box)
 
         # button layout
+        mode_layout = QtGui.QHBoxLayout()
+        mode_layout.addWidget(self.mode_lbl)
+        mode_layout.addWidget(self.mode_box)
+        mode_layout.addWidget(self.swap_btn)
         button_layout = QtGui.QHBoxLayout()
         button_layout.addWidget(self.load_btn)
         button_layout.addWidget(self.remove_btn)
@@ -85,80 +178,344 @@ class ModelLibUI(QtGui.QDialog):
         # main layout
         main_layout = QtGui.QVBoxLayout()
         main_layout.addLayout(save_layout)
+        main_layout.addLayout(tags_layout)
+        search_layout = QtGui.QHBoxLayout()
+        search_layout.addWidget(self.search_line)
+        search_layout.addWidget(self.sort_box)
+        main_layout.addLayout(search_layout)
         main_layout.addLayout(model_list_layout)
+        main_layout.addLayout(mode_layout)
         main_layout.addLayout(button_layout)
 
         self.setLayout(main_layout)
 
     def create_connections(self):
         self.load_btn.clicked.connect(self.load_btn_cmd)
+        self.swap_btn.clicked.connect(self.swap_btn_cmd)
         self.remove_btn.clicked.connect(self.delete_btn_cmd)
         self.close_btn.clicked.connect(self.close_btn_cmd)
         self.save_btn.clicked.connect(self.save_btn_cmd)
+        self.search_line.textChanged.connect(self.search_cmd)
+        self.sort_box.currentIndexChanged.connect(self.search_cmd)
 
     def load_btn_cmd(self):
-        curr_item = self.model_list_box.currentItem()
-        if curr_item:
-            # get the item name of the curr selected
-            item_name = curr_item.text()
-            print 'Loading:', item_name
-            model = Model(name=item_name)
-            self.model_lib.load_model(model)
+        curr_index = self.model_list_box.currentIndex()
+        if curr_index.isValid():
+            # get the model of the curr selected
+            model = self.list_model.model_at(curr_index)
+            print 'Loading:', model.name
+            self.model_lib.load_model(model, self.mode_box.currentText())
         else:
             # nothing is selected, display a warning
-            pmc.displayWarning('Please select a model to load.')
+            cmds.warning('Please select a model to load.')
+
+    def swap_btn_cmd(self):
+        proxies = [node for node in cmds.ls(sl=True, transforms=True, long=True) or []
+                   if cmds.attributeQuery(PROXY_ATTR, node=node, exists=True)]
+        if proxies:
+            self.model_lib.swap_proxies(proxies)
+        else:
+            cmds.warning('Please select model proxies to swap.')
 
     def refresh_btn_cmd(self):
-        self.model_list_box.clear()
         self.load_model_lib()
 
     def delete_btn_cmd(self):
-        curr_item = self.model_list_box.currentItem()
-        if curr_item:
-            item_name = curr_item.text()
-            print 'Deleting:', item_name
-            model = Model(name=item_name)
+        curr_index = self.model_list_box.currentIndex()
+        if curr_index.isValid():
+            model = self.list_model.model_at(curr_index)
+            print 'Deleting:', model.name
             # TODO: should we also delete the model from the directory?
-            # delete model from library
-            self.model_lib.delete_model(model)
-            self.refresh_btn_cmd()
+            # delete model from library, the view drops just that row
+            self.list_model.delete_model(curr_index.row())
+            if self.list_model.models is not None:
+                self.search_cmd()
         else:
-            pmc.displayWarning('Please select a model to remove.')
+            cmds.warning('Please select a model to remove.')
 
     def close_btn_cmd(self):
-        pmc.deleteUI(self.objectName(), window=True)
+        cmds.deleteUI(self.objectName(), window=True)
 
     def save_btn_cmd(self):
         model_name = self.save_line.text()
         if model_name:
             print 'Saving', model_name
-            model = Model(name=model_name)
-            self.model_lib.save_model(model=model)
+            model = Model(name=model_name, tags=self.tags_line.text().split(','))
+            self.model_lib.use_blob_store = self.dedupe_chk.isChecked()
+            try:
+                is_new = self.model_lib.save_model(model=model)
+            except modellibdb.ConflictError:
+                self.poll_cmd()
+                cmds.warning('%s was just changed by another artist, save again to overwrite it.' % model_name)
+                return
+            # an overwritten model gets a new icon
+            self.thumbnail_loader.invalidate(model.icon)
             self.save_line.setText('')
-            # refresh the model list since it has been updated...
-            self.refresh_btn_cmd()
+            self.tags_line.setText('')
+            # update the view with just the model that changed...
+            if self.list_model.models is not None:
+                # ...unless filtering, the model may have started or stopped matching
+                self.search_cmd()
+            elif is_new:
+                self.list_model.model_appended()
+            else:
+                self.list_model.model_changed(model)
         else:
-            pmc.displayWarning('Please enter model name to save.')
+            cmds.warning('Please enter model name to save.')
 
     def load_model_lib(self):
-        # clear list before loading...
-        self.model_lib.model_list = []
-        # generate the model list
-        self.model_lib.generate_model_list()
-
-        # try and load each model
-        for model in self.model_lib.model_list:
-            # if the model path exists let's load it up...
-            if os.path.exists(model.path):
-                item = QtGui.QListWidgetItem(model.name)
-                self.model_list_box.addItem(item)
-                icon = QtGui.QIcon(model.icon)
-                item.setIcon(icon)
-                # tool tip
-                item.setToolTip(pprint.pformat(str(model.path)))
+        # drops models whose file is gone in one pass and regenerates the model list
+        self.model_lib.reconcile()
+
+        # the view fetches rows from model_list, or the current search results, as it needs them
+        self.search_cmd()
+
+    def poll_cmd(self):
+        changes = self.model_lib.poll()
+        if changes is None or (changes and self.list_model.models is not None):
+            # regenerated, or the changes may affect the search results
+            self.search_cmd()
+            return
+        for action, model, row in changes:
+            if action == 'removed':
+                self.list_model.model_removed(row)
+            elif action == 'added':
+                self.list_model.model_appended()
             else:
-                # the model path does not exist, delete it from the model library and json
-                self.model_lib.delete_model(model)
+                self.thumbnail_loader.invalidate(model.icon)
+                self.list_model.model_changed(model)
+
+    def search_cmd(self):
+        text = self.search_line.text()
+        sort = self.sort_box.currentText()
+        if text.strip() or sort != 'Added':
+            models = self.model_lib.search(text)
+            self.model_lib.sort_models(models, sort)
+            self.list_model.set_models(models)
+        else:
+            self.list_model.set_models(None)
+
+
+class ModelListModel(QtCore.QAbstractListModel):
+    """
+    Serves ModelLib.model_list, or a list of search results, to the list view without creating an item per model.  Rows
+    are handed to the view in batches through canFetchMore/fetchMore, saves and deletes are applied as single row
+    inserts and removals and icons are only requested for the rows the view actually paints.
+    """
+    BATCH = 256
+
+    def __init__(self, model_lib=None, thumbnail_loader=None, parent=None):
+        QtCore.QAbstractListModel.__init__(self, parent)
+        self.model_lib = model_lib
+        self.thumbnail_loader = thumbnail_loader
+        self.thumbnail_loader.loaded.connect(self.thumbnail_loaded)
+        self.fetched = 0
+        self.repaint_pending = False
+        # search results, None shows the whole library
+        self.models = None
+
+    def source(self):
+        return self.model_lib.model_list if self.models is None else self.models
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else self.fetched
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()):
+        return not parent.isValid() and self.fetched < len(self.source())
+
+    def fetchMore(self, parent=QtCore.QModelIndex()):
+        count = min(ModelListModel.BATCH, len(self.source()) - self.fetched)
+        self.beginInsertRows(QtCore.QModelIndex(), self.fetched, self.fetched + count - 1)
+        self.fetched += count
+        self.endInsertRows()
+
+    def data(self, index=None, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        model = self.source()[index.row()]
+        if role == QtCore.Qt.DisplayRole:
+            return model.name
+        elif role == QtCore.Qt.DecorationRole:
+            # None until the thumbnail has been decoded in the background
+            return self.thumbnail_loader.pixmap(model.icon)
+        elif role == QtCore.Qt.ToolTipRole:
+            tooltip = pprint.pformat(str(model.path))
+            if model.tags:
+                tooltip += '\nTags: ' + ', '.join(model.tags)
+            if model.stats:
+                tooltip += '\n' + format_stats(model.stats)
+            return tooltip
+        return None
+
+    def model_at(self, index=None):
+        return self.source()[index.row()]
+
+    def reset(self):
+        self.beginResetModel()
+        self.fetched = 0
+        self.endResetModel()
+
+    def set_models(self, models=None):
+        # switches between search results and the whole library
+        self.models = models
+        self.reset()
+
+    def model_appended(self):
+        # a model that is not fetched yet shows up through fetchMore
+        if self.fetched == len(self.model_lib.model_list) - 1:
+            self.beginInsertRows(QtCore.QModelIndex(), self.fetched, self.fetched)
+            self.fetched += 1
+            self.endInsertRows()
+
+    def model_changed(self, model=None):
+        for row, item in enumerate(self.model_lib.model_list[:self.fetched]):
+            if item.name == model.name:
+                index = self.index(row)
+                self.dataChanged.emit(index, index)
+
+    def model_removed(self, row=0):
+        # the model is already gone from model_list, rows the view never fetched need no notice
+        if row < self.fetched:
+            self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+            self.fetched -= 1
+            self.endRemoveRows()
+
+    def delete_model(self, row=0):
+        # deleted first, should that raise the view has not been told about a removal that never happened
+        self.model_lib.delete_model(self.source()[row])
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        if self.models is not None:
+            del self.models[row]
+        self.fetched -= 1
+        self.endRemoveRows()
+
+    def thumbnail_loaded(self, path=None):
+        # thumbnails arrive in bursts, repaint once per pass of the event loop rather than once per thumbnail
+        if not self.repaint_pending:
+            self.repaint_pending = True
+            QtCore.QTimer.singleShot(0, self.repaint)
+
+    def repaint(self):
+        self.repaint_pending = False
+        if self.fetched:
+            self.dataChanged.emit(self.index(0), self.index(self.fetched - 1))
+
+
+class ThumbnailTask(QtCore.QRunnable):
+    """
+    Decodes one icon at thumbnail size on a pool thread.  QImage is safe to use off the main thread, QPixmap is not.
+    """
+    def __init__(self, path=None, size=64, signals=None, directory=None):
+        QtCore.QRunnable.__init__(self)
+        self.path = path
+        self.size = size
+        self.signals = signals
+        self.directory = directory
+
+    def run(self):
+        image = QtGui.QImage()
+        if os.path.exists(self.path):
+            cache_path = thumbnail_cache_path(self.path, self.directory)
+            # only good if it was written after the icon last changed, otherwise it is decoded again and written over
+            if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(self.path):
+                image = QtGui.QImage(cache_path)
+            if image.isNull():
+                # the jpeg decoder can scale while decoding, far cheaper than decoding 200x200 and scaling after
+                reader = QtGui.QImageReader(self.path)
+                reader.setScaledSize(QtCore.QSize(self.size, self.size))
+                image = reader.read()
+                if not image.isNull():
+                    if not os.path.exists(self.directory):
+                        try:
+                            os.mkdir(self.directory)
+                        except OSError:
+                            # another task got there first
+                            pass
+                    image.save(cache_path, 'PNG')
+        self.signals.finished.emit(self.path, image)
+
+
+class ThumbnailSignals(QtCore.QObject):
+    finished = QtCore.Signal(str, QtGui.QImage)
+
+
+class ThumbnailLoader(QtCore.QObject):
+    """
+    Hands out thumbnail pixmaps from a bounded LRU cache.  A miss queues a ThumbnailTask and loaded is emitted with the
+    icon path once its pixmap is ready.  Scaled thumbnails are also kept on disk in directory, the library's
+    thumbnails folder by default, one file per icon path that is written over when the icon changes.  Missing and
+    unreadable icons are cached as a flat placeholder so they are not decoded again on every paint.
+    """
+    loaded = QtCore.Signal(str)
+
+    CACHE_SIZE = 512
+
+    def __init__(self, size=64, parent=None, directory=None):
+        QtCore.QObject.__init__(self, parent)
+        self.size = size
+        # resolved here, on the main thread, the tasks can not ask maya
+        self.directory = directory or library_path(THUMBNAIL_DIRECTORY_NAME)
+        self.cache = collections.OrderedDict()
+        self.placeholder = None
+        self.pending = set()
+        self.pool = QtCore.QThreadPool(self)
+        self.pool.setMaxThreadCount(2)
+        # lives on the main thread, so tasks emitting it from the pool are delivered back to the main thread
+        self.signals = ThumbnailSignals(self)
+        self.signals.finished.connect(self.image_ready)
+
+    def pixmap(self, path=None):
+        """
+        returns the cached pixmap for path or None if it still has to be loaded.
+        """
+        if path in self.cache:
+            # most recently used go to the end
+            pixmap = self.cache.pop(path)
+            self.cache[path] = pixmap
+            return pixmap
+
+        if path not in self.pending:
+            self.pending.add(path)
+            self.pool.start(ThumbnailTask(path, self.size, self.signals, self.directory))
+        return None
+
+    def invalidate(self, path=None):
+        self.cache.pop(path, None)
+
+    def image_ready(self, path=None, image=None):
+        self.pending.discard(path)
+        self.cache[path] = self.get_placeholder() if image.isNull() else QtGui.QPixmap.fromImage(image)
+        while len(self.cache) > ThumbnailLoader.CACHE_SIZE:
+            self.cache.popitem(last=False)
+        self.loaded.emit(path)
+
+    def get_placeholder(self):
+        # one pixmap shared by every entry that failed, made here since pixmaps belong to the main thread
+        if self.placeholder is None:
+            self.placeholder = QtGui.QPixmap(self.size, self.size)
+            self.placeholder.fill(QtGui.QColor(64, 64, 64))
+        return self.placeholder
+
+
+def thumbnail_cache_path(path=None, directory=None):
+    # keyed by path alone, a re-saved model replaces its thumbnail instead of leaving the old one behind
+    key = hashlib.sha1((u'%s' % path).encode('utf-8')).hexdigest()
+    return os.path.join(directory, key + '.png')
+
+
+def format_stats(stats=None):
+    lines = []
+    if stats.get('triangles') is not None:
+        lines.append('{0:,} tris, {1:,} verts, {2} materials'.format(stats['triangles'], stats['vertices'],
+                                                                     stats['materials']))
+    if stats.get('bbox'):
+        bbox = stats['bbox']
+        lines.append('%.2f x %.2f x %.2f' % (bbox[3] - bbox[0], bbox[4] - bbox[1], bbox[5] - bbox[2]))
+    if stats.get('file_size') is not None:
+        lines.append('%.1f MB' % (stats['file_size'] / float(1 << 20)))
+    if stats.get('saved_at') is not None:
+        lines.append('Saved ' + time.strftime('%Y-%m-%d %H:%M', time.localtime(stats['saved_at'])))
+    return '\n'.join(lines)
 
 
 class Model(object):
@@ -168,8 +525,15 @@ class Model(object):
     def __init__(self, **kwargs):
         # if not path or icon arg is given, use the default directory
         self.name = kwargs.get('name', 'model')
-        self.path = kwargs.get('path', os.path.join(DEFAULT_DIRECTORY, '%s.ma' % self.name))
-        self.icon = kwargs.get('icon', os.path.join(DEFAULT_DIRECTORY, '%s.jpg' % self.name))
+        self.path = kwargs.get('path') or library_path('%s.ma' % self.name)
+        self.icon = kwargs.get('icon') or library_path('%s.jpg' % self.name)
+        self.tags = modellibdb.normalize_tags(kwargs.get('tags'))
+        # hash of the file in the blob store, path is then the compressed blob
+        self.blob = kwargs.get('blob')
+        # see modellibdb.STATS, empty for models saved before stats were recorded
+        self.stats = kwargs.get('stats') or {}
+        # bumped on every change to the model, 0 for a model that is not in the library yet
+        self.version = kwargs.get('version', 0)
 
     def __eq__(self, other):
         # models are equal if they have the same name and path
@@ -178,94 +542,401 @@ class Model(object):
 
 class ModelLib(object):
     """
-    Holds members of model library as well as methods to manipulate it.
+    Holds members of model library as well as methods to manipulate it.  Membership is stored in a sqlite index
+    (see modellibdb.py), model_list is the in memory copy the gui works from.
     """
-    def __init__(self):
+    def __init__(self, use_blob_store=False):
         self.model_list = []
-
-    def create_directory(self, directory=DEFAULT_DIRECTORY):
+        self.index = None
+        # model name to the root of a copy already in the scene, see find_loaded
+        self.scene_cache = {}
+        # save models into the content addressed store rather than as a .ma each
+        self.use_blob_store = use_blob_store
+        self.blob_store = modellibdb.BlobStore(library_path(modellibdb.BLOB_DIRECTORY_NAME))
+        # name and tag search over model_list, built on the first search, with a name lookup for its results
+        self.search_index = None
+        self.model_map = {}
+        # what poll last saw of the index
+        self.data_version = None
+        self.change_id = 0
+
+    def create_directory(self, directory=None):
+        directory = directory or get_default_directory()
         if not os.path.exists(directory):
             os.mkdir(directory)
 
-    def create_icon(self, model=Model()):
-        pmc.viewFit()
+    def open_index(self):
+        # the library directory may not exist until the first save, open the index on first use
+        if self.index is None:
+            self.create_directory()
+            shared = SHARED_LIBRARY or get_default_directory().startswith('\\\\')
+            self.index = modellibdb.ModelLibIndex(library_path(modellibdb.DB_NAME), library_path(JSON_NAME), shared)
+        return self.index
+
+    def create_icon(self, model=None):
+        cmds.viewFit()
         # set img format as jpg
-        pmc.setAttr('defaultRenderGlobals.imageFormat', 8)
+        cmds.setAttr('defaultRenderGlobals.imageFormat', 8)
 
-        pmc.playblast(
+        cmds.playblast(
             completeFilename=model.icon, forceOverwrite=True, format='image', width=200, height=200,
             showOrnaments=False, startTime=1, endTime=1, viewer=False
         )
 
-    def save_model(self, model=Model(), icon=True, directory=DEFAULT_DIRECTORY):
+    def save_model(self, model=None, icon=True, directory=None):
+        """
+        exports the model into the library.  Raises modellibdb.ConflictError, leaving the library alone, if another
+        artist saved a model of the same name since model_list was last brought up to date, see poll.
+        """
         # create model library directory if it doesn't exist...
+        directory = directory or get_default_directory()
         self.create_directory(directory)
-
-        # if something is selected, export by selection...
-        if pmc.ls(sl=True):
-            pmc.exportSelected(model.path, force=1)
-        # otherwise export the whole scene...
-        else:
-            pmc.exportAll(model.path, force=1)
+        index = self.open_index()
+
+        # the version this artist has seen, or for a model model_list does not hold the version in the index now.
+        # Checked here to fail before the export and again under the library lock
+        current = self.model_map.get(model.name)
+        expected_version = current.version if current else index.version(model.name)
+        index.check_version(model.name, expected_version)
+
+        # export to a temp file on the same drive, nobody ever sees a half written model
+        blob = None
+        saving_directory = os.path.join(directory, modellibdb.SAVING_DIRECTORY_NAME)
+        modellibdb.make_directory(saving_directory)
+        handle, export_path = tempfile.mkstemp(suffix='.ma', dir=saving_directory)
+        os.close(handle)
+        try:
+            # measure while the model is in memory, nothing has to open the file later
+            selection = cmds.ls(sl=True)
+            stats = self.model_stats(selection)
+
+            # if something is selected, export by selection...
+            if selection:
+                cmds.file(export_path, exportSelected=True, force=True, type='mayaAscii')
+            # otherwise export the whole scene...
+            else:
+                cmds.file(export_path, exportAll=True, force=True, type='mayaAscii')
+
+            stats['file_size'] = os.path.getsize(export_path)
+            stats['saved_at'] = time.time()
+            model.stats = stats
+
+            # the store keeps a compressed copy under the file's hash, nothing is overwritten
+            if self.use_blob_store:
+                blob = self.blob_store.put(export_path)
+                model.path = self.blob_store.blob_path(blob.hash)
+                model.blob = blob.hash
+
+            with index.write():
+                index.check_version(model.name, expected_version)
+                if not self.use_blob_store:
+                    modellibdb.replace_file(export_path, model.path)
+                # add or update the model in the index, an overwritten model saved without tags keeps the ones it had
+                is_new = index.save(model.name, model.path, model.icon, model.tags or None, blob, model.stats)
+        finally:
+            if os.path.exists(export_path):
+                os.remove(export_path)
+        model.version = index.version(model.name)
 
         # generate model icon
         if icon:
             self.create_icon(model)
 
-        # append model to json
-        # check if the model already exists in the model_list
-        for item in self.model_list:
-            if item == model:
-                # model is already a member of model_list, do not append...
-                return
+        if not model.tags:
+            model.tags = index.tags(model.name)
+        if self.search_index is not None:
+            self.search_index.add(model.name, model.tags)
+        self.model_map[model.name] = model
 
-        # model is not member of model_list, append...
-        self.model_list.append(model)
+        # only a new model is appended to model_list
+        if is_new:
+            self.model_list.append(model)
+            return True
+        self.model_list[:] = [model if item.name == model.name else item for item in self.model_list]
+        return False
 
-        # update json with new members information...
-        with open(JSON_PATH, 'w') as f:
-            # TODO: create default method
-            json.dump([o.__dict__ for o in self.model_list], f, indent=4)
+    def model_stats(self, nodes=None):
+        """
+        polycount, bounding box and material count of the meshes under nodes, or of the whole scene if nodes is empty
+        """
+        if nodes:
+            meshes = cmds.ls(nodes, dag=True, type='mesh', noIntermediate=True, long=True)
+        else:
+            meshes = cmds.ls(type='mesh', noIntermediate=True, long=True)
+        if not meshes:
+            return {'triangles': 0, 'faces': 0, 'vertices': 0, 'bbox': None, 'materials': 0}
+
+        # ls with an empty list would list every material in the scene
+        materials = []
+        shading_groups = list(set(cmds.listConnections(meshes, type='shadingEngine') or []))
+        inputs = cmds.listConnections(shading_groups, source=True, destination=False) if shading_groups else None
+        if inputs:
+            materials = set(cmds.ls(inputs, materials=True))
+        return {
+            'triangles': cmds.polyEvaluate(meshes, triangle=True),
+            'faces': cmds.polyEvaluate(meshes, face=True),
+            'vertices': cmds.polyEvaluate(meshes, vertex=True),
+            'bbox': cmds.exactWorldBoundingBox(meshes),
+            'materials': len(materials),
+        }
+
+    def tag_model(self, model=None, tags=None):
+        """
+        replaces the model's tags.
+        """
+        self.open_index().set_tags(model.name, tags)
+        model.tags = modellibdb.normalize_tags(tags)
+        model.version = self.open_index().version(model.name)
+        if self.search_index is not None:
+            self.search_index.add(model.name, model.tags)
+
+    def delete_model(self, model=None):
+        # update the index first, a delete that fails on the lock leaves model_list as it was
+        self.open_index().remove(model.name)
 
-    def delete_model(self, model=Model()):
         # delete the instance from list
+        self.forget_model(model)
+        print 'Removed from model list:', model.name
+
+    def forget_model(self, model=None):
         self.model_list.remove(model)
+        if self.search_index is not None:
+            self.search_index.remove(model.name)
+        self.model_map.pop(model.name, None)
+
+    def poll(self):
+        """
+        brings model_list up to date with the changes other artists made to the library.  Returns a list of (action,
+        model, row) with action 'added', 'changed' or 'removed' and row the model's place in model_list, or None if the
+        change log did not go back far enough and model_list was regenerated instead.  Costs a single pragma when
+        nothing changed.
+        """
+        index = self.open_index()
+        data_version = index.data_version()
+        if data_version == self.data_version:
+            return []
+        self.data_version = data_version
+        self.change_id, names = index.changes_since(self.change_id)
+        if names is None:
+            self.model_list = []
+            self.generate_model_list()
+            return None
+
+        changes = []
+        # the log holds our own changes as well, versions tell which ones model_list already has
+        for name in collections.OrderedDict.fromkeys(names):
+            row = index.get(name)
+            current = self.model_map.get(name)
+            if row is None:
+                if current is not None:
+                    changes.append(('removed', current, self.model_list.index(current)))
+                    self.forget_model(current)
+            elif current is None or row['version'] != current.version:
+                model = self.model_from_row(row, index.tags(name))
+                if current is None:
+                    self.model_list.append(model)
+                    changes.append(('added', model, len(self.model_list) - 1))
+                else:
+                    row_index = self.model_list.index(current)
+                    self.model_list[row_index] = model
+                    changes.append(('changed', model, row_index))
+                self.model_map[name] = model
+                if self.search_index is not None:
+                    self.search_index.add(name, model.tags)
+        return changes
+
+    def search(self, text='', tags=None):
+        """
+        returns the models whose name or tags contain every word of text, that have every tag and pass every filter,
+        in library order.  text may name tags (#prop) and filters (tris<10000) itself, see modellibdb.parse_query and
+        modellibdb.SearchIndex.
+        """
+        text, query_tags, filters = modellibdb.parse_query(text)
+        tags = list(tags or []) + query_tags
+        if not text and not tags:
+            models = self.model_list
+        else:
+            if self.search_index is None:
+                self.search_index = modellibdb.SearchIndex()
+                self.search_index.extend((model.name, model.tags) for model in self.model_list)
+            models = [self.model_map[name] for name in self.search_index.search(text, tags)]
+        # the stats are in memory, filtering never opens a file
+        return [model for model in models if modellibdb.passes(model.stats, filters)]
+
+    def sort_models(self, models=None, sort='Added'):
+        """
+        sorts models in place in one of SORT_ORDERS, models saved without stats go last
+        """
+        if sort == 'Name':
+            models.sort(key=lambda model: model.name.lower())
+        elif sort != 'Added':
+            stat, sign = SORT_STATS[sort]
+            models.sort(key=lambda model: (model.stats.get(stat) is None, sign * (model.stats.get(stat) or 0)))
+
+    def reconcile(self, adopt_orphans=False):
+        """
+        brings the index in line with the library directory in one scan and one write, see ModelLibIndex.reconcile,
+        then regenerates the model list.  Does not need the gui.
+        """
+        removed, added = self.open_index().reconcile(get_default_directory(), adopt_orphans)
+        self.model_list = []
+        self.generate_model_list()
+        return removed, added
+
+    def collect_garbage(self, min_age=3600):
+        """
+        removes blobs no model references any more, see ModelLibIndex.collect_garbage.
+        """
+        return self.open_index().collect_garbage(self.blob_store, min_age)
+
+    def blob_stats(self):
+        return self.open_index().blob_stats()
+
+    def model_from_row(self, row=None, tags=None):
+        return Model(name=row['name'], path=row['path'], icon=row['icon'], tags=tags, blob=row['blob'],
+                     stats=modellibdb.decode_stats(row), version=row['version'])
+
+    def load_model(self, model=None, mode='Import'):
+        """
+        brings the model into maya in one of LOAD_MODES and returns its root node, the reference node for Reference
+        """
+        # check if model is member of library, check if present in path
+        if not (self.open_index().contains(model.name, model.path) and os.path.exists(model.path)):
+            cmds.warning('Model is not a member of model list...')
+            return None
+
+        if mode in ('Instance', 'Duplicate'):
+            # only the first load of a model reads the file
+            root = self.find_loaded(model)
+            if root is not None:
+                copy = cmds.instance(root)[0] if mode == 'Instance' else cmds.duplicate(root)[0]
+                cmds.select(copy)
+                return copy
+        elif mode == 'Reference':
+            # a referenced blob has to stay where it is, a temp copy would not do
+            if model.blob:
+                path = self.blob_store.get(model.blob, library_path(BLOB_FILE_DIRECTORY_NAME))
+            else:
+                path = model.path
+            return cmds.referenceQuery(cmds.file(path, reference=True, namespace=model.name), referenceNode=True)
+        elif mode == 'Proxy':
+            return self.create_proxy(model)
 
-        # print new list
-        for i in self.model_list:
-            print 'Updated model list:', i.name
+        root = self.import_model(model)
+        cmds.select(root)
+        return root
 
-        # update the json
-        with open(JSON_PATH, 'w') as f:
-            json.dump([o.__dict__ for o in self.model_list], f, indent=4)
+    def import_model(self, model=None):
+        """
+        imports the model, groups it under a single root if it has several and tags the root with the model name
+        """
+        # a model in the blob store is imported from a decompressed copy
+        path = self.blob_store.get(model.blob) if model.blob else model.path
+        nodes = cmds.file(path, i=True, returnNewNodes=True)
+        roots = cmds.ls(nodes, assemblies=True, long=True) if nodes else []
+        if len(roots) == 1:
+            root = roots[0]
+        else:
+            root = cmds.ls(cmds.group(roots, name=model.name), long=True)[0]
+        self.tag_root(root, model)
+        # uuids survive renames and reparenting
+        self.scene_cache[model.name] = cmds.ls(root, uuid=True)[0]
+        return root
 
-    def load_model(self, model=Model()):
+    def create_proxy(self, model=None):
         """
-        imports the model into maya using the model's path attribute
+        a wireframe box where the model's bounding box will be, or a locator for models saved without stats.  Moving
+        the proxy moves the model it is swapped for by as much.
         """
-        # check if model is member of list, check if present in path
-        if model in self.model_list and os.path.exists(model.path):
-            pmc.importFile(model.path)
+        bbox = model.stats.get('bbox')
+        if bbox:
+            # zero sized sides make a degenerate cube, flat models get a thin one
+            size = [max(bbox[i + 3] - bbox[i], 0.001) for i in xrange(3)]
+            proxy = cmds.polyCube(name='%s_proxy' % model.name, width=size[0], height=size[1], depth=size[2],
+                                  constructionHistory=False)[0]
+            # the pivot stays at the origin, like the model's
+            center = [(bbox[i] + bbox[i + 3]) / 2.0 for i in xrange(3)]
+            cmds.move(center[0], center[1], center[2], proxy + '.vtx[*]', relative=True)
+            shape = cmds.listRelatives(proxy, shapes=True, fullPath=True)[0]
+            cmds.setAttr(shape + '.overrideEnabled', True)
+            cmds.setAttr(shape + '.overrideShading', False)
         else:
-            pmc.displayWarning('Model is not a member of model list...')
+            proxy = cmds.spaceLocator(name='%s_proxy' % model.name)[0]
+        self.tag_root(proxy, model)
+        cmds.addAttr(proxy, longName=PROXY_ATTR, attributeType='bool', defaultValue=True)
+        cmds.select(proxy)
+        return proxy
+
+    def tag_root(self, root=None, model=None):
+        if not cmds.attributeQuery(NAME_ATTR, node=root, exists=True):
+            cmds.addAttr(root, longName=NAME_ATTR, dataType='string')
+        cmds.setAttr('%s.%s' % (root, NAME_ATTR), model.name, type='string')
+
+    def find_loaded(self, model=None):
+        """
+        returns the root of a copy of model already in the scene, or None.  The cache is rebuilt from the tagged roots
+        in the scene when the cached node is gone, e.g. after a new scene was opened.
+        """
+        uuid = self.scene_cache.get(model.name)
+        roots = cmds.ls(uuid, long=True) if uuid else None
+        if roots:
+            return roots[0]
+
+        self.scene_cache = {}
+        for node in cmds.ls('*.%s' % NAME_ATTR, recursive=True, objectsOnly=True, long=True) or []:
+            if not cmds.attributeQuery(PROXY_ATTR, node=node, exists=True):
+                self.scene_cache.setdefault(cmds.getAttr('%s.%s' % (node, NAME_ATTR)), cmds.ls(node, uuid=True)[0])
+        uuid = self.scene_cache.get(model.name)
+        return cmds.ls(uuid, long=True)[0] if uuid else None
+
+    def swap_proxies(self, proxies=None):
+        """
+        replaces each proxy with the full model, instanced from a copy already in the scene when there is one.
+        Returns the new roots.
+        """
+        roots = []
+        for proxy in proxies:
+            model = self.model_map.get(cmds.getAttr('%s.%s' % (proxy, NAME_ATTR)))
+            if model is None:
+                cmds.warning('%s is not a proxy of a model in the library.' % proxy)
+                continue
+            root = self.load_model(model, 'Instance')
+            if root is None:
+                continue
+            # the proxy is an offset from where the model was saved
+            matrix = om.MMatrix(cmds.xform(root, query=True, worldSpace=True, matrix=True)) * \
+                om.MMatrix(cmds.xform(proxy, query=True, worldSpace=True, matrix=True))
+            parent = cmds.listRelatives(proxy, parent=True, fullPath=True)
+            if parent:
+                # parent hands back a short name, the uuid finds the full path again
+                uuid = cmds.ls(root, uuid=True)[0]
+                cmds.parent(root, parent[0])
+                root = cmds.ls(uuid, long=True)[0]
+            cmds.xform(root, worldSpace=True, matrix=list(matrix))
+            cmds.delete(proxy)
+            roots.append(root)
+        cmds.select(roots)
+        return roots
 
     def generate_model_list(self):
-        # check if the json even exists...
-        if not os.path.exists(JSON_PATH):
-            return
+        # changes from here on are picked up by poll, one that lands while reading is applied twice, which is harmless
+        index = self.open_index()
+        self.data_version = index.data_version()
+        self.change_id = index.last_change()
 
-        # read json and populate self.model_list
-        with open(JSON_PATH, 'r') as f:
-            data = json.load(f)
+        # read the index and populate self.model_list
+        tags = index.all_tags()
+        for row in index.all():
+            self.model_list.append(self.model_from_row(row, tags[row['name']]))
 
-        for item in data:
-            model_name, path, icon = map(item.get, ('name', 'path', 'icon'))
-            self.model_list.append(Model(name=model_name, path=path, icon=icon))
+        # the search index is rebuilt on the next search
+        self.search_index = None
+        self.model_map = dict((model.name, model) for model in self.model_list)
 
 
 def showUI():
-    if pmc.window(UNIQUE_HANDLE, exists=True):
-        pmc.deleteUI(UNIQUE_HANDLE, wnd=True)
+    if cmds.window(UNIQUE_HANDLE, exists=True):
+        cmds.deleteUI(UNIQUE_HANDLE, wnd=True)
     ui = ModelLibUI()
     ui.show()
     return ui
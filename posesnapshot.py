@@ -0,0 +1,148 @@
+"""
+Pose snapshots for Zero Anim Controls, the values of a set of plugs kept in one array('d') with an index of plug names.
+This module does not need Maya.  Diffs import numpy the first time they run and fall back to plain python without it,
+so importing this module stays cheap.
+
+A .pose file is a fixed size header, the plug names as newline separated utf-8 and the values as little-endian float64
+starting on an 8 byte boundary:
+
+    magic       4s      'POSE'
+    version     uint16
+    flags       uint16  reserved
+    plug_count  uint32
+    names_size  uint32  bytes of plug names
+
+    pose = posesnapshot.read('/path/to/idle.pose')
+    print pose.diff(other)
+"""
+
+import array
+import struct
+import sys
+
+EXTENSION = '.pose'
+MAGIC = b'POSE'
+VERSION = 1
+HEADER = struct.Struct('<4sHHII')
+ALIGNMENT = 8
+# numpy once get_numpy has looked for it, None if it could not be imported
+np = False
+
+
+class PoseError(Exception):
+    pass
+
+
+def align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def get_numpy():
+    global np
+    if np is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        np = numpy
+    return np
+
+
+class PoseSnapshot(object):
+    """
+    Values of plugs, values[i] belongs to plugs[i].  Plug names are stored as given, Zero Anim Controls stores them
+    without namespaces so a pose applies to every copy of a rig.
+    """
+    def __init__(self, plugs=None, values=None):
+        self.plugs = list(plugs or [])
+        self.values = values if isinstance(values, array.array) else array.array('d', values or [])
+        if len(self.plugs) != len(self.values):
+            raise ValueError('%d plugs but %d values.' % (len(self.plugs), len(self.values)))
+        self._index = None
+
+    def __len__(self):
+        return len(self.plugs)
+
+    @property
+    def index(self):
+        # built on first use, restores of a whole pose never need it
+        if self._index is None:
+            self._index = dict((plug, i) for i, plug in enumerate(self.plugs))
+        return self._index
+
+    def get(self, plug=None, default=None):
+        i = self.index.get(plug)
+        return default if i is None else self.values[i]
+
+    def as_dict(self):
+        return dict(zip(self.plugs, self.values))
+
+    def diff(self, other=None, tolerance=1e-6):
+        """
+        returns the plugs of other, in other's order, that differ from this snapshot by more than tolerance or that
+        this snapshot does not have
+        """
+        if not self.plugs:
+            return list(other.plugs)
+        if not other.plugs:
+            return []
+
+        # snapshots of the same controls line up, the index is only needed when they do not
+        same = self.plugs == other.plugs
+        positions = None if same else [self.index.get(plug, -1) for plug in other.plugs]
+
+        numpy = get_numpy()
+        if numpy is not None:
+            values = numpy.frombuffer(self.values, dtype=numpy.float64)
+            other_values = numpy.frombuffer(other.values, dtype=numpy.float64)
+            if same:
+                changed = numpy.abs(values - other_values) > tolerance
+            else:
+                positions = numpy.array(positions, dtype=numpy.intp)
+                changed = (positions < 0) | (numpy.abs(values[numpy.maximum(positions, 0)] - other_values) > tolerance)
+            return [other.plugs[i] for i in numpy.flatnonzero(changed)]
+
+        if same:
+            positions = range(len(other.plugs))
+        return [plug for plug, position, value in zip(other.plugs, positions, other.values)
+                if position < 0 or abs(self.values[position] - value) > tolerance]
+
+    def write(self, path=None):
+        names = '\n'.join(self.plugs).encode('utf-8')
+        values = array.array('d', self.values)
+        if sys.byteorder == 'big':
+            values.byteswap()
+
+        # no flags are defined yet, the field is reserved
+        flags = 0
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, flags, len(self.plugs), len(names)))
+            f.write(names)
+            f.write(b'\0' * (align(HEADER.size + len(names)) - HEADER.size - len(names)))
+            values.tofile(f)
+        return path
+
+
+def read(path=None):
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    if len(data) < HEADER.size:
+        raise PoseError('%s is too small to be a pose.' % path)
+    magic, version, flags, plug_count, names_size = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise PoseError('%s is not a version %d pose.' % (path, VERSION))
+    offset = align(HEADER.size + names_size)
+    if len(data) < offset + plug_count * 8:
+        raise PoseError('%s is truncated.' % path)
+
+    plugs = data[HEADER.size:HEADER.size + names_size].decode('utf-8').split('\n') if plug_count else []
+    values = array.array('d')
+    if hasattr(values, 'frombytes'):
+        values.frombytes(data[offset:offset + plug_count * 8])
+    else:
+        # python 2
+        values.fromstring(data[offset:offset + plug_count * 8])
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return PoseSnapshot(plugs, values)
@@ -1,14 +1,29 @@
 """
 This is a simple renaming tool.  It has find and replace functionality as well as ability to add prefix and suffixes
 User must select nodes in the scene to apply functionality.
+
+Renames are planned before anything is touched, see RenamePlan.  Only the name after the namespace is changed.  Names
+that would clash with another node, or are not valid Maya names, are skipped with a warning instead of being numbered
+by Maya.  The rest are applied children first, swaps go through temporary names, and the whole rename is one undo.
 """
 
 import maya.OpenMayaUI as omui
+import maya.api.OpenMaya as om
 import maya.cmds as cmds
+import collections
+import contextlib
+import re
 from PySide import QtGui, QtCore
 from shiboken import wrapInstance
 
 UNIQUE_HANDLE = 'RenameMasterWindow'
+UNDO_CHUNK = 'renameMaster'
+VALID_NAME = re.compile(r'[A-Za-z_][A-Za-z0-9_]*$')
+TEMP_NAME = 'renameMasterTemp%d'
+
+# path is the node's long name when planned, scope the long name of its parent, '' for the world and None for nodes
+# outside the dag, name and target are the name after the path's last | including the namespace
+RenameEntry = collections.namedtuple('RenameEntry', 'uuid path scope name target')
 
 
 def get_maya_main_window():
@@ -17,7 +32,10 @@ def get_maya_main_window():
 
 
 class RenameMasterUI(QtGui.QDialog):
-    def __init__(self, parent=get_maya_main_window(), unique_handle=UNIQUE_HANDLE):
+    def __init__(self, parent=None, unique_handle=UNIQUE_HANDLE):
+        # looked up here rather than as the default value, which would run when the module is imported
+        if parent is None:
+            parent = get_maya_main_window()
         QtGui.QDialog.__init__(self, parent)
         self.setWindowTitle('Rename Master')
         self.setObjectName(unique_handle)
@@ -112,26 +130,227 @@ class RenameMaster(object):
             return
 
         if selection:
-            for sel in selection:
-                new_name = sel.replace(find_str, replace_str)
-                cmds.rename(sel, new_name)
+            return self.rename(selection, lambda name: name.replace(find_str, replace_str))
         else:
             cmds.warning(self.no_selection_warning)
 
     def add_prefix(self, selection=None, prefix_str=None):
         if selection:
-            for sel in selection:
-                cmds.rename(sel, prefix_str + sel)
+            return self.rename(selection, lambda name: prefix_str + name)
         else:
             cmds.warning(self.no_selection_warning)
 
     def add_suffix(self, selection=None, suffix_str=None):
         if selection:
-            for sel in selection:
-                cmds.rename(sel, sel + suffix_str)
+            return self.rename(selection, lambda name: name + suffix_str)
         else:
             cmds.warning(self.no_selection_warning)
 
+    def rename(self, selection=None, rename=None):
+        plan = RenamePlan(selection, rename)
+        for skipped, reason in ((plan.invalid, 'new names are not valid'), (plan.collisions, 'new names would clash'),
+                                (plan.locked, 'names are locked or referenced')):
+            if skipped:
+                cmds.warning('Skipped %d nodes whose %s: %s' % (
+                    len(skipped), reason, ', '.join(entry.target for entry in skipped[:5])))
+        plan.apply()
+        return plan
+
+
+class RenamePlan(object):
+    """
+    Works out every new name in memory before renaming anything.  Nodes are resolved by uuid, so the plan does not
+    depend on names that change while it is applied.  rename is given the name without its namespace and returns the
+    new one.
+
+    Collisions are found with one count of the names in the scene: dag nodes can not share a name with a sibling or a
+    node outside the dag, nodes outside the dag can not share a name with any node.  The names the planned nodes give
+    up are free for the others to take, a node whose rename is skipped keeps its name and that can make others clash,
+    so the check runs until nothing more is skipped.
+    """
+    def __init__(self, nodes=None, rename=None):
+        self.entries = []
+        self.collisions = []
+        self.invalid = []
+        self.locked = []
+        self.names = collections.Counter()
+        self.temp_count = 0
+        if nodes:
+            self.plan(nodes, rename)
+
+    def plan(self, nodes=None, rename=None):
+        paths = cmds.ls(nodes, long=True)
+        if not paths:
+            return
+        # rename fails on these, referenced and default nodes are read only
+        locked = set(cmds.ls(paths, readOnly=True, long=True))
+        entries = []
+        seen = set()
+        for uuid, path, fn in read_nodes(paths):
+            # an instance is renamed once, whichever path was selected
+            if uuid in seen:
+                continue
+            seen.add(uuid)
+            scope, name = split_path(path)
+            namespace, _, base = name.rpartition(':')
+            target = rename(base)
+            if target == base:
+                continue
+            if not VALID_NAME.match(target):
+                self.invalid.append(RenameEntry(uuid, path, scope, name, target))
+                continue
+            if path in locked or fn.isLocked:
+                self.locked.append(RenameEntry(uuid, path, scope, name, target))
+                continue
+            if namespace:
+                target = '%s:%s' % (namespace, target)
+            entries.append(RenameEntry(uuid, path, scope, name, target))
+
+        # how many nodes hold each name key, with the planned names in place of the current ones
+        self.names = name_counts(cmds.ls(long=True))
+        for entry in entries:
+            self.move(entry, entry.name, entry.target)
+        while True:
+            collisions = [entry for entry in entries if self.clashes(entry)]
+            if not collisions:
+                break
+            for entry in collisions:
+                self.move(entry, entry.target, entry.name)
+            skipped = set(id(entry) for entry in collisions)
+            entries = [entry for entry in entries if id(entry) not in skipped]
+            self.collisions.extend(collisions)
+        self.entries = entries
+
+    def move(self, entry=None, old=None, new=None):
+        for key in name_keys(entry.scope, old):
+            self.names[key] -= 1
+        for key in name_keys(entry.scope, new):
+            self.names[key] += 1
+
+    def clashes(self, entry=None):
+        name = entry.target
+        if entry.scope is None:
+            return self.names[('dg', name)] > 1 or self.names[('leaf', name)] > 0
+        return self.names[('dag', entry.scope, name)] > 1 or self.names[('dg', name)] > 0
+
+    def apply(self):
+        """
+        renames the planned nodes in one undo chunk and returns how many Maya renamed differently than planned,
+        0 unless the scene changed since the plan was made.  Paths are resolved from the uuids once and then followed
+        in memory, children go first so the paths of the nodes still to rename stay valid.  A node whose current name
+        is the target of another is moved out of the way to a temporary name first.
+        """
+        if not self.entries:
+            return 0
+        current = resolve_uuids([entry.uuid for entry in self.entries])
+        # entries whose node is gone are dropped, the others may have moved since the plan was made
+        entries = []
+        for entry in self.entries:
+            if entry.uuid in current:
+                scope, name = split_path(current[entry.uuid])
+                entries.append(entry._replace(path=current[entry.uuid], scope=scope, name=name))
+        entries.sort(key=lambda entry: -entry.path.count('|'))
+
+        # a dag and a dg node can not swap names either, so any target counts whatever its scope
+        targets = set(entry.target for entry in entries)
+        parents = set(entry.scope for entry in entries)
+        renamed = {}
+        mismatches = 0
+        with undo_chunk(UNDO_CHUNK):
+            for entry in entries:
+                if entry.name in targets:
+                    renamed[entry.path] = self.rename_node(entry, renamed, self.temp_name(entry), parents)
+            for entry in entries:
+                new_name = self.rename_node(entry, renamed, entry.target, parents)
+                renamed[entry.path] = new_name
+                mismatches += new_name != entry.target
+        return mismatches
+
+    def temp_name(self, entry=None):
+        # the count only goes up, so no two nodes are given the same temporary name
+        namespace = entry.name.rpartition(':')[0]
+        while True:
+            name = TEMP_NAME % self.temp_count
+            name = '%s:%s' % (namespace, name) if namespace else name
+            self.temp_count += 1
+            if not any(self.names[key] for key in (('dag', entry.scope, name), ('leaf', name), ('dg', name))):
+                return name
+
+    def rename_node(self, entry=None, renamed=None, name=None, parents=None):
+        # shapes that are part of the plan are renamed by it, not along with their transform
+        new_path = cmds.rename(follow_path(entry.path, renamed), name, ignoreShape=entry.path in parents)
+        return new_path.rpartition('|')[2]
+
+
+def name_counts(paths=None):
+    names = collections.Counter()
+    for path in paths:
+        for key in name_keys(*split_path(path)):
+            names[key] += 1
+    return names
+
+
+def split_path(path=None):
+    # returns (scope, name), see RenameEntry
+    if '|' not in path:
+        return None, path
+    scope, _, name = path.rpartition('|')
+    return scope, name
+
+
+def name_keys(scope=None, name=None):
+    # leaf counts dag names for the nodes outside the dag, which can not take any of them
+    if scope is None:
+        return (('dg', name),)
+    return ('dag', scope, name), ('leaf', name)
+
+
+def follow_path(path=None, renamed=None):
+    """
+    returns the path of a node after the renames so far, renamed maps planned paths to their new names
+    """
+    if '|' not in path:
+        return renamed.get(path, path)
+    parts = []
+    prefix = ''
+    for part in path.split('|')[1:]:
+        prefix += '|' + part
+        parts.append(renamed.get(prefix, part))
+    return '|' + '|'.join(parts)
+
+
+def read_nodes(paths=None):
+    """
+    yields (uuid, long name, MFnDependencyNode) for the nodes at paths.  All of them go in one selection list and the
+    uuid and name are both read off the same entry, so nothing depends on the order commands hand lists back in.
+    """
+    selection = om.MSelectionList()
+    for path in paths:
+        selection.add(path)
+    for i in xrange(selection.length()):
+        node = selection.getDependNode(i)
+        fn = om.MFnDependencyNode(node)
+        path = selection.getDagPath(i).fullPathName() if node.hasFn(om.MFn.kDagNode) else fn.name()
+        yield fn.uuid().asString(), path, fn
+
+
+def resolve_uuids(uuids=None):
+    # one ls for all of them, nodes that are gone are left out and an instance keeps the first of its paths
+    paths = {}
+    if uuids:
+        for uuid, path, fn in read_nodes(cmds.ls(uuids, long=True)):
+            paths.setdefault(uuid, path)
+    return paths
+
+
+@contextlib.contextmanager
+def undo_chunk(name=None):
+    cmds.undoInfo(openChunk=True, chunkName=name)
+    try:
+        yield
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
 
 def showUI():
     if cmds.window(UNIQUE_HANDLE, exists=True):
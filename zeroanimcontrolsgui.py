@@ -2,15 +2,92 @@
 This script will zero out all the animation controls in a rig.  Includes FK/IK abd user defined controls with unique
 names.  Values of 0 and 1 are considered default and ignored.  Scale attributes are set back to 1.  Reset controls by
 inputting prefix(es) or reset by the manual selection of controls within rig.
+
+Controls are read in one pass through the API, the new values are worked out in memory and only the attributes that
+change are set, all in one undo chunk so a single undo puts the whole rig back.
+
+With Use rig defaults checked controls go back to their rig's defaults instead: the default value of each attribute,
+or the pose stored with Store Defaults.  Defaults are kept in a json profile per rig asset under the user app
+directory, keyed by the referenced rig file, and a control's defaults are captured again whenever its attributes
+change.
+
+Prefix resets look controls up in a ControlIndex instead of scanning the scene.  The index is built on first use and
+kept up to date by node added, removed and renamed callbacks, file operations drop it to be built again.
+
+Reset rigs resets the controls matching the prefixes in every rig listed, by namespace or reference node, wildcards
+allowed.  Rigs are reset a few at a time between redraws with a progress bar and timings per rig in the script editor.
+The whole bulk reset is one undo chunk.  Pause viewport suspends drawing while it runs.
+
+Every frame keys the reset pose on each frame of the range and Existing keys moves the keys already in the range to
+it, attributes without animation are simply set.  Keys are written with one setKeyframe or keyframe call per value
+rather than by stepping through time.
+
+Save Pose snapshots the controls into the pose library, a folder of small binary files described in posesnapshot.py.
+Restore Pose compares the controls with a saved pose and only sets the attributes that differ.
 """
 
 import maya.OpenMayaUI as omui
+import maya.api.OpenMaya as om
 import maya.cmds as cmds
+import collections
+import contextlib
+import fnmatch
+import hashlib
+import json
+import os
+import re
 import sys
+import time
+import posesnapshot
 from PySide import QtGui, QtCore
 from shiboken import wrapInstance
 
 UNIQUE_HANDLE = 'ZeroAnimControlsWindow'
+UNDO_CHUNK = 'zeroAnimControls'
+# seconds of bulk resetting between redraws
+BULK_SLICE = 0.1
+RESET_MODES = ('Current frame', 'Every frame', 'Existing keys')
+# anything in a pose name that could not be part of a file name, or would lead out of the pose directory
+POSE_NAME_INVALID = re.compile(r'[^\w\-]+', re.UNICODE)
+# resolved on first use, see get_profile_directory and get_pose_directory
+PROFILE_DIRECTORY = None
+POSE_DIRECTORY = None
+# shared by every ZeroAnimControls, see get_control_index.  reload() runs this again in the same module dict, the index
+# the previous run left behind is closed first so its callbacks do not pile up
+if globals().get('CONTROL_INDEX') is not None:
+    CONTROL_INDEX.close()
+CONTROL_INDEX = None
+# get_controls_prefix lists exactly these types, not their derived types
+CONTROL_TYPES = (om.MFn.kTransform, om.MFn.kJoint)
+# scene operations that bring in or take out many nodes at once, the index is built again afterwards
+RESET_MESSAGES = ('kBeforeNew', 'kBeforeOpen', 'kBeforeImport', 'kBeforeCreateReference', 'kBeforeLoadReference',
+                  'kBeforeUnloadReference', 'kBeforeRemoveReference')
+
+# plug is the name setAttr takes, value and default are in ui units, like getAttr returns them.  parent is the compound
+# plug, translate for translateX, when all of its children can be set at once, siblings then follow each other in
+# order.  animated is True when an anim curve drives the plug
+PlugState = collections.namedtuple('PlugState', 'control plug attribute value default parent animated')
+
+
+def get_control_index():
+    global CONTROL_INDEX
+    if CONTROL_INDEX is None:
+        CONTROL_INDEX = ControlIndex()
+    return CONTROL_INDEX
+
+
+def get_profile_directory():
+    global PROFILE_DIRECTORY
+    if PROFILE_DIRECTORY is None:
+        PROFILE_DIRECTORY = os.path.join(cmds.internalVar(userAppDir=True), 'zeroAnimProfiles')
+    return PROFILE_DIRECTORY
+
+
+def get_pose_directory():
+    global POSE_DIRECTORY
+    if POSE_DIRECTORY is None:
+        POSE_DIRECTORY = os.path.join(cmds.internalVar(userAppDir=True), 'zeroAnimPoses')
+    return POSE_DIRECTORY
 
 
 def get_maya_main_window():
@@ -19,22 +96,34 @@ def get_maya_main_window():
 
 
 class ZeroAnimControlsUI(QtGui.QDialog):
-    def __init__(self, parent=get_maya_main_window(), unique_handle=UNIQUE_HANDLE):
+    def __init__(self, parent=None, unique_handle=UNIQUE_HANDLE):
+        # looked up here rather than as the default value, which would run when the module is imported
+        if parent is None:
+            parent = get_maya_main_window()
         QtGui.QDialog.__init__(self, parent)
         self.setWindowTitle('Reset Animation Controls')
         self.setObjectName(unique_handle)
-        self.setMinimumSize(450, 200)
-        self.setMaximumSize(450, 200)
+        self.setMinimumSize(450, 290)
+        self.setMaximumSize(450, 290)
 
         self.create_controls()
         self.create_layout()
         self.create_connections()
         self.zero_anim = ZeroAnimControls()
 
+        # the bulk reset running, see start_bulk_reset
+        self.bulk_reset = None
+        self.bulk_timings = []
+        self.close_when_done = False
+        self.bulk_timer = QtCore.QTimer(self)
+        self.bulk_timer.timeout.connect(self.bulk_step_cmd)
+        self.progress = None
+
     def create_controls(self):
         # option widgets
         self.by_prefix_radio_btn = QtGui.QRadioButton('Reset by prefix')
         self.by_selection_radio_btn = QtGui.QRadioButton('Reset by selection')
+        self.by_rigs_radio_btn = QtGui.QRadioButton('Reset rigs')
         self.by_selection_radio_btn.setChecked(True)
 
         # prefix widgets
@@ -47,6 +136,33 @@ class ZeroAnimControlsUI(QtGui.QDialog):
         #@jmendiola
         # self.select_prefix_btn = QtGui.QPushButton('Select')
 
+        # rig widgets
+        self.rigs_lbl = QtGui.QLabel('Rigs:')
+        self.rigs_lbl.setMinimumWidth(75)
+        self.rigs_lbl.setAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+        self.rigs_line_edit = QtGui.QLineEdit()
+        self.rigs_line_edit.setPlaceholderText('namespaces or reference nodes: crowd*, heroRN')
+        self.rigs_line_edit.setEnabled(False)
+
+        # profile widgets
+        self.use_defaults_chk = QtGui.QCheckBox('Use rig defaults')
+        self.pause_viewport_chk = QtGui.QCheckBox('Pause viewport')
+        self.store_btn = QtGui.QPushButton('Store Defaults')
+
+        # pose widgets
+        self.save_pose_btn = QtGui.QPushButton('Save Pose')
+        self.restore_pose_btn = QtGui.QPushButton('Restore Pose')
+
+        # range widgets, the playback range when the window opens
+        self.mode_box = QtGui.QComboBox()
+        self.mode_box.addItems(RESET_MODES)
+        self.start_spin = QtGui.QSpinBox()
+        self.end_spin = QtGui.QSpinBox()
+        for spin, flag in ((self.start_spin, 'minTime'), (self.end_spin, 'maxTime')):
+            spin.setRange(-1000000, 1000000)
+            spin.setValue(int(cmds.playbackOptions(query=True, **{flag: True})))
+            spin.setEnabled(False)
+
         # reset widgets
         self.reset_btn = QtGui.QPushButton('Reset Anim Controls')
         self.apply_btn = QtGui.QPushButton('Apply')
@@ -60,6 +176,7 @@ class ZeroAnimControlsUI(QtGui.QDialog):
         option_layout.setContentsMargins(*self.default_margins)
         option_layout.addWidget(self.by_prefix_radio_btn)
         option_layout.addWidget(self.by_selection_radio_btn)
+        option_layout.addWidget(self.by_rigs_radio_btn)
         option_layout.addSpacerItem(QtGui.QSpacerItem(100, 0))
 
         # prefix layout
@@ -70,6 +187,37 @@ class ZeroAnimControlsUI(QtGui.QDialog):
         #@jmendiola
         # prefix_layout.addWidget(self.select_prefix_btn)
 
+        # rig layout
+        rigs_layout = QtGui.QHBoxLayout()
+        rigs_layout.setContentsMargins(*self.default_margins)
+        rigs_layout.addWidget(self.rigs_lbl)
+        rigs_layout.addWidget(self.rigs_line_edit)
+
+        # profile layout
+        profile_layout = QtGui.QHBoxLayout()
+        profile_layout.setContentsMargins(*self.default_margins)
+        profile_layout.addWidget(self.use_defaults_chk)
+        profile_layout.addWidget(self.pause_viewport_chk)
+        profile_layout.addStretch(1)
+        profile_layout.addWidget(self.store_btn)
+
+        # range layout
+        range_layout = QtGui.QHBoxLayout()
+        range_layout.setContentsMargins(*self.default_margins)
+        range_layout.addWidget(self.mode_box)
+        range_layout.addStretch(1)
+        range_layout.addWidget(QtGui.QLabel('Start:'))
+        range_layout.addWidget(self.start_spin)
+        range_layout.addWidget(QtGui.QLabel('End:'))
+        range_layout.addWidget(self.end_spin)
+
+        # pose layout
+        pose_layout = QtGui.QHBoxLayout()
+        pose_layout.setContentsMargins(*self.default_margins)
+        pose_layout.addStretch(1)
+        pose_layout.addWidget(self.save_pose_btn)
+        pose_layout.addWidget(self.restore_pose_btn)
+
         # button layout
         button_layout = QtGui.QHBoxLayout()
         button_layout.setContentsMargins(*self.default_margins)
@@ -82,6 +230,10 @@ class ZeroAnimControlsUI(QtGui.QDialog):
         main_layout.setContentsMargins(6, 6, 6, 6)
         main_layout.addLayout(option_layout)
         main_layout.addLayout(prefix_layout)
+        main_layout.addLayout(rigs_layout)
+        main_layout.addLayout(profile_layout)
+        main_layout.addLayout(range_layout)
+        main_layout.addLayout(pose_layout)
         main_layout.addStretch(1)
         main_layout.addLayout(button_layout)
 
@@ -90,75 +242,723 @@ class ZeroAnimControlsUI(QtGui.QDialog):
     def create_connections(self):
         self.by_prefix_radio_btn.toggled.connect(self.on_toggle_cmd)
         self.by_selection_radio_btn.toggled.connect(self.on_toggle_cmd)
+        self.by_rigs_radio_btn.toggled.connect(self.on_toggle_cmd)
+        self.mode_box.currentIndexChanged.connect(self.on_toggle_cmd)
         self.reset_btn.clicked.connect(self.reset_btn_cmd)
         self.apply_btn.clicked.connect(self.apply_btn_cmd)
+        self.store_btn.clicked.connect(self.store_btn_cmd)
+        self.save_pose_btn.clicked.connect(self.save_pose_btn_cmd)
+        self.restore_pose_btn.clicked.connect(self.restore_pose_btn_cmd)
         self.close_btn.clicked.connect(self.close_btn_cmd)
 
     def on_toggle_cmd(self):
-        if self.by_prefix_radio_btn.isChecked():
-            self.prefix_line_edit.setEnabled(True)
-        elif self.by_selection_radio_btn.isChecked():
-            self.prefix_line_edit.setEnabled(False)
+        # rigs are reset by the prefixes of their controls
+        self.prefix_line_edit.setEnabled(not self.by_selection_radio_btn.isChecked())
+        self.rigs_line_edit.setEnabled(self.by_rigs_radio_btn.isChecked())
+        keyed = self.mode_box.currentText() != 'Current frame'
+        self.start_spin.setEnabled(keyed)
+        self.end_spin.setEnabled(keyed)
 
     def reset_btn_cmd(self):
         self.apply_btn_cmd()
-        self.close_btn_cmd()
+        # a bulk reset closes the window once it is done
+        if self.bulk_reset is None:
+            self.close_btn_cmd()
+        else:
+            self.close_when_done = True
 
     def apply_btn_cmd(self):
+        if self.bulk_reset is not None:
+            return
+        if self.by_rigs_radio_btn.isChecked():
+            self.start_bulk_reset()
+            return
+
+        anim_controls = self.get_controls()
+        if not anim_controls:
+            return
+
+        # anim controls with matching prefix or selected controls, reset them...
+        self.zero_anim.reset_controls(anim_controls, self.use_defaults_chk.isChecked(), self.mode_box.currentText(),
+                                      self.time_range())
+        sys.stdout.write('Operation completed.\n')
+
+    def time_range(self):
+        start, end = self.start_spin.value(), self.end_spin.value()
+        return min(start, end), max(start, end)
+
+    def store_btn_cmd(self):
+        anim_controls = self.get_controls()
+        if not anim_controls:
+            return
+
+        # the current pose becomes the defaults of these controls
+        self.zero_anim.store_defaults(anim_controls)
+        sys.stdout.write('Stored defaults of %d controls.\n' % len(anim_controls))
+
+    def save_pose_btn_cmd(self):
+        anim_controls = self.get_controls()
+        if not anim_controls:
+            return
+
+        name, ok = QtGui.QInputDialog.getText(self, 'Save Pose', 'Pose name:')
+        if not ok:
+            return
+        file_name = POSE_NAME_INVALID.sub('_', name.strip()).strip('_')
+        if not file_name:
+            cmds.warning('Please enter a pose name with at least one letter or digit.')
+            return
+        directory = get_pose_directory()
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        path = self.zero_anim.save_pose(os.path.join(directory, file_name + posesnapshot.EXTENSION), anim_controls)
+        sys.stdout.write('Saved pose of %d controls to %s.\n' % (len(anim_controls), path))
+
+    def restore_pose_btn_cmd(self):
+        anim_controls = self.get_controls()
+        if not anim_controls:
+            return
+
+        path = QtGui.QFileDialog.getOpenFileName(self, 'Restore Pose', get_pose_directory(),
+                                                 'Poses (*%s)' % posesnapshot.EXTENSION)[0]
+        if not path:
+            return
+        try:
+            pose = posesnapshot.read(path)
+        except posesnapshot.PoseError as e:
+            cmds.warning(str(e))
+            return
+        values = self.zero_anim.restore_pose(pose, anim_controls)
+        sys.stdout.write('Restored %d attributes.\n' % len(values))
+
+    def start_bulk_reset(self):
+        namespaces = self.zero_anim.get_rigs(self.rigs_line_edit.text().split(','))
+        if not namespaces:
+            cmds.warning('No matching rigs found.')
+            return
+        prefix_list = [prefix for prefix in self.prefix_line_edit.text().split(',') if prefix.strip()]
+        if not prefix_list:
+            cmds.warning("Enter the prefix(es) of the rigs' controls.")
+            return
+
+        self.bulk_reset = self.zero_anim.bulk_reset(namespaces, prefix_list, self.use_defaults_chk.isChecked(),
+                                                    self.pause_viewport_chk.isChecked(), self.mode_box.currentText(),
+                                                    self.time_range())
+        self.bulk_timings = []
+        self.progress = QtGui.QProgressDialog('Resetting %d rigs...' % len(namespaces), 'Cancel', 0, len(namespaces),
+                                              self)
+        self.progress.setWindowModality(QtCore.Qt.WindowModal)
+        self.progress.setMinimumDuration(0)
+        self.bulk_timer.start(0)
+
+    def bulk_step_cmd(self):
+        # one slice per tick, maya redraws and the cancel button is seen in between
+        deadline = time.time() + BULK_SLICE
+        try:
+            while time.time() < deadline:
+                if self.progress.wasCanceled():
+                    self.finish_bulk_reset()
+                    return
+                namespace, count, seconds = next(self.bulk_reset)
+                self.bulk_timings.append((namespace, count, seconds))
+                sys.stdout.write('%s: %d controls in %.3fs\n' % (namespace, count, seconds))
+                self.progress.setValue(len(self.bulk_timings))
+        except StopIteration:
+            self.finish_bulk_reset()
+
+    def finish_bulk_reset(self):
+        self.bulk_timer.stop()
+        # closes the undo chunk and resumes the viewport, rigs already reset stay reset
+        self.bulk_reset.close()
+        self.bulk_reset = None
+        self.progress.close()
+        self.progress = None
+
+        seconds = sum(timing[2] for timing in self.bulk_timings)
+        if self.bulk_timings:
+            slowest = max(self.bulk_timings, key=lambda timing: timing[2])
+            sys.stdout.write('Reset %d rigs in %.3fs, slowest %s in %.3fs.\n' % (
+                len(self.bulk_timings), seconds, slowest[0], slowest[2]))
+        if self.close_when_done:
+            self.close_when_done = False
+            self.close_btn_cmd()
+
+    def get_controls(self):
         anim_controls = []
         # check which option is active
-        if self.by_prefix_radio_btn.isChecked():
+        if self.by_rigs_radio_btn.isChecked():
+            prefix_list = self.prefix_line_edit.text().split(',')
+            for namespace in self.zero_anim.get_rigs(self.rigs_line_edit.text().split(',')):
+                anim_controls.extend(self.zero_anim.get_controls_prefix(namespaced(prefix_list, namespace)))
+            if not anim_controls:
+                cmds.warning('No matching controls found.')
+
+        elif self.by_prefix_radio_btn.isChecked():
             prefix_list = self.prefix_line_edit.text().split(',')
             anim_controls = self.zero_anim.get_controls_prefix(prefix_list)
             # check if prefix_list returned any matches
             if not anim_controls:
                 cmds.warning('No matching controls found.')
-                return
 
         elif self.by_selection_radio_btn.isChecked():
             anim_controls = self.zero_anim.get_controls_selection()
             # check if any controls we selected
             if not anim_controls:
                 cmds.warning('Select controls to reset.')
-                return
-
-        # anim controls with matching prefix or selected controls, reset them...
-        self.zero_anim.reset_controls(anim_controls)
-        sys.stdout.write('Operation completed.\n')
+        return anim_controls
 
     def close_btn_cmd(self):
+        if self.bulk_reset is not None:
+            self.finish_bulk_reset()
         cmds.deleteUI(self.objectName(), window=True)
 
 
 class ZeroAnimControls(object):
 
     def get_controls_prefix(self, prefix_list=None):
-        transforms = cmds.ls(prefix_list, et='transform')
-        joints = cmds.ls(prefix_list, et='joint')
-        anim_controls = transforms + joints
+        # the index matches like ls with et='transform' and et='joint' but does not scan the scene
+        anim_controls = get_control_index().match(prefix_list)
         return anim_controls
 
     def get_controls_selection(self):
         anim_controls = cmds.ls(sl=True, tr=True)
         return anim_controls
 
-    def reset_controls(self, anim_controls=None):
-        for control in anim_controls:
-            attributes = cmds.listAttr(control, k=True)
-
-            for attr in attributes:
-                full_attribute_name = control + '.' + attr
-
-                # check if attribute is locked..
-                if not cmds.getAttr(full_attribute_name, lock=True):
-                    # attribute set to 1 considered to be default state, skip...
-                    if cmds.getAttr(full_attribute_name) != 1:
-                        # non scale attributes are set back to 0
-                        if attr.find('scale') == -1:
-                            cmds.setAttr(full_attribute_name, 0)
-                        else:
-                            # scale attributes are set back to 1
-                            cmds.setAttr(full_attribute_name, 1)
+    def get_rigs(self, rig_list=None):
+        """
+        returns the namespaces of the rigs, given as namespaces or reference nodes, wildcards allowed
+        """
+        namespaces = cmds.namespaceInfo(':', listOnlyNamespaces=True, recurse=True) or []
+        rigs = []
+        for rig in rig_list:
+            rig = rig.strip().lstrip(':')
+            if not rig:
+                continue
+            references = cmds.ls(rig, type='reference')
+            if references:
+                rigs.extend(cmds.referenceQuery(reference, namespace=True).lstrip(':') for reference in references
+                            if cmds.referenceQuery(reference, isLoaded=True))
+            else:
+                match = re.compile(fnmatch.translate(rig)).match
+                rigs.extend(namespace for namespace in namespaces if match(namespace))
+        return unique(rigs)
+
+    def bulk_reset(self, namespaces=None, prefix_list=None, use_defaults=False, pause_viewport=False,
+                   mode='Current frame', time_range=None):
+        """
+        resets the controls matching prefix_list in each namespace, one rig at a time, yielding (namespace, control
+        count, seconds) after each.  The whole reset is one undo chunk that stays open, with the viewport paused,
+        until the generator is exhausted or closed, so it can be stepped between redraws.
+        """
+        with undo_chunk(UNDO_CHUNK), suspended_evaluation(pause_viewport):
+            for namespace in namespaces:
+                start = time.time()
+                anim_controls = self.get_controls_prefix(namespaced(prefix_list, namespace))
+                if anim_controls:
+                    self.reset_controls(anim_controls, use_defaults, mode, time_range)
+                yield namespace, len(anim_controls), time.time() - start
+
+    def reset_controls(self, anim_controls=None, use_defaults=False, mode='Current frame', time_range=None):
+        """
+        resets the controls in one of RESET_MODES, time_range is (start, end) and defaults to the playback range
+        """
+        states = self.read_plugs(anim_controls)
+        # keyed modes key plugs already at their value too, their animation may not be
+        keyed = mode != 'Current frame'
+        if use_defaults:
+            values = self.default_values(states, keyed)
+        else:
+            values = self.reset_values(states, keyed)
+        if keyed:
+            self.key_values(values, states, mode, time_range)
+        else:
+            self.apply_values(values, states)
+        return values
+
+    def store_defaults(self, anim_controls=None):
+        """
+        stores the current values of the controls as their defaults in their rigs' profiles
+        """
+        for profile, states in self.group_by_rig(self.read_plugs(anim_controls)):
+            if profile.path is None:
+                cmds.warning('Defaults of controls in an unsaved scene can not be kept, save the scene first.')
+                continue
+            for control, control_states in group_by_control(states):
+                profile.store(control, control_states, pose=True)
+            profile.save()
+
+    def snapshot(self, anim_controls=None, states=None):
+        """
+        returns a PoseSnapshot of the controls, or of states already read, with plug names without namespaces
+        """
+        if states is None:
+            states = self.read_plugs(anim_controls)
+        return posesnapshot.PoseSnapshot([strip_namespaces(state.plug) for state in states],
+                                         [state.value for state in states])
+
+    def save_pose(self, path=None, anim_controls=None):
+        # namespaces are not stored, the controls should be from one rig
+        return self.snapshot(anim_controls).write(path)
+
+    def restore_pose(self, pose=None, anim_controls=None):
+        """
+        sets the controls to the pose in one undo chunk, only the plugs whose value differs.  Controls are matched to
+        the pose without their namespace, controls of several rigs each get the pose.
+        """
+        states = self.read_plugs(anim_controls)
+        values = {}
+        for namespace, namespace_states in group_by_namespace(states):
+            plugs = dict((strip_namespaces(state.plug), state.plug) for state in namespace_states)
+            # the pose may hold plugs these controls do not have, or can not set right now
+            for plug in self.snapshot(states=namespace_states).diff(pose):
+                if plug in plugs:
+                    values[plugs[plug]] = pose.get(plug)
+        self.apply_values(values, states)
+        return values
+
+    def default_values(self, states=None, all_plugs=False):
+        """
+        returns {plug: value} for the plugs that are not at their rig's default, see RigProfile, or for all plugs
+        """
+        values = {}
+        for profile, rig_states in self.group_by_rig(states):
+            for control, control_states in group_by_control(rig_states):
+                defaults = profile.defaults(control, control_states)
+                for state in control_states:
+                    value = defaults.get(state.attribute, state.default)
+                    if all_plugs or state.value != value:
+                        values[state.plug] = value
+            # only written when a control was captured for the first time or again
+            profile.save()
+        return values
+
+    def group_by_rig(self, states=None):
+        """
+        yields (RigProfile, states) per rig asset.  Referenced rigs are keyed by their file, controls that are not
+        referenced by the scene they are in.  An unsaved scene has nothing to key them by, they get a profile that is
+        not kept so unrelated unsaved scenes never share defaults.
+        """
+        rigs = collections.OrderedDict()
+        scene = cmds.file(query=True, sceneName=True) or None
+        for control, control_states in group_by_control(states):
+            if cmds.referenceQuery(control, isNodeReferenced=True):
+                rig = cmds.referenceQuery(control, filename=True, withoutCopyNumber=True)
+            else:
+                rig = scene
+            rigs.setdefault(rig, []).extend(control_states)
+        for rig, rig_states in rigs.iteritems():
+            yield RigProfile(rig), rig_states
+
+    def read_plugs(self, anim_controls=None):
+        """
+        returns a PlugState for every keyable attribute of the controls that can be set, the same attributes listAttr
+        -k lists minus the locked ones and the ones driven by anything but an anim curve.  Reads through the API, no
+        command is run per attribute.
+        """
+        selection = om.MSelectionList()
+        for control in unique(anim_controls):
+            selection.add(control)
+
+        states = []
+        for i in xrange(selection.length()):
+            node = selection.getDependNode(i)
+            if node.hasFn(om.MFn.kDagNode):
+                control = selection.getDagPath(i).partialPathName()
+            else:
+                control = om.MFnDependencyNode(node).name()
+
+            # compounds already looked at, their children are read together
+            compounds = set()
+            fn = om.MFnDependencyNode(node)
+            for a in xrange(fn.attributeCount()):
+                attribute = fn.attribute(a)
+                if in_array(attribute):
+                    continue
+                plug = om.MPlug(node, attribute)
+                if plug.isCompound:
+                    continue
+
+                if plug.isChild:
+                    compound = plug.parent()
+                    parent = om.MFnAttribute(compound.attribute()).name
+                    if parent in compounds:
+                        continue
+                    compounds.add(parent)
+                    children = [(child, plug_value(child) if is_settable(child) else None)
+                                for child in (compound.child(c) for c in xrange(compound.numChildren()))]
+                    whole = all(value is not None for child, value in children)
+                    parent = '%s.%s' % (control, parent) if whole else None
+                    for child, value in children:
+                        if value is not None:
+                            name = om.MFnAttribute(child.attribute()).name
+                            states.append(PlugState(control, '%s.%s' % (control, name), name, value,
+                                                    plug_default(child), parent, is_animated(child)))
+                elif is_settable(plug):
+                    value = plug_value(plug)
+                    if value is not None:
+                        name = om.MFnAttribute(attribute).name
+                        states.append(PlugState(control, '%s.%s' % (control, name), name, value, plug_default(plug),
+                                                None, is_animated(plug)))
+        return states
+
+    def reset_values(self, states=None, all_plugs=False):
+        """
+        returns {plug: value} for the plugs that are not at their default, or for all plugs.  Values of 1 are
+        considered default and left alone, scale attributes go back to 1 and everything else to 0.  With all_plugs,
+        used by the keyed modes, an animated plug is reset even at 1, that is only its value on the current frame.
+        """
+        values = {}
+        for state in states:
+            # attribute set to 1 considered to be default state, skip...
+            if state.value == 1 and not (all_plugs and state.animated):
+                continue
+            # scale attributes are set back to 1, others to 0
+            value = 1 if 'scale' in state.attribute else 0
+            if all_plugs or state.value != value:
+                values[state.plug] = value
+        return values
+
+    def key_values(self, values=None, states=None, mode='Every frame', time_range=None):
+        """
+        keys the values over time_range in one undo chunk.  Every frame keys each plug on every frame of the range,
+        Existing keys sets the keys the plugs already have in the range.  Plugs are grouped by value so each value is
+        one setKeyframe or keyframe call for every plug and frame.  Plugs without animation are set in Existing keys.
+        """
+        if time_range is None:
+            time_range = cmds.playbackOptions(query=True, minTime=True), cmds.playbackOptions(query=True, maxTime=True)
+        animated = set(state.plug for state in states if state.animated)
+
+        plugs = collections.defaultdict(list)
+        static = {}
+        for plug, value in values.iteritems():
+            if mode == 'Every frame' or plug in animated:
+                plugs[value].append(plug)
+            else:
+                static[plug] = value
+
+        with undo_chunk(UNDO_CHUNK):
+            if mode == 'Every frame':
+                frames = range(int(time_range[0]), int(time_range[1]) + 1)
+                for value, value_plugs in plugs.iteritems():
+                    cmds.setKeyframe(value_plugs, time=frames, value=value)
+            else:
+                for value, value_plugs in plugs.iteritems():
+                    cmds.keyframe(value_plugs, edit=True, time=tuple(time_range), absolute=True, valueChange=value)
+                # only the ones that change, like the current frame reset
+                state_values = dict((state.plug, state.value) for state in states)
+                self.apply_values(dict((plug, value) for plug, value in static.iteritems()
+                                       if state_values[plug] != value), states)
+
+    def apply_values(self, values=None, states=None):
+        """
+        sets the values in one undo chunk.  Compounds with more than one child changing are set with one setAttr, the
+        children that do not change keep their current value.
+        """
+        compounds = collections.defaultdict(list)
+        for state in states:
+            if state.parent is not None:
+                compounds[state.parent].append(state)
+
+        with undo_chunk(UNDO_CHUNK):
+            done = set()
+            for parent, children in compounds.iteritems():
+                if sum(1 for child in children if child.plug in values) < 2:
+                    continue
+                cmds.setAttr(parent, *[values.get(child.plug, child.value) for child in children])
+                done.update(child.plug for child in children)
+            for plug, value in values.iteritems():
+                if plug not in done:
+                    cmds.setAttr(plug, value)
+
+
+class ControlIndex(object):
+    """
+    Transforms and joints of the scene bucketed by namespace, {namespace: {hash: (name, handle)}} with names stored
+    without their namespace.  Built by one pass over the scene the first time it is matched against and kept up to date
+    by node callbacks after that.  File operations reset it, which also removes the node callbacks until it is built
+    again.  Call close() to remove every callback.
+    """
+    def __init__(self):
+        self.namespaces = {}
+        # hash: namespace, to find a node's bucket again when it is renamed or removed
+        self.buckets = {}
+        self.built = False
+        # only registered while the index is built, see build and reset
+        self.node_callback_ids = []
+        self.callback_ids = [om.MSceneMessage.addCallback(getattr(om.MSceneMessage, message), self.reset)
+                             for message in RESET_MESSAGES]
+
+    def close(self):
+        self.reset()
+        om.MMessage.removeCallbacks(self.callback_ids)
+        self.callback_ids = []
+
+    def reset(self, *args):
+        if self.node_callback_ids:
+            om.MMessage.removeCallbacks(self.node_callback_ids)
+            self.node_callback_ids = []
+        self.namespaces = {}
+        self.buckets = {}
+        self.built = False
+
+    def build(self):
+        self.reset()
+        nodes = om.MItDependencyNodes(om.MFn.kTransform)
+        while not nodes.isDone():
+            self.add(nodes.thisNode())
+            nodes.next()
+        self.built = True
+
+        self.node_callback_ids = [om.MNodeMessage.addNameChangedCallback(om.MObject(), self.name_changed_cmd)]
+        # adding or discarding a node twice does no harm, should the transform callbacks also fire for joints
+        for node_type in ('transform', 'joint'):
+            self.node_callback_ids.append(om.MDGMessage.addNodeAddedCallback(self.node_added_cmd, node_type))
+            self.node_callback_ids.append(om.MDGMessage.addNodeRemovedCallback(self.node_removed_cmd, node_type))
+
+    def add(self, node=None):
+        if node.apiType() not in CONTROL_TYPES:
+            return
+        handle = om.MObjectHandle(node)
+        namespace, _, name = om.MFnDependencyNode(node).name().rpartition(':')
+        self.namespaces.setdefault(namespace, {})[handle.hashCode()] = (name, handle)
+        self.buckets[handle.hashCode()] = namespace
+
+    def discard(self, node=None):
+        key = om.MObjectHandle(node).hashCode()
+        namespace = self.buckets.pop(key, None)
+        if namespace is not None:
+            del self.namespaces[namespace][key]
+            if not self.namespaces[namespace]:
+                del self.namespaces[namespace]
+
+    def node_added_cmd(self, node, *args):
+        self.add(node)
+
+    def node_removed_cmd(self, node, *args):
+        self.discard(node)
+
+    def name_changed_cmd(self, node, *args):
+        if node.apiType() in CONTROL_TYPES:
+            self.discard(node)
+            self.add(node)
+
+    def match(self, patterns=None):
+        """
+        returns the shortest unique names of the controls matching any of the ls style patterns, ctrl* or rig:ctrl*.
+        Like ls, a * does not match across namespaces and a pattern without one only matches the root namespace.
+        Every pattern for a namespace is joined into one expression so each name is tested once.
+        """
+        if not self.built:
+            self.build()
+
+        names = collections.defaultdict(list)
+        for pattern in patterns:
+            pattern = pattern.strip().lstrip(':')
+            if pattern:
+                namespace, _, name = pattern.rpartition(':')
+                names[namespace].append(name)
+
+        # namespace buckets matching each namespace pattern, then every name pattern of a bucket in one expression
+        expressions = collections.defaultdict(list)
+        for namespace_pattern, name_patterns in names.iteritems():
+            # fnmatch.filter would ignore case on windows, ls does not
+            namespace_match = re.compile(fnmatch.translate(namespace_pattern)).match
+            for namespace in self.namespaces:
+                if namespace_match(namespace):
+                    expressions[namespace].extend(fnmatch.translate(name) for name in name_patterns)
+
+        anim_controls = []
+        for namespace, expression in expressions.iteritems():
+            expression = re.compile('|'.join('(?:%s)' % e for e in expression))
+            for name, handle in self.namespaces[namespace].itervalues():
+                if expression.match(name) and handle.isValid():
+                    anim_controls.append(om.MDagPath.getAPathTo(handle.object()).partialPathName())
+        return anim_controls
+
+
+class RigProfile(object):
+    """
+    Defaults of one rig's controls, kept in a json file named after a hash of the rig under the profile directory.
+    Controls are stored without namespaces so every copy of a rig shares the profile.  Each control's entry holds a
+    signature of its attributes, when the attributes change the entry is captured again.  Attributes the control still
+    has keep their stored defaults, new ones take their attribute defaults.  With rig None the profile only lives in
+    memory, it starts empty and is never written.
+    """
+    def __init__(self, rig=None, directory=None):
+        self.rig = rig
+        self.path = None
+        if rig is not None:
+            self.path = os.path.join(directory or get_profile_directory(),
+                                     hashlib.sha1(rig.encode('utf-8')).hexdigest() + '.json')
+        self.controls = {}
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        if self.path is None:
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (IOError, ValueError):
+            return
+        if data.get('rig') == self.rig:
+            self.controls = data.get('controls', {})
+
+    def save(self):
+        if not self.dirty or self.path is None:
+            return
+        directory = os.path.dirname(self.path)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(self.path, 'w') as f:
+            json.dump({'rig': self.rig, 'controls': self.controls}, f, indent=4, sort_keys=True)
+        self.dirty = False
+
+    def defaults(self, control=None, states=None):
+        """
+        returns {attribute: value} for the control, capturing it first if it is new or its attributes changed
+        """
+        entry = self.controls.get(strip_namespaces(control))
+        if entry is None or entry.get('signature') != signature(states):
+            entry = self.store(control, states, entry['defaults'] if entry else {})
+        return entry['defaults']
+
+    def store(self, control=None, states=None, defaults=None, pose=False):
+        defaults = defaults or {}
+        entry = {
+            'signature': signature(states),
+            'defaults': dict((state.attribute, state.value if pose else defaults.get(state.attribute, state.default))
+                             for state in states),
+        }
+        self.controls[strip_namespaces(control)] = entry
+        self.dirty = True
+        return entry
+
+
+def group_by_control(states=None):
+    # read_plugs keeps each control's states together
+    controls = collections.OrderedDict()
+    for state in states:
+        controls.setdefault(state.control, []).append(state)
+    return controls.iteritems()
+
+
+def group_by_namespace(states=None):
+    namespaces = collections.OrderedDict()
+    for state in states:
+        namespace = state.control.rpartition('|')[2].rpartition(':')[0]
+        namespaces.setdefault(namespace, []).append(state)
+    return namespaces.iteritems()
+
+
+def signature(states=None):
+    return hashlib.sha1(' '.join(sorted(state.attribute for state in states)).encode('utf-8')).hexdigest()
+
+
+def strip_namespaces(name=None):
+    return '|'.join(part.rpartition(':')[2] for part in name.split('|'))
+
+
+def namespaced(prefix_list=None, namespace=None):
+    return ['%s:%s' % (namespace, prefix.strip().lstrip(':')) for prefix in prefix_list if prefix.strip()]
+
+
+@contextlib.contextmanager
+def suspended_evaluation(suspend=True):
+    """
+    suspends refreshes and pauses viewport 2.0 for the duration.  ogs -pause toggles, it is left alone if already
+    paused.  Nothing to do in batch mode.
+    """
+    suspend = suspend and not cmds.about(batch=True)
+    paused = True
+    if suspend:
+        paused = cmds.ogs(query=True, pause=True)
+        if not paused:
+            cmds.ogs(pause=True)
+        cmds.refresh(suspend=True)
+    try:
+        yield
+    finally:
+        if suspend:
+            cmds.refresh(suspend=False)
+            if not paused:
+                cmds.ogs(pause=True)
+
+
+@contextlib.contextmanager
+def undo_chunk(name=None):
+    cmds.undoInfo(openChunk=True, chunkName=name)
+    try:
+        yield
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+
+def unique(names=None):
+    seen = set()
+    return [name for name in names if not (name in seen or seen.add(name))]
+
+
+def in_array(attribute=None):
+    # elements of multi attributes are not listed by listAttr -k either
+    fn = om.MFnAttribute(attribute)
+    while True:
+        if fn.array:
+            return True
+        if fn.parent.isNull():
+            return False
+        fn = om.MFnAttribute(fn.parent)
+
+
+def is_settable(plug=None):
+    if not plug.isKeyable or plug.isLocked:
+        return False
+    # animated attributes can be set until the next time change, like setAttr does, anything else driving them wins
+    sources = plug.connectedTo(True, False)
+    return not sources or sources[0].node().hasFn(om.MFn.kAnimCurve)
+
+
+def is_animated(plug=None):
+    # is_settable has already made sure that anything driving the plug is an anim curve
+    return bool(plug.connectedTo(True, False))
+
+
+def plug_value(plug=None):
+    """
+    returns the value of a numeric plug in ui units, None for anything that is not a number
+    """
+    attribute = plug.attribute()
+    if attribute.hasFn(om.MFn.kUnitAttribute):
+        unit_type = om.MFnUnitAttribute(attribute).unitType()
+        if unit_type == om.MFnUnitAttribute.kAngle:
+            return plug.asMAngle().asUnits(om.MAngle.uiUnit())
+        if unit_type == om.MFnUnitAttribute.kDistance:
+            return plug.asMDistance().asUnits(om.MDistance.uiUnit())
+        if unit_type == om.MFnUnitAttribute.kTime:
+            return plug.asMTime().asUnits(om.MTime.uiUnit())
+        return None
+    if attribute.hasFn(om.MFn.kNumericAttribute) or attribute.hasFn(om.MFn.kEnumAttribute):
+        return plug.asDouble()
+    return None
+
+
+def plug_default(plug=None):
+    """
+    returns the default value of the plug's attribute in ui units, what attributeQuery -listDefault gives, for the
+    plugs plug_value can read
+    """
+    attribute = plug.attribute()
+    if attribute.hasFn(om.MFn.kUnitAttribute):
+        default = om.MFnUnitAttribute(attribute).default
+        if isinstance(default, om.MAngle):
+            return default.asUnits(om.MAngle.uiUnit())
+        if isinstance(default, om.MDistance):
+            return default.asUnits(om.MDistance.uiUnit())
+        return default.asUnits(om.MTime.uiUnit())
+    if attribute.hasFn(om.MFn.kEnumAttribute):
+        return float(om.MFnEnumAttribute(attribute).default)
+    return float(om.MFnNumericAttribute(attribute).default)
 
 
 def showUI():